@@ -0,0 +1,364 @@
+import sys
+import traceback
+import time
+import os
+import signal
+import shutil
+import glob
+import subprocess
+import json
+import yaml
+from flask import Flask, request
+from threading import Lock
+from contextlib import ExitStack
+
+CONTROL = "/mnt/vectorized/control"
+REDPANDA = "/mnt/vectorized/redpanda"
+SNAPSHOTS = "/mnt/vectorized/snapshots"
+HARNESS = "/mnt/vectorized/harness"
+WORKLOAD_LOGS = "/mnt/vectorized/workloads/logs"
+
+def now_us():
+    return int(time.time() * 1000000)
+
+class ActionError(Exception):
+    pass
+
+class Agent:
+    def __init__(self):
+        self.lock = Lock()
+        self.locks = dict()
+        self.processes = dict()
+        self.analyses = dict()
+
+    def read_pid(self):
+        # redpanda.alive doesn't lock so the file may be gone meanwhile
+        try:
+            with open(f"{REDPANDA}/pid", "r") as f:
+                pid = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if pid == "":
+            return None
+        return int(pid)
+
+    def is_running(self, pid, comm):
+        # reaps the redpanda started by the agent so a killed one
+        # doesn't linger as a zombie
+        process = self.processes.get(pid, None)
+        if process != None and process.poll() != None:
+            self.processes.pop(pid, None)
+            return False
+        try:
+            with open(f"/proc/{pid}/comm", "r") as f:
+                return f.read().strip() == comm
+        except FileNotFoundError:
+            return False
+
+    def signal_redpanda(self, sig):
+        pid = self.read_pid()
+        if pid == None:
+            return "NO"
+        if not self.is_running(pid, "redpanda"):
+            return "NO"
+        os.kill(pid, sig)
+        return "YES"
+
+    def redpanda_start(self):
+        log = open(f"{REDPANDA}/log.{int(time.time())}", "w")
+        process = subprocess.Popen(
+            ["/bin/redpanda", "--redpanda-cfg", "/etc/redpanda/redpanda.yaml", "--smp", "1"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        log.close()
+        self.processes[process.pid] = process
+        with open(f"{REDPANDA}/pid", "w") as f:
+            f.write(f"{process.pid}\n")
+        return ""
+
+    def redpanda_stop(self):
+        pid = self.read_pid()
+        if pid == None:
+            return ""
+        if self.is_running(pid, "redpanda"):
+            os.kill(pid, signal.SIGKILL)
+            process = self.processes.get(pid, None)
+            if process != None:
+                process.wait()
+                self.processes.pop(pid, None)
+        os.remove(f"{REDPANDA}/pid")
+        return ""
+
+    def redpanda_alive(self):
+        pid = self.read_pid()
+        if pid == None:
+            return "NO"
+        return "YES" if self.is_running(pid, "redpanda") else "NO"
+
+    def redpanda_clean(self):
+        for path in glob.glob(f"{REDPANDA}/data/*") + glob.glob(f"{REDPANDA}/coredump/*"):
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        for path in glob.glob(f"{REDPANDA}/log.*") + glob.glob(f"{REDPANDA}/pid"):
+            os.remove(path)
+        if os.path.isdir(f"{REDPANDA}/tail"):
+            shutil.rmtree(f"{REDPANDA}/tail")
+        shutil.copyfile("/mnt/vectorized/redpanda.yaml", "/etc/redpanda/redpanda.yaml")
+        return ""
+
+    # a reused (warm) redpanda keeps writing to the logs of the previous
+    # experiments so an experiment remembers their sizes when it starts and
+    # redpanda.log_tail copies what's appended since to {REDPANDA}/tail
+    def redpanda_log_sizes(self):
+        sizes = dict()
+        for path in glob.glob(f"{REDPANDA}/log.*"):
+            sizes[os.path.basename(path)] = os.path.getsize(path)
+        return json.dumps(sizes)
+
+    def redpanda_log_tail(self, sizes):
+        sizes = json.loads(sizes)
+        if os.path.isdir(f"{REDPANDA}/tail"):
+            shutil.rmtree(f"{REDPANDA}/tail")
+        os.makedirs(f"{REDPANDA}/tail")
+        for path in glob.glob(f"{REDPANDA}/log.*"):
+            name = os.path.basename(path)
+            with open(path, "rb") as src:
+                src.seek(sizes.get(name, 0))
+                with open(f"{REDPANDA}/tail/{name}", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+        return ""
+
+    def redpanda_version(self):
+        result = subprocess.run(["/bin/redpanda", "--version"], stdin=subprocess.DEVNULL, capture_output=True)
+        return result.stdout.decode("utf-8").strip()
+
+    def snapshot_path(self, key):
+        if not key.isalnum():
+            raise ActionError(f"invalid snapshot key: {key}")
+        return os.path.join(SNAPSHOTS, key)
+
+    # copies the data dir of a stopped redpanda aside; the copy is made
+    # next to the snapshot and renamed so a snapshot is either complete
+    # or missing
+    def redpanda_snapshot(self, key):
+        if self.redpanda_alive() == "YES":
+            raise ActionError("can't snapshot a running redpanda")
+        path = self.snapshot_path(key)
+        tmp = path + ".tmp"
+        for target in [tmp, path]:
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+        os.makedirs(tmp)
+        shutil.copytree(f"{REDPANDA}/data", f"{tmp}/data", symlinks=True)
+        with open(f"{tmp}/version", "w") as f:
+            f.write(self.redpanda_version())
+        os.rename(tmp, path)
+        return ""
+
+    # replaces the data dir with a snapshot taken by the same redpanda
+    # version, the rest is cleaned the same way as redpanda.clean does
+    def redpanda_restore(self, key):
+        if self.redpanda_alive() == "YES":
+            raise ActionError("can't restore a running redpanda")
+        path = self.snapshot_path(key)
+        if not os.path.isfile(f"{path}/version"):
+            raise ActionError(f"snapshot {key} doesn't exist")
+        with open(f"{path}/version", "r") as f:
+            version = f.read()
+        if version != self.redpanda_version():
+            raise ActionError(f"snapshot {key} is made by another version: {version}")
+        self.redpanda_clean()
+        shutil.copytree(f"{path}/data", f"{REDPANDA}/data", symlinks=True, dirs_exist_ok=True)
+        return ""
+
+    # applies a batch of `rpk config set key value` to redpanda.yaml in one
+    # go: args are key, value, key, value... values are parsed as yaml the
+    # same way rpk does; the config is reread to validate all keys applied
+    def redpanda_configure(self, args):
+        if len(args) % 2 != 0:
+            raise ActionError(f"expected key value pairs, got {len(args)} args")
+        settings = dict()
+        for i in range(0, len(args), 2):
+            settings[args[i]] = yaml.safe_load(args[i+1])
+        with open("/etc/redpanda/redpanda.yaml", "r") as f:
+            config = yaml.safe_load(f)
+        for key in settings:
+            node = config
+            path = key.split(".")
+            for part in path[:-1]:
+                if not isinstance(node.get(part), dict):
+                    node[part] = dict()
+                node = node[part]
+            node[path[-1]] = settings[key]
+        with open("/etc/redpanda/redpanda.yaml", "w") as f:
+            yaml.safe_dump(config, f, default_flow_style=False)
+        with open("/etc/redpanda/redpanda.yaml", "r") as f:
+            config = yaml.safe_load(f)
+        applied = dict()
+        for key in settings:
+            node = config
+            for part in key.split("."):
+                node = node.get(part) if isinstance(node, dict) else None
+            if node != settings[key]:
+                raise ActionError(f"{key} isn't applied: expected {settings[key]} got {node}")
+            applied[key] = node
+        return json.dumps(applied)
+
+    def analysis_dir(self, experiment_id, ip):
+        path = os.path.normpath(os.path.join(WORKLOAD_LOGS, experiment_id, ip))
+        if os.path.dirname(os.path.dirname(path)) != WORKLOAD_LOGS or not os.path.isdir(path):
+            raise ActionError(f"unknown workload log dir: {experiment_id}/{ip}")
+        return path
+
+    # the node side analysis (see harness/chaos/workloads/node_analysis.py)
+    # replays the workload.log for minutes so analyze_node.py is started
+    # detached instead of holding the batch lock and is polled with
+    # analysis.status; the config and the summary are passed via files
+    # next to the log so the script's output doesn't matter
+    def analysis_start(self, experiment_id, ip, config):
+        path = self.analysis_dir(experiment_id, ip)
+        if path in self.analyses and self.analyses[path].poll() == None:
+            raise ActionError(f"analysis of {experiment_id}/{ip} is already running")
+        if os.path.isfile(f"{path}/analysis.summary.json"):
+            os.remove(f"{path}/analysis.summary.json")
+        with open(f"{path}/analysis.config.json", "w") as f:
+            f.write(config)
+        out = open(f"{path}/analysis.out", "w")
+        process = subprocess.Popen(
+            ["python3", "analyze_node.py", ip, f"{path}/analysis.config.json", f"{path}/analysis.summary.json"],
+            cwd=HARNESS, stdin=subprocess.DEVNULL, stdout=out, stderr=subprocess.STDOUT, start_new_session=True)
+        out.close()
+        self.analyses[path] = process
+        return ""
+
+    # RUNNING or the summary of the finished analysis
+    def analysis_status(self, experiment_id, ip):
+        path = self.analysis_dir(experiment_id, ip)
+        if path not in self.analyses:
+            raise ActionError(f"analysis of {experiment_id}/{ip} isn't started")
+        code = self.analyses[path].poll()
+        if code == None:
+            return "RUNNING"
+        if code != 0:
+            with open(f"{path}/analysis.out", "r", errors="replace") as f:
+                tail = f.read()[-4096:]
+            raise ActionError(f"analyze_node.py exited with {code}: {tail}")
+        with open(f"{path}/analysis.summary.json", "r") as f:
+            return f.read()
+
+    def script(self, name, args):
+        # the rest of the actions are the control scripts (network.*,
+        # *.java.*, redpanda.config ...) e.g. "network.isolate" runs
+        # network.isolate.sh
+        path = os.path.join(CONTROL, name + ".sh")
+        if os.path.dirname(os.path.abspath(path)) != CONTROL or not os.path.isfile(path):
+            raise ActionError(f"unknown action: {name}")
+        result = subprocess.run([path] + list(map(str, args)), stdin=subprocess.DEVNULL, capture_output=True)
+        if result.returncode != 0:
+            raise ActionError(f"{name} exited with {result.returncode}: {result.stderr.decode('utf-8')}")
+        return result.stdout.decode("utf-8")
+
+    def execute(self, name, args):
+        if name == "redpanda.start":
+            return self.redpanda_start()
+        elif name == "redpanda.stop":
+            return self.redpanda_stop()
+        elif name == "redpanda.pause":
+            return self.signal_redpanda(signal.SIGSTOP)
+        elif name == "redpanda.resume":
+            return self.signal_redpanda(signal.SIGCONT)
+        elif name == "redpanda.alive":
+            return self.redpanda_alive()
+        elif name == "redpanda.clean":
+            return self.redpanda_clean()
+        elif name == "redpanda.configure":
+            return self.redpanda_configure(args)
+        elif name == "redpanda.log_sizes":
+            return self.redpanda_log_sizes()
+        elif name == "redpanda.log_tail":
+            return self.redpanda_log_tail(*args)
+        elif name == "redpanda.snapshot":
+            return self.redpanda_snapshot(*args)
+        elif name == "redpanda.restore":
+            return self.redpanda_restore(*args)
+        elif name == "analysis.start":
+            return self.analysis_start(*args)
+        elif name == "analysis.status":
+            return self.analysis_status(*args)
+        else:
+            return self.script(name, args)
+
+    # an action locks the resource it changes: the part of its name before
+    # the first dot (redpanda, network, analysis, a workload ...) so e.g. a
+    # slow redpanda.stop doesn't hold up a network.isolate fired in parallel.
+    # the probes (*.alive, analysis.status) only read so they don't lock
+    def resource_lock(self, name):
+        if name.endswith(".alive") or name == "analysis.status":
+            return None
+        resource = name.split(".")[0]
+        with self.lock:
+            if resource not in self.locks:
+                self.locks[resource] = Lock()
+            return self.locks[resource]
+
+    # executes the actions one by one and stops on the first failure,
+    # started_us/effective_us are the node's local time (us since epoch)
+    # right before the action and right after it took effect. the locks of
+    # all the resources of the batch are taken upfront (in the same order
+    # by every batch) so a batch doesn't interleave with another one
+    # changing the same resource
+    def batch(self, actions):
+        results = []
+        locks = dict()
+        for action in actions:
+            lock = self.resource_lock(action["name"])
+            if lock != None:
+                locks[action["name"].split(".")[0]] = lock
+        with ExitStack() as stack:
+            for resource in sorted(locks.keys()):
+                stack.enter_context(locks[resource])
+            for action in actions:
+                name = action["name"]
+                args = action.get("args", [])
+                started_us = now_us()
+                try:
+                    output = self.execute(name, args)
+                except:
+                    e, v = sys.exc_info()[:2]
+                    trace = traceback.format_exc()
+                    print(trace, file=sys.stderr)
+                    return results, f"{name} failed: {v}"
+                results.append({
+                    "name": name,
+                    "output": output,
+                    "started_us": started_us,
+                    "effective_us": now_us()
+                })
+        return results, None
+
+agent = Agent()
+app = Flask(__name__)
+
+@app.route('/ping', methods=['GET'])
+def ping():
+    # curl http://127.0.0.1:8090/ping
+    return ""
+
+@app.route('/clock', methods=['GET'])
+def clock():
+    # curl http://127.0.0.1:8090/clock
+    # the node's side of a NTP style exchange (see harness/chaos/clock.py)
+    received_us = now_us()
+    return { "received_us": received_us, "sent_us": now_us() }
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    # curl -X POST http://127.0.0.1:8090/batch -H 'Content-Type: application/json' -d '{"actions":[{"name":"redpanda.config","args":["redpanda.enable_idempotence","true"]},{"name":"redpanda.start"}]}'
+    body = request.get_json(force=True)
+    results, error = agent.batch(body["actions"])
+    if error != None:
+        return { "results": results, "error": error }, 500
+    return { "results": results }
+
+app.run(host='0.0.0.0', port=8090, use_reloader=False, threaded=True)
@@ -0,0 +1,13 @@
+#!/bin/bash
+
+set -e
+
+if [ -f /mnt/vectorized/control/agent.pid ]; then
+    pid=$(cat /mnt/vectorized/control/agent.pid)
+    if ps -p $pid; then
+        kill -9 $pid
+    fi
+    rm /mnt/vectorized/control/agent.pid
+fi
+
+nohup python3 /mnt/vectorized/control/agent.py > /mnt/vectorized/control/agent.log 2>&1 & echo $! > /mnt/vectorized/control/agent.pid
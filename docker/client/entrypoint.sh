@@ -22,5 +22,7 @@ for host in "${!redpandas[@]}"; do
 done
 chown ubuntu:ubuntu /mnt/vectorized/redpanda.nodes
 
+su ubuntu -c /mnt/vectorized/control/agent.start.sh
+
 service ssh start
 sleep infinity
\ No newline at end of file
@@ -56,5 +56,10 @@ for host in "${!redpandas[@]}"; do
 done
 chown ubuntu:ubuntu /mnt/vectorized/redpanda.nodes
 
+mkdir -p /mnt/vectorized/snapshots
+chown ubuntu:ubuntu /mnt/vectorized/snapshots
+
+su ubuntu -c /mnt/vectorized/control/agent.start.sh
+
 service ssh start
 sleep infinity
\ No newline at end of file
@@ -0,0 +1,19 @@
+import sys
+import json
+from chaos.redpanda_static_cluster import RedpandaNode
+from chaos.workloads.all import WORKLOADS
+from chaos.workloads import node_analysis
+
+# the node side of settings.node_analysis (see chaos/workloads/node_analysis.py),
+# started on a client node by the analysis.start control action:
+#   python3 analyze_node.py <node ip> <experiment config file> <summary file>
+
+ip = sys.argv[1]
+with open(sys.argv[2], "r") as config_file:
+    config = json.load(config_file)
+
+workload_cluster = WORKLOADS[config["workload"]["name"]]("/dev/null")
+workload_cluster.nodes = [RedpandaNode(ip, 0)]
+summary = node_analysis.analyze_node(workload_cluster, config, ip)
+with open(sys.argv[3], "w") as summary_file:
+    summary_file.write(json.dumps(summary))
@@ -55,6 +55,13 @@ INDEX = """
         .borderless {
             border: 0px !important;
         }
+        table.timings {
+            border-collapse: collapse;
+        }
+        .timings th, .timings td {
+            border: 1px solid black;
+            padding: 3px;
+        }
     </style>
 </header>
 <body>
@@ -91,6 +98,28 @@ INDEX = """
 {% endfor %}
 </table>
 
+{% if timings %}
+<h2>Where the time goes</h2>
+<table class="timings">
+    <tr>
+        <th>Phase</th>
+        <th>Total (s)</th>
+        <th>Avg per run (s)</th>
+        <th>Runs</th>
+        <th>Share</th>
+    </tr>
+{% for timing in timings %}
+    <tr>
+        <td>{{ timing.phase }}</td>
+        <td>{{ '{0:,.1f}'.format(timing.total_s) }}</td>
+        <td>{{ '{0:,.1f}'.format(timing.avg_s) }}</td>
+        <td>{{ timing.runs }}</td>
+        <td>{% if timing.share != None %}{{ '{0:.1f}'.format(timing.share) }}%{% endif %}</td>
+    </tr>
+{% endfor %}
+</table>
+{% endif %}
+
 <h2>Grouped by fault injection</h2>
 <div class="fault_group">
     {% for group in fault_groups %}
@@ -338,6 +367,14 @@ class FaultGroup:
         self.id = None
         self.experiments = []
 
+class Timing:
+    def __init__(self, phase):
+        self.phase = phase
+        self.total_s = 0
+        self.avg_s = None
+        self.runs = 0
+        self.share = None
+
 def build(path):
     result = None
     with open(join(path, "all.json"), "r") as result_file:
@@ -354,6 +391,7 @@ def build(path):
     workloads = dict()
     fault_groups = dict()
     max_unavailable_experiment = None
+    timings = dict()
     for name in result["test_runs"].keys():
         experiments = []
         for run in result["test_runs"][name].keys():
@@ -366,6 +404,12 @@ def build(path):
             with open(join(path, run, "info.json"), "r") as info_file:
                 info = json.load(info_file)
                 experiment.workload = info["workload"]["name"]
+                if "timings" in info:
+                    for phase in info["timings"]:
+                        if phase not in timings:
+                            timings[phase] = Timing(phase)
+                        timings[phase].total_s += info["timings"][phase]
+                        timings[phase].runs += 1
                 fault_config = info["fault"]
                 if fault_config != None:
                     if isinstance(fault_config, str):
@@ -518,6 +562,18 @@ def build(path):
             else:
                 raise Exception(f"Unknown status: {experiment.status}")
 
+    # the top level phases cover the runs end to end so their shares add up
+    # to 100%, sub phases (e.g. analysis/stat) are a part of their phase
+    total_s = 0
+    for phase in timings:
+        if "/" not in phase:
+            total_s += timings[phase].total_s
+    for phase in timings:
+        timings[phase].avg_s = timings[phase].total_s / timings[phase].runs
+        if total_s > 0:
+            timings[phase].share = 100 * timings[phase].total_s / total_s
+    timings = sorted(timings.values(), key=lambda x: x.total_s, reverse=True)
+
     for key in fault_groups.keys():
         group = fault_groups[key]
         group_workloads = dict()
@@ -536,6 +592,7 @@ def build(path):
                 overall_status = overall_status,
                 experiment_groups=[failed, unknown, hang, crushed, passed],
                 max_unavailable_experiment = max_unavailable_experiment,
+                timings = timings,
                 workloads=list(workloads.values())))
 
 build("results")
\ No newline at end of file
@@ -0,0 +1,80 @@
+import time
+from chaos.control_agent import agent
+from chaos.fanout import fanout
+
+import logging
+logger = logging.getLogger("chaos")
+
+# the nodes' clocks relative to the control node's clock estimated NTP
+# style over the control agent's /clock: t0 the control node sends, t1 the
+# node receives, t2 the node replies, t3 the control node receives:
+#   offset = ((t1 - t0) + (t2 - t3)) / 2    rtt = (t3 - t0) - (t2 - t1)
+# the sample with the least rtt is the least skewed by queueing. an
+# experiment measures the offsets before and after it is run and saves
+# them to info.json as "clock":
+#   {"before": {"at_us": .., "nodes": {ip: {"offset_us": .., "rtt_us": ..}}},
+#    "after": {...}}
+# the offset at a moment in between is interpolated to account for drift.
+# node time = control time + offset
+
+def now_us():
+    return int(time.time() * 1000000)
+
+def probe(ip, samples=8):
+    best = None
+    for _ in range(samples):
+        t0 = now_us()
+        body = agent.clock(ip)
+        t3 = now_us()
+        t1 = body["received_us"]
+        t2 = body["sent_us"]
+        rtt_us = (t3 - t0) - (t2 - t1)
+        if best == None or rtt_us < best["rtt_us"]:
+            best = {
+                "offset_us": int(((t1 - t0) + (t2 - t3)) / 2),
+                "rtt_us": rtt_us
+            }
+    return best
+
+# a node which can't be probed is left out: its events stay on its own clock
+def measure(nodes):
+    at_us = now_us()
+    offsets = dict()
+    def measure_node(node):
+        try:
+            offsets[node.ip] = probe(node.ip)
+        except:
+            logger.warning(f"can't estimate the clock offset of {node.ip}")
+    fanout(nodes, measure_node)
+    for ip in offsets:
+        logger.debug(f"{ip} clock offset: {offsets[ip]['offset_us']}us rtt: {offsets[ip]['rtt_us']}us")
+    return {
+        "at_us": at_us,
+        "nodes": offsets
+    }
+
+def offset_us(clock, ip, at_us):
+    points = []
+    for name in ["before", "after"]:
+        if name in clock and ip in clock[name]["nodes"]:
+            points.append((clock[name]["at_us"], clock[name]["nodes"][ip]["offset_us"]))
+    if len(points) == 0:
+        return None
+    if len(points) == 1 or points[1][0] == points[0][0]:
+        return points[0][1]
+    (a_us, a_offset), (b_us, b_offset) = points
+    return int(a_offset + (b_offset - a_offset) * (at_us - a_us) / (b_us - a_us))
+
+# node's time -> control node's time, None when the node's offset is unknown
+def to_control_us(clock, ip, node_us):
+    offset = offset_us(clock, ip, node_us)
+    if offset == None:
+        return None
+    return node_us - offset
+
+# control node's time -> node's time, None when the node's offset is unknown
+def to_node_us(clock, ip, control_us):
+    offset = offset_us(clock, ip, control_us)
+    if offset == None:
+        return None
+    return control_us + offset
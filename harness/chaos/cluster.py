@@ -0,0 +1,12 @@
+import os
+
+# a cluster is a dir with the redpanda.nodes and client.nodes files listing
+# the redpanda and the client nodes of a stack ("ip id" per line), a suite
+# may run on a pool of such clusters (see chaos.cluster_pool)
+class Cluster:
+    def __init__(self, path):
+        self.path = path
+        self.redpanda_nodes = os.path.join(path, "redpanda.nodes")
+        self.client_nodes = os.path.join(path, "client.nodes")
+
+DEFAULT_CLUSTER = Cluster("/mnt/vectorized")
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import queue
+import heapq
+import traceback
+import multiprocessing
+from logging import FileHandler, Formatter
+from chaos.scenarios.all import SCENARIOS
+
+import logging
+logger = logging.getLogger("chaos")
+
+formatter = Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# an experiment id is its start time (s) and the name of its dir; the
+# experiments started within the same second on different clusters take
+# the next free second: creating the dir is an atomic claim of the id
+def new_experiment_id():
+    experiment_id = int(time.time())
+    while True:
+        try:
+            os.makedirs(f"/mnt/vectorized/experiments/{experiment_id}")
+            return str(experiment_id)
+        except FileExistsError:
+            experiment_id += 1
+
+def run_experiment(cluster, test, key=None, journal=None):
+    experiment_id = new_experiment_id()
+    if journal != None:
+        journal.started(key, experiment_id)
+    handler = FileHandler(f"/mnt/vectorized/experiments/{experiment_id}/log")
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    try:
+        scenario = SCENARIOS[test["scenario"]]()
+        description = scenario.execute(test, experiment_id, cluster)
+        return experiment_id, description["result"]
+    except:
+        e, v = sys.exc_info()[:2]
+        trace = traceback.format_exc()
+        logger.error(v)
+        logger.error(trace)
+        return experiment_id, "UNKNOWN"
+    finally:
+        handler.flush()
+        handler.close()
+        logger.removeHandler(handler)
+
+def worker(cluster, tasks, results, journal):
+    while True:
+        task = tasks.get()
+        if task == None:
+            return
+        key, test = task
+        experiment_id, result = run_experiment(cluster, test, key, journal)
+        results.put((key, experiment_id, result))
+
+# when the last experiment ends if the pool takes them in the given order:
+# each experiment goes to the cluster which frees up first
+def predict_makespan(durations_s, clusters):
+    ends = [0] * clusters
+    for duration_s in durations_s:
+        heapq.heappush(ends, heapq.heappop(ends) + duration_s)
+    return max(ends)
+
+# runs experiments on a pool of clusters: a worker process per cluster
+# takes the next test as soon as its cluster is free. the workers are
+# processes rather than threads because an experiment's state (the log
+# handler, timings, waits, the warm cluster) is module level. with a
+# journal (see run_journal) the experiments are journaled as they start
+class ClusterPool:
+    def __init__(self, clusters, journal=None):
+        self.clusters = clusters
+        self.journal = journal
+
+    # tasks is a list of (key, test), yields (key, experiment_id, result)
+    # in the order the experiments end
+    def run(self, tasks):
+        if len(self.clusters) == 1:
+            for key, test in tasks:
+                experiment_id, result = run_experiment(self.clusters[0], test, key, self.journal)
+                yield key, experiment_id, result
+            return
+        context = multiprocessing.get_context("fork")
+        pending = context.Queue()
+        results = context.Queue()
+        for task in tasks:
+            pending.put(task)
+        workers = []
+        for cluster in self.clusters:
+            pending.put(None)
+            process = context.Process(target=worker, name=cluster.path, args=(cluster, pending, results, self.journal))
+            process.start()
+            workers.append(process)
+        received = 0
+        while received < len(tasks):
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                for process in workers:
+                    if process.exitcode not in [None, 0]:
+                        # e.g. exit_on_violation: stops the suite the same
+                        # way as it does without the pool
+                        logger.error(f"worker of {process.name} exited with {process.exitcode}")
+                        for other in workers:
+                            other.terminate()
+                        os._exit(process.exitcode)
+                continue
+            received += 1
+            yield result
+        for process in workers:
+            process.join()
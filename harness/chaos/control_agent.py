@@ -0,0 +1,98 @@
+import requests
+from requests.adapters import HTTPAdapter
+import threading
+from threading import Lock
+
+import logging
+logger = logging.getLogger("chaos")
+
+# client of the node-side control agent (control/agent.py): runs the
+# control actions (redpanda.start, network.isolate, writes.java.alive ...)
+# without spawning a ssh session and a shell per call, over a pool of kept
+# alive connections per node. a batch is executed in order on the node and
+# stops on the first failure, every result has the node's local time when the action was started and took effect. the
+# executed actions which change a node's state are kept in `actions` so a
+# caller may learn when the actions it ran took effect (see actions_since),
+# an action remembers the thread which ran it so the actions of concurrent
+# callers can be told apart. the probes (*.alive polled by wait_until ...)
+# aren't kept: they would widen the fault windows placed by the actions
+# (see stat_utils.fault_markers). an experiment drops the actions of the
+# previous ones with reset_actions
+
+PROBES = {"analysis.status"}
+
+def is_probe(name):
+    return name.endswith(".alive") or name in PROBES
+
+class ControlAgent:
+    def __init__(self, port=8090, timeout_s=60, pool_size=16):
+        self.port = port
+        self.timeout_s = timeout_s
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self.lock = Lock()
+        self.actions = []
+
+    # actions is a list of (name, *args) tuples
+    def batch(self, ip, actions):
+        payload = []
+        for action in actions:
+            payload.append({
+                "name": action[0],
+                "args": list(map(str, action[1:]))
+            })
+        r = self.session.post(f"http://{ip}:{self.port}/batch", json={ "actions": payload }, timeout=self.timeout_s)
+        if r.status_code != 200:
+            logger.error(f"control agent on {ip} failed, status:{r.status_code} body:{r.text}")
+            raise Exception(f"control agent on {ip} failed, status:{r.status_code} body:{r.text}")
+        results = r.json()["results"]
+        for result in results:
+            logger.debug(f"{result['name']} took effect on {ip} at {result['effective_us']} (node's time, us)")
+        with self.lock:
+            for result in results:
+                if is_probe(result["name"]):
+                    continue
+                self.actions.append({
+                    "ip": ip,
+                    "name": result["name"],
+                    "effective_us": result["effective_us"],
+                    "thread": threading.get_ident()
+                })
+        return results
+
+    def reset_actions(self):
+        with self.lock:
+            self.actions = []
+
+    def mark(self):
+        with self.lock:
+            return len(self.actions)
+
+    def actions_since(self, mark, exclude_threads=set()):
+        with self.lock:
+            actions = []
+            for action in self.actions[mark:]:
+                if action["thread"] in exclude_threads:
+                    continue
+                actions.append({
+                    "ip": action["ip"],
+                    "name": action["name"],
+                    "effective_us": action["effective_us"]
+                })
+            return actions
+
+    def run(self, ip, name, *args):
+        return self.batch(ip, [(name,) + args])[0]["output"]
+
+    def ping(self, ip):
+        r = self.session.get(f"http://{ip}:{self.port}/ping", timeout=self.timeout_s)
+        if r.status_code != 200:
+            raise Exception(f"unexpected status code: {r.status_code}")
+
+    def clock(self, ip):
+        r = self.session.get(f"http://{ip}:{self.port}/clock", timeout=self.timeout_s)
+        if r.status_code != 200:
+            raise Exception(f"unexpected status code: {r.status_code}")
+        return r.json()
+
+agent = ControlAgent()
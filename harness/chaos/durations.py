@@ -0,0 +1,75 @@
+import os
+import json
+
+import logging
+logger = logging.getLogger("chaos")
+
+# history of the tests' durations kept in experiments/durations.json and
+# built from the timings of the past experiments' info.json: a duration is
+# the sum of the top level phases. the suite runner uses it to start the
+# longest experiments first and to predict when the suite ends
+class DurationDB:
+    def __init__(self, experiments_dir="/mnt/vectorized/experiments", history=10):
+        self.experiments_dir = experiments_dir
+        self.path = os.path.join(experiments_dir, "durations.json")
+        self.history = history
+        self.tests = dict()
+        self.seen = set()
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r") as db_file:
+                    db = json.load(db_file)
+                self.tests = db["tests"]
+                self.seen = set(db["seen"])
+            except:
+                logger.error(f"can't read {self.path}, rebuilding it")
+
+    def save(self):
+        with open(self.path + ".tmp", "w") as db_file:
+            db_file.write(json.dumps({
+                "tests": self.tests,
+                "seen": sorted(self.seen)
+            }))
+        os.replace(self.path + ".tmp", self.path)
+
+    # picks up the experiments which ended since the last update
+    def update(self):
+        if not os.path.isdir(self.experiments_dir):
+            return
+        for experiment_id in sorted(os.listdir(self.experiments_dir)):
+            if experiment_id in self.seen:
+                continue
+            if not os.path.isdir(os.path.join(self.experiments_dir, experiment_id)):
+                continue
+            self.add(experiment_id)
+
+    # returns the experiment's duration or None when it's unknown; aborted
+    # and interrupted experiments aren't accounted since they are cut short
+    def add(self, experiment_id):
+        self.seen.add(experiment_id)
+        path = os.path.join(self.experiments_dir, experiment_id, "info.json")
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "r") as info_file:
+                info = json.load(info_file)
+        except:
+            return None
+        if "timings" not in info or "name" not in info:
+            return None
+        if info.get("aborted", False) or info.get("interrupted", False):
+            return None
+        duration_s = 0
+        for phase in info["timings"]:
+            if "/" not in phase:
+                duration_s += info["timings"][phase]
+        if info["name"] not in self.tests:
+            self.tests[info["name"]] = []
+        self.tests[info["name"]].append(round(duration_s, 3))
+        self.tests[info["name"]] = self.tests[info["name"]][-self.history:]
+        return duration_s
+
+    def predict(self, name):
+        if name not in self.tests or len(self.tests[name]) == 0:
+            return None
+        return sum(self.tests[name]) / len(self.tests[name])
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from chaos.types import TimeoutException, NodesException
+import sys
+import traceback
+
+import logging
+logger = logging.getLogger("chaos")
+
+# runs action(node) on every node concurrently (at most max_workers at a
+# time) and returns the results keyed by ip. unlike a serial loop it
+# doesn't stop on the first failure: every node gets its action and the
+# failures are reported together. when a node timed out the error is a
+# TimeoutException so the callers relying on it keep working
+def fanout(nodes, action, max_workers=8):
+    nodes = list(nodes)
+    if len(nodes) == 0:
+        return dict()
+    results = dict()
+    errors = dict()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(nodes))) as executor:
+        futures = [(node, executor.submit(action, node)) for node in nodes]
+        for node, future in futures:
+            try:
+                results[node.ip] = future.result()
+            except:
+                e, v = sys.exc_info()[:2]
+                trace = traceback.format_exc()
+                logger.debug(f"failed on {node.ip}: {v}")
+                logger.debug(trace)
+                errors[node.ip] = v
+    if len(errors) > 0:
+        message = "; ".join(map(lambda ip: f"{ip}: {errors[ip]}", errors.keys()))
+        for ip in errors:
+            if isinstance(errors[ip], TimeoutException):
+                raise TimeoutException(message)
+        raise NodesException(message, errors)
+    return results
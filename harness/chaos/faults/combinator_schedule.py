@@ -0,0 +1,155 @@
+import sys
+import time
+import threading
+import traceback
+import logging
+from chaos.faults.types import FaultType
+from chaos.control_agent import agent
+
+logger = logging.getLogger("chaos")
+
+# a nemesis schedule: named faults injected, healed and executed at the
+# planned time (s since the schedule starts) so the fault timelines may
+# overlap e.g. isolate tx leader at 30s, kill a follower at 35s and heal
+# both at 90s:
+#   "fault": {
+#       "name": "schedule",
+#       "faults": {
+#           "tx": { "name": "isolate_tx_leader" },
+#           "follower": { "name": "kill_follower" }
+#       },
+#       "schedule": [
+#           { "at_s": 30, "inject": "tx" },
+#           { "at_s": 35, "inject": "follower" },
+#           { "at_s": 90, "heal": ["tx", "follower"] }
+#       ]
+#   }
+# "inject" / "heal" take recoverable faults and "execute" oneoff ones, an
+# event may name one fault or a list. the scheduler thread fires every
+# fault of an event at its planned time in a thread of its own so a slow
+# injection doesn't delay the next one; a heal waits for the injection of
+# the same fault. every fired fault is saved to info.json's "schedule"
+# with its planned time, the actual start and end and the latency of the
+# start against the plan; its control actions go to "fault_actions" (the
+# ones run by the threads of the other fired faults are left out)
+
+class ScheduledFault:
+    def __init__(self, action, name, planned_s):
+        self.action = action
+        self.name = name
+        self.planned_s = planned_s
+        self.started_s = None
+        self.ended_s = None
+        self.error = None
+
+    def to_json(self):
+        result = {
+            "action": self.action,
+            "fault": self.name,
+            "planned_s": self.planned_s,
+            "started_s": None,
+            "ended_s": None,
+            "latency_s": None
+        }
+        if self.started_s != None:
+            result["started_s"] = round(self.started_s, 3)
+            result["latency_s"] = round(self.started_s - self.planned_s, 3)
+        if self.ended_s != None:
+            result["ended_s"] = round(self.ended_s, 3)
+        if self.error != None:
+            result["error"] = self.error
+        return result
+
+class ScheduleCombinator:
+    # the schedule accounts the control actions of every fault it fires
+    RECORDS_FAULT_ACTIONS = True
+
+    def __init__(self, FAULTS, fault_config):
+        self.fault_type = FaultType.ONEOFF
+        self.name = "schedule"
+        self.fault_config = fault_config
+        self.faults = dict()
+        for name in fault_config["faults"]:
+            self.faults[name] = FAULTS[fault_config["faults"][name]["name"]](fault_config["faults"][name])
+        self.events = []
+        injected = dict()
+        healed = set()
+        for event in sorted(fault_config["schedule"], key=lambda event: event["at_s"]):
+            actions = [action for action in ["inject", "heal", "execute"] if action in event]
+            if len(actions) != 1:
+                raise Exception(f"a scheduled event must have one of inject, heal or execute: {event}")
+            action = actions[0]
+            names = event[action] if isinstance(event[action], list) else [event[action]]
+            for name in names:
+                if name not in self.faults:
+                    raise Exception(f"unknown scheduled fault: {name}")
+                fault_type = self.faults[name].fault_type
+                if action == "execute":
+                    if fault_type != FaultType.ONEOFF:
+                        raise Exception(f"{name} is {fault_type} and can't be executed")
+                else:
+                    if fault_type != FaultType.RECOVERABLE:
+                        raise Exception(f"{name} is {fault_type} and can't be {action}ed")
+                if action == "inject":
+                    if name in injected:
+                        raise Exception(f"{name} is injected twice")
+                    injected[name] = event["at_s"]
+                elif action == "heal":
+                    if name not in injected or name in healed:
+                        raise Exception(f"{name} is healed before it's injected or healed twice")
+                    healed.add(name)
+                self.events.append(ScheduledFault(action, name, event["at_s"]))
+        if len(healed) != len(injected):
+            raise Exception(f"injected faults must be healed: {set(injected.keys()) - healed}")
+
+    def fire(self, scenario, event, begin, injections, threads):
+        event.started_s = time.time() - begin
+        logger.info(f"{event.action} {event.name} at {event.started_s:.1f}s (planned at {event.planned_s}s)")
+        mark = agent.mark()
+        try:
+            fault = self.faults[event.name]
+            if event.action == "inject":
+                try:
+                    fault.inject(scenario)
+                finally:
+                    injections[event.name].set()
+            elif event.action == "heal":
+                injections[event.name].wait()
+                fault.heal(scenario)
+            else:
+                fault.execute(scenario)
+        except:
+            e, v = sys.exc_info()[:2]
+            trace = traceback.format_exc()
+            logger.error(f"{event.action} {event.name} failed: {v}")
+            logger.debug(trace)
+            event.error = str(v)
+        finally:
+            event.ended_s = time.time() - begin
+            kind = "recovery" if event.action == "heal" else "fault"
+            others = set([thread.ident for thread in threads if thread.ident not in [None, threading.get_ident()]])
+            scenario.record_fault_actions(kind, mark, others)
+
+    def execute(self, scenario):
+        begin = time.time()
+        injections = dict()
+        for name in self.faults:
+            injections[name] = threading.Event()
+        threads = []
+        def schedule():
+            for event in self.events:
+                delay_s = begin + event.planned_s - time.time()
+                if delay_s > 0:
+                    time.sleep(delay_s)
+                thread = threading.Thread(target=self.fire, args=(scenario, event, begin, injections, threads), daemon=True)
+                threads.append(thread)
+                thread.start()
+        scheduler = threading.Thread(target=schedule, daemon=True)
+        scheduler.start()
+        scheduler.join()
+        for thread in threads:
+            thread.join()
+        scenario.config["schedule"] = list(map(lambda event: event.to_json(), self.events))
+        errors = list(filter(lambda event: event.error != None, self.events))
+        if len(errors) > 0:
+            raise Exception(f"{errors[0].action} {errors[0].name} failed: {errors[0].error}")
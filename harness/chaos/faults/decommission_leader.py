@@ -1,6 +1,5 @@
 from time import sleep
 import time
-from sh import ssh
 import logging
 import json
 from chaos.faults.types import FaultType
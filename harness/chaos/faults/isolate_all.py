@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -17,7 +17,7 @@ class IsolateAllFault:
         for node in nodes:
             rest = list(filter(lambda x: x != node, nodes))
             logger.debug(f"isolating {node} from redpanda cluster")
-            ssh("ubuntu@"+node, "/mnt/vectorized/control/network.isolate.sh", *rest)
+            agent.run(node, "network.isolate", *rest)
     
     def heal(self, scenario):
         nodes = []
@@ -26,4 +26,4 @@ class IsolateAllFault:
         for node in nodes:
             rest = list(filter(lambda x: x != node, nodes))
             logger.debug(f"reconnecting {node} with the redpanda cluster")
-            ssh("ubuntu@"+node, "/mnt/vectorized/control/network.heal.sh", *rest)
\ No newline at end of file
+            agent.run(node, "network.heal", *rest)
\ No newline at end of file
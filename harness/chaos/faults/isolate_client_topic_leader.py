@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -32,7 +32,7 @@ class IsolateClientTopicLeader:
         self.leader = scenario.redpanda_cluster.wait_leader(topic, partition=partition, namespace=namespace, timeout_s=10)
         logger.debug(f"isolating client {self.client.ip} from {namespace}/{topic}/{partition}'s leader: {self.leader.ip}")
         
-        ssh("ubuntu@"+self.client.ip, "/mnt/vectorized/control/network.isolate.sh", self.leader.ip)
+        agent.run(self.client.ip, "network.isolate", self.leader.ip)
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.client.ip, "/mnt/vectorized/control/network.heal.sh", self.leader.ip)
\ No newline at end of file
+        agent.run(self.client.ip, "network.heal", self.leader.ip)
\ No newline at end of file
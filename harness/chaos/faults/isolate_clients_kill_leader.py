@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -21,19 +21,19 @@ class IsolateClientsKillLeader:
             redpanda_nodes.append(node.ip)
         
         for node in scenario.workload_cluster.nodes:
-            ssh("ubuntu@"+node.ip, "/mnt/vectorized/control/network.isolate.sh", *redpanda_nodes)
+            agent.run(node.ip, "network.isolate", *redpanda_nodes)
         
         sleep(self.fault_config["kill_delay_s"])
 
         self.leader = scenario.redpanda_cluster.wait_leader(scenario.topic, partition=scenario.partition, timeout_s=10)
         logger.debug(f"killing {scenario.topic}'s leader: {self.leader.ip}")
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+        agent.run(self.leader.ip, "redpanda.stop")
 
         sleep(self.fault_config["reconnect_delay_s"])
 
         logger.debug(f"reconnecting clients to redpanda cluster")
         for node in scenario.workload_cluster.nodes:
-            ssh("ubuntu@"+node.ip, "/mnt/vectorized/control/network.heal.sh", *redpanda_nodes)
+            agent.run(node.ip, "network.heal", *redpanda_nodes)
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.start.sh")
\ No newline at end of file
+        agent.run(self.leader.ip, "redpanda.start")
\ No newline at end of file
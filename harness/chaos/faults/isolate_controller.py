@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -19,7 +19,7 @@ class IsolateControllerFault:
         for node in scenario.redpanda_cluster.nodes:
             if self.controller != node:
                 self.rest.append(node.ip)
-        ssh("ubuntu@"+self.controller.ip, "/mnt/vectorized/control/network.isolate.sh", *self.rest)
+        agent.run(self.controller.ip, "network.isolate", *self.rest)
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.controller.ip, "/mnt/vectorized/control/network.heal.sh", *self.rest)
\ No newline at end of file
+        agent.run(self.controller.ip, "network.heal", *self.rest)
\ No newline at end of file
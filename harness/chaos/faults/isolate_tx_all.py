@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -23,7 +23,7 @@ class IsolateTxAllFault:
             self.data_nodes.append(node.ip)
         for node in self.data_nodes:
             logger.debug(f"isolating {node} from tx coordinator")
-            ssh("ubuntu@"+node, "/mnt/vectorized/control/network.isolate.sh", *self.tx_nodes)
+            agent.run(node, "network.isolate", *self.tx_nodes)
     
     def heal(self, scenario):
         nodes = []
@@ -31,4 +31,4 @@ class IsolateTxAllFault:
             nodes.append(node.ip)
         for node in nodes:
             logger.debug(f"reconnecting {node} with tx coordinator")
-            ssh("ubuntu@"+node, "/mnt/vectorized/control/network.heal.sh", *self.tx_nodes)
\ No newline at end of file
+            agent.run(node, "network.heal", *self.tx_nodes)
\ No newline at end of file
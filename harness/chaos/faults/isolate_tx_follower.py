@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -34,7 +34,7 @@ class IsolateTxFollowerFault:
                 self.rest.append(node.ip)
         
         logger.debug(f"isolating kafka_internal/tx/0's follower: {self.follower.ip}")
-        ssh("ubuntu@"+self.follower.ip, "/mnt/vectorized/control/network.isolate.sh", *self.rest)
+        agent.run(self.follower.ip, "network.isolate", *self.rest)
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.follower.ip, "/mnt/vectorized/control/network.heal.sh", *self.rest)
\ No newline at end of file
+        agent.run(self.follower.ip, "network.heal", *self.rest)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -20,7 +20,7 @@ class IsolateTxLeaderFault:
         for node in scenario.redpanda_cluster.nodes:
             if node != self.leader:
                 self.rest.append(node.ip)
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/network.isolate.sh", *self.rest)
+        agent.run(self.leader.ip, "network.isolate", *self.rest)
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/network.heal.sh", *self.rest)
\ No newline at end of file
+        agent.run(self.leader.ip, "network.heal", *self.rest)
\ No newline at end of file
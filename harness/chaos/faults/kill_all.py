@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -12,8 +12,8 @@ class KillAllFault:
 
     def inject(self, scenario):
         for replica in scenario.redpanda_cluster.nodes:
-            ssh("ubuntu@"+replica.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+            agent.run(replica.ip, "redpanda.stop")
     
     def heal(self, scenario):
         for replica in scenario.redpanda_cluster.nodes:
-            ssh("ubuntu@"+replica.ip, "/mnt/vectorized/control/redpanda.start.sh")
\ No newline at end of file
+            agent.run(replica.ip, "redpanda.start")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -44,7 +44,7 @@ class KillFollowerFault:
                 self.follower = replica
         
         logger.debug(f"killing {namespace}/{topic}/{partition}'s follower: {self.follower.ip}")
-        ssh("ubuntu@"+self.follower.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+        agent.run(self.follower.ip, "redpanda.stop")
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.follower.ip, "/mnt/vectorized/control/redpanda.start.sh")
\ No newline at end of file
+        agent.run(self.follower.ip, "redpanda.start")
\ No newline at end of file
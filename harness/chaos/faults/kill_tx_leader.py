@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -14,7 +14,7 @@ class KillTxLeaderFault:
     def inject(self, scenario):
         self.leader = scenario.redpanda_cluster.wait_leader("tx", partition=0, namespace="kafka_internal", timeout_s=10)
         logger.debug(f"killing tx coordinator's leader: {self.leader.ip}")
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+        agent.run(self.leader.ip, "redpanda.stop")
     
     def heal(self, scenario):
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.start.sh")
\ No newline at end of file
+        agent.run(self.leader.ip, "redpanda.start")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -21,9 +21,9 @@ class PauseAllFault:
                 scenario.workload_cluster.wait_progress(timeout_s=60)
             for node in scenario.redpanda_cluster.nodes:
                 logger.debug(f"suspending {node.ip}")
-                ssh("ubuntu@"+node.ip, "/mnt/vectorized/control/redpanda.pause.sh")
+                agent.run(node.ip, "redpanda.pause")
             logger.debug(f"sleeping for 5s")
             sleep(5)
             for node in scenario.redpanda_cluster.nodes:
                 logger.debug(f"resuming {node.ip}")
-                ssh("ubuntu@"+node.ip, "/mnt/vectorized/control/redpanda.resume.sh")
\ No newline at end of file
+                agent.run(node.ip, "redpanda.resume")
\ No newline at end of file
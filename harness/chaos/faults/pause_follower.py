@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -29,8 +29,8 @@ class PauseFollowerFault:
                 self.follower = replica
         
         logger.debug(f"suspending {scenario.topic}'s follower: {self.follower.ip}")
-        ssh("ubuntu@"+self.follower.ip, "/mnt/vectorized/control/redpanda.pause.sh")
+        agent.run(self.follower.ip, "redpanda.pause")
     
     def heal(self, scenario):
         logger.debug(f"resuming: {self.follower.ip}")
-        ssh("ubuntu@"+self.follower.ip, "/mnt/vectorized/control/redpanda.resume.sh")
\ No newline at end of file
+        agent.run(self.follower.ip, "redpanda.resume")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -29,8 +29,8 @@ class PauseLeaderFault:
         
         self.leader = scenario.redpanda_cluster.wait_leader(topic, partition=partition, namespace=namespace, timeout_s=10)
         logger.debug(f"suspending {namespace}/{topic}/{partition}'s leader: {self.leader.ip}")
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.pause.sh")
+        agent.run(self.leader.ip, "redpanda.pause")
     
     def heal(self, scenario):
         logger.debug(f"resuming: {self.leader.ip}")
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.resume.sh")
\ No newline at end of file
+        agent.run(self.leader.ip, "redpanda.resume")
\ No newline at end of file
@@ -1,6 +1,6 @@
 import time
 import logging
-from sh import ssh
+from chaos.control_agent import agent
 from chaos.faults.types import FaultType
 from chaos.types import TimeoutException
 
@@ -43,8 +43,8 @@ class Reconfigure11KillFault:
             time.sleep(1)
         logger.debug(f"reconfigured {scenario.topic} from {self.leader.ip} to {new_leader.ip}")
         logger.debug(f"killing {scenario.topic}'s former leader {self.leader.ip}")
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+        agent.run(self.leader.ip, "redpanda.stop")
         logger.debug(f"killed {scenario.topic}'s former leader {self.leader.ip}")
 
     def heal(self, scenario):
-        ssh("ubuntu@"+self.leader.ip, "/mnt/vectorized/control/redpanda.start.sh")
\ No newline at end of file
+        agent.run(self.leader.ip, "redpanda.start")
\ No newline at end of file
@@ -1,6 +1,6 @@
 import time
 import logging
-from sh import ssh
+from chaos.control_agent import agent
 from chaos.faults.types import FaultType
 from chaos.types import TimeoutException
 
@@ -32,12 +32,12 @@ class ReconfigureKill11Fault:
         logger.debug(f"reconfiguring {scenario.topic} from {leader.ip} to {self.new_leader.ip}")
         scenario.redpanda_cluster.reconfigure(controller, [self.new_leader], scenario.topic, partition=scenario.partition)
         logger.debug(f"killing {scenario.topic}'s new leader {self.new_leader.ip}")
-        ssh("ubuntu@"+self.new_leader.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+        agent.run(self.new_leader.ip, "redpanda.stop")
         logger.debug(f"killed {scenario.topic}'s new leader {self.new_leader.ip}")
 
     def heal(self, scenario):
         logger.debug(f"healing {scenario.topic}'s new leader {self.new_leader.ip}")
-        ssh("ubuntu@"+self.new_leader.ip, "/mnt/vectorized/control/redpanda.start.sh")
+        agent.run(self.new_leader.ip, "redpanda.start")
         timeout_s = self.fault_config["timeout_s"]
         begin = time.time()
         while True:
@@ -1,5 +1,5 @@
 from time import sleep
-from sh import ssh
+from chaos.control_agent import agent
 import logging
 from chaos.faults.types import FaultType
 
@@ -23,8 +23,8 @@ class RollingRestartFault:
         
         for replica in sequence:
             logger.debug(f"killing {replica}")
-            ssh("ubuntu@" + replica, "/mnt/vectorized/control/redpanda.stop.sh")
+            agent.run(replica, "redpanda.stop")
             logger.debug(f"starting {replica}")
-            ssh("ubuntu@" + replica, "/mnt/vectorized/control/redpanda.start.sh")
+            agent.run(replica, "redpanda.start")
             if replica != sequence[-1]:
                 sleep(self.fault_config["period_s"])
\ No newline at end of file
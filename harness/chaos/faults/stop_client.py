@@ -1,5 +1,4 @@
 from time import sleep
-from sh import ssh
 import logging
 from chaos.faults.types import FaultType
 
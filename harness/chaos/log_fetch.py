@@ -0,0 +1,83 @@
+import re
+import sh
+import time
+from threading import Lock
+from chaos.ssh_pool import ssh
+from chaos.fanout import fanout
+
+import logging
+logger = logging.getLogger("chaos")
+
+# copies the logs from the nodes with rsync over the pooled ssh connections:
+# the nodes are fetched concurrently, the data is compressed on the wire and
+# the files which are already up to date locally aren't copied again. every
+# fetch is accounted in `stats` under its kind (bytes received, seconds)
+
+class FetchStats:
+    def __init__(self):
+        self.lock = Lock()
+        self.kinds = dict()
+
+    def reset(self):
+        with self.lock:
+            self.kinds = dict()
+
+    def record(self, kind, received_bytes, spent_s):
+        with self.lock:
+            if kind not in self.kinds:
+                self.kinds[kind] = {
+                    "count": 0,
+                    "bytes": 0,
+                    "seconds": 0
+                }
+            self.kinds[kind]["count"] += 1
+            self.kinds[kind]["bytes"] += received_bytes
+            self.kinds[kind]["seconds"] += spent_s
+
+    def as_dict(self):
+        with self.lock:
+            result = dict()
+            for kind in self.kinds:
+                result[kind] = {
+                    "count": self.kinds[kind]["count"],
+                    "bytes": self.kinds[kind]["bytes"],
+                    "seconds": round(self.kinds[kind]["seconds"], 3)
+                }
+            return result
+
+stats = FetchStats()
+
+def rsync(host, remote_path, local_dir):
+    ssh.open(host)
+    output = sh.rsync("-az", "--stats", "-e", " ".join(["ssh"] + ssh.options()),
+        f"{host}:{remote_path}", local_dir + "/")
+    received = re.search(r"Total bytes received: ([\d,.]+)", str(output))
+    if received == None:
+        return 0
+    return int(received.group(1).replace(",", "").replace(".", ""))
+
+# files(node) returns the (remote path, local dir) pairs to fetch from the
+# node, a remote path may be a glob. with ignore_errors a node which can't
+# be fetched is logged and skipped instead of failing the fetch
+def fetch(kind, nodes, files, parallelism=8, ignore_errors=False):
+    def fetch_node(node):
+        received_bytes = 0
+        for remote_path, local_dir in files(node):
+            try:
+                logger.info(f"fetching {remote_path} from {node.ip}")
+                sh.mkdir("-p", local_dir)
+                received_bytes += rsync("ubuntu@" + node.ip, remote_path, local_dir)
+            except:
+                if not ignore_errors:
+                    raise
+                logger.error(f"can't fetch {remote_path} from {node.ip}")
+        return received_bytes
+    begin = time.time()
+    received = dict()
+    try:
+        received = fanout(nodes, fetch_node, parallelism)
+    finally:
+        received_bytes = sum(received.values())
+        spent_s = time.time() - begin
+        stats.record(kind, received_bytes, spent_s)
+        logger.info(f"fetched {received_bytes} bytes of {kind} logs in {spent_s:.1f}s")
@@ -1,16 +1,29 @@
-import time
 from itsdangerous import json
 import requests
-from time import sleep
-from sh import ssh
+from chaos.ssh_pool import ssh
+from chaos.control_agent import agent
 import sys
 import traceback
 import random
-from chaos.types import TimeoutException
+from chaos.wait import Wait, wait_until
+from chaos.fanout import fanout
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
 
 import logging
 logger = logging.getLogger("chaos")
 
+# the partition details requests (see _get_stable_details) go through a
+# pool per cluster which outlives the RedpandaCluster of an experiment
+class DetailsPool:
+    def __init__(self, max_workers):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = Lock()
+        self.requests = dict()
+
+details_pools = dict()
+details_pools_lock = Lock()
+
 class RedpandaNode:
     def __init__(self, ip, id):
         self.ip = ip
@@ -23,75 +36,155 @@ class PartitionDetails:
         self.status = None
 
 class RedpandaCluster:
-    def __init__(self, nodes_path):
+    def __init__(self, nodes_path, parallelism=8, admin_timeout_s=5):
         self.nodes = []
+        self.parallelism = parallelism
+        self.admin_timeout_s = admin_timeout_s
         with open(nodes_path, "r") as f:
             for line in f:
                 line = line.rstrip()
                 parts = line.split(" ")
                 self.nodes.append(RedpandaNode(parts[0], int(parts[1])))
+        with details_pools_lock:
+            if nodes_path not in details_pools:
+                details_pools[nodes_path] = DetailsPool(max(self.parallelism, len(self.nodes)))
+            self.details_pool = details_pools[nodes_path]
     
     def heal(self):
         for node in self.nodes:
-            ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/network.heal.all.sh")
+            agent.run(node.ip, "network.heal.all")
 
     def launch(self, node):
-        ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/redpanda.start.sh")
+        agent.run(node.ip, "redpanda.start")
     
     def is_alive(self, node):
-        result = ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/redpanda.alive.sh")
+        result = agent.run(node.ip, "redpanda.alive")
         return "YES" in result
     
     def kill(self, node):
-        ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/redpanda.stop.sh")
+        agent.run(node.ip, "redpanda.stop")
 
     def clean(self, node):
-        ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/redpanda.clean.sh")
+        agent.run(node.ip, "redpanda.clean")
+
+    def log_sizes(self, node):
+        return json.loads(agent.run(node.ip, "redpanda.log_sizes"))
+
+    # copies the logs past the sizes to /mnt/vectorized/redpanda/tail
+    def tail_logs(self, node, sizes):
+        agent.run(node.ip, "redpanda.log_tail", json.dumps(sizes))
     
     def kill_everywhere(self):
-        for node in self.nodes:
+        def kill(node):
             logger.debug(f"stopping a redpanda instance on {node.ip}")
             self.kill(node)
+        fanout(self.nodes, kill, self.parallelism)
     
     def wait_killed(self, timeout_s=10):
-        begin = time.time()
-        for node in self.nodes:
-            while True:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"redpanda stuck and can't be stopped in {timeout_s} sec")
-                logger.debug(f"checking if redpanda process is running on {node.ip}")
-                if not self.is_alive(node):
-                    break
-                sleep(1)
+        wait = Wait("redpanda.wait_killed", timeout_s, f"redpanda stuck and can't be stopped in {timeout_s} sec")
+        def wait_killed(node):
+            logger.debug(f"checking if redpanda process is running on {node.ip}")
+            wait_until(None, lambda: not self.is_alive(node), timeout_s,
+                wait.message, begin=wait.begin)
+        fanout(self.nodes, wait_killed, self.parallelism)
+        wait.done()
     
     def clean_everywhere(self):
-        for node in self.nodes:
+        def clean(node):
             logger.debug(f"cleaning a redpanda instance on {node.ip}")
             self.clean(node)
+        fanout(self.nodes, clean, self.parallelism)
+    
+    def snapshot_everywhere(self, key):
+        def snapshot(node):
+            logger.debug(f"taking {key} snapshot of a redpanda instance on {node.ip}")
+            agent.run(node.ip, "redpanda.snapshot", key)
+        fanout(self.nodes, snapshot, self.parallelism)
+
+    def restore_everywhere(self, key):
+        def restore(node):
+            logger.debug(f"restoring a redpanda instance on {node.ip} from {key} snapshot")
+            agent.run(node.ip, "redpanda.restore", key)
+        fanout(self.nodes, restore, self.parallelism)
     
     def launch_everywhere(self, settings):
-        for node in self.nodes:
+        def launch(node):
             logger.debug(f"starting a redpanda instance on {node.ip} with {json.dumps(settings)}")
-            for key in settings.keys():
-                ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/redpanda.config.sh", key, settings[key])
-            self.launch(node)
+            actions = []
+            if len(settings) > 0:
+                args = []
+                for key in settings.keys():
+                    args.append(key)
+                    args.append(json.dumps(settings[key]))
+                actions.append(("redpanda.configure",) + tuple(args))
+            actions.append(("redpanda.start",))
+            results = agent.batch(node.ip, actions)
+            if len(settings) > 0:
+                applied = json.loads(results[0]["output"])
+                for key in settings.keys():
+                    if key not in applied:
+                        raise Exception(f"{key} isn't applied on {node.ip}")
+        fanout(self.nodes, launch, self.parallelism)
 
     def wait_alive(self, timeout_s=10):
-        begin = time.time()
-        for node in self.nodes:
-            while True:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"redpanda process isn't running withing {timeout_s} sec")
-                logger.debug(f"checking if redpanda is running on {node.ip}")
-                if self.is_alive(node):
-                    break
-                sleep(1)
+        wait = Wait("redpanda.wait_alive", timeout_s, f"redpanda process isn't running withing {timeout_s} sec")
+        def wait_alive(node):
+            logger.debug(f"checking if redpanda is running on {node.ip}")
+            wait_until(None, lambda: self.is_alive(node), timeout_s,
+                wait.message, begin=wait.begin)
+        fanout(self.nodes, wait_alive, self.parallelism)
+        wait.done()
+
+    # replaces a fixed 5s sleep after the launch: the admin api of every
+    # node is up and knows about all the brokers
+    def wait_admin_ready(self, timeout_s=10):
+        def has_all_brokers(node):
+            try:
+                brokers = self.admin_brokers(node)
+                return brokers != None and len(brokers) == len(self.nodes)
+            except:
+                return False
+        wait = Wait("redpanda.wait_admin_ready", timeout_s, f"redpanda admin api isn't ready within {timeout_s} sec", baseline_s=5)
+        def wait_admin_ready(node):
+            logger.debug(f"checking if admin api is ready on {node.ip}")
+            wait_until(None, lambda: has_all_brokers(node), timeout_s,
+                wait.message, begin=wait.begin)
+        fanout(self.nodes, wait_admin_ready, self.parallelism)
+        wait.done()
     
     def brokers(self):
         return ",".join(map(lambda x: x.ip+":9092", self.nodes))
     
     def create_topic(self, topic, replication, partitions, cleanup="delete"):
         ssh("ubuntu@" + self.nodes[0].ip, "rpk", "topic", "create", "--brokers", self.brokers(), topic, "-r", replication, "-p", partitions, "-c", f"cleanup.policy={cleanup}")
+        warm_cluster.topics.add(topic)
+
+    def delete_topics(self, topics):
+        ssh("ubuntu@" + self.nodes[0].ip, "rpk", "topic", "delete", "--brokers", self.brokers(), *topics)
+
+    def wait_topics_deleted(self, topics, timeout_s=10):
+        def is_deleted(node, topic):
+            r = requests.get(f"http://{node.ip}:9644/v1/partitions/kafka/{topic}/0", timeout=self.admin_timeout_s)
+            return r.status_code == 404
+        wait = Wait("redpanda.wait_topics_deleted", timeout_s, f"{', '.join(topics)} topics aren't deleted within {timeout_s} sec")
+        def wait_topics_deleted(node):
+            for topic in topics:
+                logger.debug(f"checking if {topic} is deleted on {node.ip}")
+                wait_until(None, lambda: is_deleted(node, topic), timeout_s,
+                    wait.message, begin=wait.begin)
+        fanout(self.nodes, wait_topics_deleted, self.parallelism)
+        wait.done()
+
+    # a warm cluster is reused only if it looks like a freshly started one:
+    # redpanda is running everywhere, every node knows about all the brokers
+    # and the controller has a leader
+    def check_healthy(self, timeout_s=10):
+        def check_alive(node):
+            if not self.is_alive(node):
+                raise Exception(f"redpanda isn't running on {node.ip}")
+        fanout(self.nodes, check_alive, self.parallelism)
+        self.wait_admin_ready(timeout_s=timeout_s)
+        self.wait_leader("controller", namespace="redpanda", replication=len(self.nodes), timeout_s=timeout_s)
     
     def reconfigure(self, leader, replicas, topic, partition=0, namespace="kafka"):
         payload = []
@@ -106,13 +199,38 @@ class RedpandaCluster:
             raise Exception(f"Can't reconfigure, status:{r.status_code} body:{r.text}")
 
     def _get_stable_details(self, nodes, topic, partition=0, namespace="kafka", replication=None):
+        # the nodes are queried concurrently and their answers are compared
+        # as they arrive so a conflicting answer ends the round without
+        # waiting for the slow (e.g. isolated) nodes. a request which is
+        # still in flight since an earlier round is waited on instead of
+        # sending a new one so the requests to an isolated node don't pile
+        # up with every retry
+        futures = []
+        pool = self.details_pool
+        with pool.lock:
+            for node in nodes:
+                key = (node.ip, namespace, topic, partition)
+                if key not in pool.requests or pool.requests[key].done():
+                    logger.debug(f"requesting \"{namespace}/{topic}/{partition}\" details from {node.id} ({node.ip})")
+                    pool.requests[key] = pool.executor.submit(self._get_details_or_none, node, namespace, topic, partition)
+                futures.append(pool.requests[key])
+        return self._compare_details(as_completed(futures), replication)
+
+    # a node which doesn't answer (isolated, paused or killed) is expected
+    # during a fault, the round is retried
+    def _get_details_or_none(self, node, namespace, topic, partition):
+        try:
+            return self._get_details(node, namespace, topic, partition)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            logger.debug(f"{node.id} ({node.ip}) didn't answer \"{namespace}/{topic}/{partition}\" details within {self.admin_timeout_s} sec")
+            return None
+
+    def _compare_details(self, answers, replication):
         last_leader = -1
         replicas = None
         status = None
-        for node in nodes:
-            ip = node.ip
-            logger.debug(f"requesting \"{namespace}/{topic}/{partition}\" details from {node.id} ({node.ip})")
-            meta = self._get_details(node, namespace, topic, partition)
+        for answer in answers:
+            meta = answer.result()
             if meta == None:
                 return None
             if "replicas" not in meta:
@@ -175,23 +293,23 @@ class RedpandaCluster:
         if nodes == None:
             nodes = self.nodes
         nodes = list(nodes)
-        begin = time.time()
+        wait = Wait("redpanda.wait_details", timeout_s, f"can't fetch stable replicas for {namespace}/{topic}/{partition} within {timeout_s} sec")
         info = None
         while info == None:
             random.shuffle(nodes)
-            if time.time() - begin > timeout_s:
-                raise TimeoutException(f"can't fetch stable replicas for {namespace}/{topic}/{partition} within {timeout_s} sec")
+            wait.check()
             try:
                 info = self._get_stable_details(nodes, topic, partition=partition, namespace=namespace, replication=replication)
                 if info == None:
-                    sleep(1)
+                    wait.sleep()
             except:
                 e, v = sys.exc_info()[:2]
                 trace = traceback.format_exc()
                 logger.error(e)
                 logger.error(v)
                 logger.error(trace)
-                sleep(1)
+                wait.sleep()
+        wait.done()
         return info
     
     def wait_leader(self, topic, partition=0, namespace="kafka", replication=None, timeout_s=10):
@@ -199,18 +317,12 @@ class RedpandaCluster:
         return info.leader
     
     def wait_leader_is(self, target, namespace, topic, partition, timeout_s=10):
-        begin = time.time()
-        while True:
-            if time.time() - begin > timeout_s:
-                raise TimeoutException(f"{target.ip} (id={target.id}) hasn't became leader for {namespace}/{topic}/{partition} within {timeout_s} sec")
-            leader = self.wait_leader(topic, partition, namespace, timeout_s=timeout_s)
-            if leader == target:
-                return
-            sleep(1)
+        wait_until("redpanda.wait_leader_is", lambda: self.wait_leader(topic, partition, namespace, timeout_s=timeout_s) == target, timeout_s,
+            f"{target.ip} (id={target.id}) hasn't became leader for {namespace}/{topic}/{partition} within {timeout_s} sec")
     
     def _get_details(self, node, namespace, topic, partition):
         ip = node.ip
-        r = requests.get(f"http://{ip}:9644/v1/partitions/{namespace}/{topic}/{partition}")
+        r = requests.get(f"http://{ip}:9644/v1/partitions/{namespace}/{topic}/{partition}", timeout=self.admin_timeout_s)
         if r.status_code != 200:
             logger.error(f"status code: {r.status_code}")
             logger.error(f"content: {r.content}")
@@ -250,7 +362,33 @@ class RedpandaCluster:
             raise Exception(f"Can't decommission {to_decommission_node.ip} from {node.ip}")
     
     def admin_brokers(self, node):
-        r = requests.get(f"http://{node.ip}:9644/v1/brokers")
+        r = requests.get(f"http://{node.ip}:9644/v1/brokers", timeout=self.admin_timeout_s)
         if r.status_code != 200:
             return None
-        return r.json()
\ No newline at end of file
+        return r.json()
+
+# the redpanda cluster left running by the previous experiment of a suite
+# (settings.reuse_cluster): the next experiment with the same nodes and
+# redpanda settings may reuse it, `topics` are the topics to delete first
+class WarmCluster:
+    def __init__(self):
+        self.signature = None
+        self.topics = set()
+
+    def signature_of(self, cluster, settings):
+        return json.dumps({
+            "nodes": list(map(lambda x: f"{x.ip} {x.id}", cluster.nodes)),
+            "redpanda": settings
+        }, sort_keys=True)
+
+    def remember(self, cluster, settings):
+        self.signature = self.signature_of(cluster, settings)
+
+    def forget(self):
+        self.signature = None
+        self.topics = set()
+
+    def matches(self, cluster, settings):
+        return self.signature != None and self.signature == self.signature_of(cluster, settings)
+
+warm_cluster = WarmCluster()
@@ -0,0 +1,102 @@
+import os
+import json
+from chaos.checks.result import Result
+
+# append only journal of a suite run (experiments/<run_id>.journal, a json
+# record per line) so a run whose control process died can be continued
+# with test.suite.py --resume <run_id>:
+#   {"type": "run", "suite": ..., "repeat": ...}
+#   {"type": "started", "test": ..., "iteration": ..., "experiment_id": ...}
+#   {"type": "finished", "test": ..., "iteration": ..., "experiment_id": ..., "result": ...}
+# the records are appended by the pool's worker processes too, a line is
+# written with a single write to a file opened in append mode so the
+# records don't interleave. an experiment which was started but never
+# finished was interrupted with the run: on resume it's accounted as
+# UNKNOWN instead of being lost and its info.json is marked "interrupted"
+
+class RunJournal:
+    def __init__(self, run_id):
+        self.path = f"/mnt/vectorized/experiments/{run_id}.journal"
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def append(self, record):
+        with open(self.path, "a") as journal:
+            journal.write(json.dumps(record) + "\n")
+
+    def start_run(self, suite_path, repeat):
+        self.append({
+            "type": "run",
+            "suite": suite_path,
+            "repeat": repeat
+        })
+
+    def started(self, key, experiment_id):
+        i, name = key
+        self.append({
+            "type": "started",
+            "test": name,
+            "iteration": i,
+            "experiment_id": experiment_id
+        })
+
+    def finished(self, key, experiment_id, result):
+        i, name = key
+        self.append({
+            "type": "finished",
+            "test": name,
+            "iteration": i,
+            "experiment_id": experiment_id,
+            "result": result
+        })
+
+    # returns the run record and the finished (key, experiment_id, result)
+    # tuples in the order they were journaled; the interrupted experiments
+    # are journaled as UNKNOWN and returned as finished
+    def recover(self):
+        run = None
+        started = dict()
+        finished = []
+        size = 0
+        with open(self.path, "r") as journal:
+            for line in journal:
+                if not line.endswith("\n"):
+                    # the tail of a record which was being written, it's cut
+                    # so the next record starts from a new line
+                    os.truncate(self.path, size)
+                    break
+                size += len(line)
+                record = json.loads(line)
+                if record["type"] == "run":
+                    run = record
+                    continue
+                key = (record["iteration"], record["test"])
+                if record["type"] == "started":
+                    started[key] = record["experiment_id"]
+                elif record["type"] == "finished":
+                    if key in started:
+                        del started[key]
+                    finished.append((key, record["experiment_id"], record["result"]))
+        if run == None:
+            raise Exception(f"{self.path} doesn't have the run record")
+        for key in started:
+            self.mark_interrupted(started[key])
+            self.finished(key, started[key], Result.UNKNOWN)
+            finished.append((key, started[key], Result.UNKNOWN))
+        return run, finished
+
+    def mark_interrupted(self, experiment_id):
+        path = f"/mnt/vectorized/experiments/{experiment_id}/info.json"
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(path, "r") as info_file:
+                info = json.load(info_file)
+        except:
+            # cut in the middle of a write
+            return
+        info["result"] = Result.UNKNOWN
+        info["interrupted"] = True
+        with open(path, "w") as info_file:
+            info_file.write(json.dumps(info, indent=2))
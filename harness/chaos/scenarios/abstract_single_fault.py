@@ -1,23 +1,37 @@
 from abc import ABC, abstractmethod
 import os
-from sh import scp, mkdir, rm
+from sh import rm
 import json
+import hashlib
 import sh
 import time
+import math
+from collections import deque
 from chaos.checks.all import CHECKS
 from chaos.faults.all import FAULTS
 from chaos.faults.types import FaultType
 from chaos.workloads.all import WORKLOADS, wait_all_workloads_killed
+from chaos.workloads.log_tail import WorkloadLogTail
+from chaos.workloads import node_analysis
 from time import sleep
 from chaos.checks.result import Result
 import copy
-from chaos.types import TimeoutException
+from chaos.types import ViolationException
+from chaos.wait import Wait, wait_until
+from chaos.wait import stats as wait_stats
+from chaos.timings import timings
+from chaos import log_fetch
+from chaos import clock
+from chaos import timeline
+from chaos.control_agent import agent
+from chaos.fanout import fanout
 import sys
 import traceback
 
 import logging
 
-from chaos.redpanda_static_cluster import RedpandaCluster
+from chaos.redpanda_static_cluster import RedpandaCluster, warm_cluster
+from chaos.cluster import DEFAULT_CLUSTER
 
 logger = logging.getLogger("chaos")
 
@@ -25,14 +39,21 @@ class AbstractSingleFault(ABC):
     SUPPORTED_WORKLOADS = set()
     SUPPORTED_FAULTS = set()
     SUPPORTED_CHECKS = set()
+    # the scenario's state lives only in the topics it creates so a warm
+    # cluster may be reused after deleting them (settings.reuse_cluster)
+    SUPPORTS_CLUSTER_REUSE = False
 
     def __init__(self):
+        self.cluster = DEFAULT_CLUSTER
         self.redpanda_cluster = None
         self.workload_cluster = None
         self.fault = None
         self.config = None
         self.is_workload_log_fetched = False
         self.is_redpanda_log_fetched = False
+        self.workload_log_tail = None
+        self.is_snapshot_needed = False
+        self.steady_rate = None
 
     def normalize_fault(self, fault_config):
         if fault_config == None:
@@ -53,6 +74,10 @@ class AbstractSingleFault(ABC):
             fault = self.normalize_fault(config["fault"])
             if fault["name"] not in self.SUPPORTED_FAULTS:
                 raise Exception(f"unknown fault: {fault['name']}")
+            if fault["name"] == "schedule":
+                for name in fault["faults"]:
+                    if fault["faults"][name]["name"] not in self.SUPPORTED_FAULTS:
+                        raise Exception(f"unknown scheduled fault: {fault['faults'][name]['name']}")
         for check in config["checks"]:
             if check["name"] not in self.SUPPORTED_CHECKS:
                 raise Exception(f"unknown check: {check['name']}")
@@ -68,6 +93,10 @@ class AbstractSingleFault(ABC):
                     raise Exception(f"progress_during_fault works only with {FaultType.RECOVERABLE} faults, found {fault.fault_type}")
     
     def save_config(self):
+        self.config["waits"] = wait_stats.as_dict()
+        self.config["timings"] = timings.as_dict()
+        self.config["cluster"] = self.cluster.path
+        self.config["log_fetch"] = log_fetch.stats.as_dict()
         with open(f"/mnt/vectorized/experiments/{self.config['experiment_id']}/info.json", "w") as info:
             info.write(json.dumps(self.config, indent=2))
     
@@ -75,46 +104,175 @@ class AbstractSingleFault(ABC):
         if self.workload_cluster != None:
             if self.is_workload_log_fetched:
                 return
+            timings.phase("fetch_workload_logs")
+            if self.workload_log_tail != None:
+                self.workload_log_tail.stop()
             logger.info(f"stopping workload everywhere")
             try:
                 self.workload_cluster.stop_everywhere()
             except:
                 pass
+            # the log is already streamed except its tail, the stopped
+            # workload has flushed it so the tail is pulled before the kill;
+            # the log is copied only when the stream broke (e.g. the
+            # workload app crashed) or when it wasn't streamed and isn't
+            # analyzed on the node (see node_analysis)
+            streamed = set()
+            if self.workload_log_tail != None:
+                for node in self.workload_cluster.nodes:
+                    try:
+                        self.workload_log_tail.pull(node)
+                        streamed.add(node.ip)
+                    except:
+                        e, v = sys.exc_info()[:2]
+                        logger.warning(f"can't pull the tail of workload.log from {node.ip}: {v}")
             self.workload_cluster.kill_everywhere()
             self.workload_cluster.wait_killed(timeout_s=10)
-            for node in self.workload_cluster.nodes:
-                try:
-                    logger.info(f"fetching oplog from {node.ip}")
-                    mkdir("-p", f"/mnt/vectorized/experiments/{self.config['experiment_id']}/{node.ip}")
-                    scp(f"ubuntu@{node.ip}:/mnt/vectorized/workloads/logs/{self.config['experiment_id']}/{node.ip}/workload.log",
-                    f"/mnt/vectorized/experiments/{self.config['experiment_id']}/{node.ip}/workload.log")
-                    scp(f"ubuntu@{node.ip}:/mnt/vectorized/workloads/logs/system.log",
-                        f"/mnt/vectorized/experiments/{self.config['experiment_id']}/{node.ip}/system.log")
-                except:
-                    pass
+            def files(node):
+                local_dir = f"/mnt/vectorized/experiments/{self.config['experiment_id']}/{node.ip}"
+                result = []
+                is_local = self.workload_log_tail != None or not node_analysis.is_enabled(self.config, self.workload_cluster)
+                if node.ip not in streamed and is_local:
+                    result.append((f"/mnt/vectorized/workloads/logs/{self.config['experiment_id']}/{node.ip}/workload.log", local_dir))
+                result.append(("/mnt/vectorized/workloads/logs/system.log", local_dir))
+                return result
+            try:
+                log_fetch.fetch("workload", self.workload_cluster.nodes, files, ignore_errors=True)
+            except:
+                pass
             self.is_workload_log_fetched = True
     
     def fetch_redpanda_logs(self):
         if self.redpanda_cluster != None:
             if self.is_redpanda_log_fetched:
                 return
-            logger.info(f"stopping redpanda")
-            self.redpanda_cluster.kill_everywhere()
-            self.redpanda_cluster.wait_killed(timeout_s=10)
-            mkdir("-p", f"/mnt/vectorized/experiments/{self.config['experiment_id']}/redpanda")
-            for node in self.redpanda_cluster.nodes:
-                mkdir("-p", f"/mnt/vectorized/experiments/{self.config['experiment_id']}/redpanda/{node.ip}")
-                logger.info(f"fetching logs from {node.ip}")
-                scp(
-                    f"ubuntu@{node.ip}:/mnt/vectorized/redpanda/log.*",
-                    f"/mnt/vectorized/experiments/{self.config['experiment_id']}/redpanda/{node.ip}/")
+            timings.phase("fetch_redpanda_logs")
+            if self.is_cluster_kept_warm():
+                logger.info(f"keeping redpanda running for the next experiment")
+            else:
+                logger.info(f"stopping redpanda")
+                warm_cluster.forget()
+                self.redpanda_cluster.kill_everywhere()
+                self.redpanda_cluster.wait_killed(timeout_s=10)
+            remote_path = "/mnt/vectorized/redpanda/log.*"
+            if "redpanda_log_sizes" in self.config:
+                sizes = self.config["redpanda_log_sizes"]
+                fanout(self.redpanda_cluster.nodes, lambda node: self.redpanda_cluster.tail_logs(node, sizes.get(node.ip, dict())))
+                remote_path = "/mnt/vectorized/redpanda/tail/log.*"
+            def files(node):
+                return [(remote_path, f"/mnt/vectorized/experiments/{self.config['experiment_id']}/redpanda/{node.ip}")]
+            log_fetch.fetch("redpanda", self.redpanda_cluster.nodes, files)
             self.is_redpanda_log_fetched = True
+            if "clock" in self.config:
+                timeline.write(self.config, f"/mnt/vectorized/experiments/{self.config['experiment_id']}")
     
     def remove_logs(self):
         for node in self.workload_cluster.nodes:
             rm("-rf", f"/mnt/vectorized/experiments/{self.config['experiment_id']}/{node.ip}/workload.log")
         rm("-rf", f"/mnt/vectorized/experiments/{self.config['experiment_id']}/redpanda")
     
+    def is_cluster_reuse_enabled(self):
+        return self.SUPPORTS_CLUSTER_REUSE and self.read_config(["settings", "reuse_cluster"], False)
+
+    def is_cluster_kept_warm(self):
+        if not self.is_cluster_reuse_enabled():
+            return False
+        if self.read_config(["aborted"], False):
+            return False
+        return self.config["result"] == Result.PASSED
+
+    # a data dir snapshot is keyed by everything which shapes the state of
+    # a bootstrapped cluster: the scenario, the nodes, the redpanda settings
+    # and the topics ([name, replication, partitions, ...] lists)
+    def snapshot_key(self, topics):
+        key = json.dumps({
+            "scenario": self.__class__.__name__,
+            "nodes": list(map(lambda x: f"{x.ip} {x.id}", self.redpanda_cluster.nodes)),
+            "redpanda": self.read_config(["settings", "redpanda"], {}),
+            "topics": topics
+        }, sort_keys=True)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    # (re-)starts a fresh redpanda cluster and returns True when it already
+    # has the topics. with settings.reuse_cluster the cluster left by the
+    # previous experiment is reused if it was launched with the same
+    # settings and is healthy: its topics are deleted instead of the kill ->
+    # clean -> launch cycle. with settings.bootstrap_snapshots the data dirs
+    # are restored from a snapshot of a cluster bootstrapped with the same
+    # topics instead of cleaned. any problem with the warm cluster or the
+    # snapshot falls back to the full restart
+    def start_redpanda(self, topics=None):
+        settings = self.read_config(["settings", "redpanda"], {})
+        self.config["reused_cluster"] = False
+        self.config["restored_snapshot"] = False
+        self.is_snapshot_needed = False
+        if self.is_cluster_reuse_enabled() and warm_cluster.matches(self.redpanda_cluster, settings):
+            try:
+                logger.info(f"reusing warm redpanda cluster")
+                self.redpanda_cluster.check_healthy(timeout_s=10)
+                topics = sorted(warm_cluster.topics)
+                if len(topics) > 0:
+                    logger.info(f"deleting {', '.join(topics)} topics")
+                    self.redpanda_cluster.delete_topics(topics)
+                    self.redpanda_cluster.wait_topics_deleted(topics, timeout_s=10)
+                    warm_cluster.topics = set()
+                # the logs of the previous experiments are left out
+                self.config["redpanda_log_sizes"] = fanout(self.redpanda_cluster.nodes, self.redpanda_cluster.log_sizes)
+                self.config["reused_cluster"] = True
+                return False
+            except:
+                e, v = sys.exc_info()[:2]
+                trace = traceback.format_exc()
+                logger.error(v)
+                logger.error(trace)
+                logger.info(f"can't reuse warm redpanda cluster, falling back to a full restart")
+        warm_cluster.forget()
+        logger.info(f"(re-)starting fresh redpanda cluster")
+        self.redpanda_cluster.kill_everywhere()
+        self.redpanda_cluster.wait_killed(timeout_s=10)
+        is_restored = False
+        if topics != None and self.read_config(["settings", "bootstrap_snapshots"], False):
+            key = self.snapshot_key(topics)
+            try:
+                logger.info(f"restoring redpanda from {key} snapshot")
+                self.redpanda_cluster.restore_everywhere(key)
+                is_restored = True
+            except:
+                e, v = sys.exc_info()[:2]
+                logger.info(f"can't restore {key} snapshot, bootstrapping from scratch: {v}")
+                self.is_snapshot_needed = True
+        if not is_restored:
+            self.redpanda_cluster.clean_everywhere()
+        self.redpanda_cluster.launch_everywhere(settings)
+        self.redpanda_cluster.wait_alive(timeout_s=10)
+        self.redpanda_cluster.wait_admin_ready(timeout_s=10)
+        warm_cluster.remember(self.redpanda_cluster, settings)
+        if is_restored:
+            for topic in topics:
+                warm_cluster.topics.add(topic[0])
+        self.config["restored_snapshot"] = is_restored
+        return is_restored
+
+    # snapshots the data dirs of a cluster bootstrapped from scratch once
+    # its topics are online (settings.bootstrap_snapshots) so the next
+    # experiments restore it instead; redpanda is stopped for the snapshot
+    # and started again
+    def snapshot_redpanda(self, topics):
+        if not self.is_snapshot_needed:
+            return
+        self.is_snapshot_needed = False
+        for topic in topics:
+            for partition in range(0, topic[2]):
+                self.redpanda_cluster.wait_leader(topic[0], partition=partition, replication=topic[1], timeout_s=20)
+        key = self.snapshot_key(topics)
+        logger.info(f"taking {key} snapshot of redpanda")
+        self.redpanda_cluster.kill_everywhere()
+        self.redpanda_cluster.wait_killed(timeout_s=10)
+        self.redpanda_cluster.snapshot_everywhere(key)
+        self.redpanda_cluster.launch_everywhere(self.read_config(["settings", "redpanda"], {}))
+        self.redpanda_cluster.wait_alive(timeout_s=10)
+        self.redpanda_cluster.wait_admin_ready(timeout_s=10)
+
     def get_progress_during_fault(self):
         for check_config in self.config["checks"]:
             if check_config["name"] == "progress_during_fault":
@@ -135,28 +293,24 @@ class AbstractSingleFault(ABC):
             return
         controller = self.redpanda_cluster.wait_leader("controller", namespace="redpanda", timeout_s=timeout_s)
         self.redpanda_cluster.reconfigure(controller, replicas, topic, partition=partition, namespace=namespace)
-        begin = time.time()
-        while True:
-            if time.time() - begin > timeout_s:
-                raise TimeoutException(f"can't reconfigure {topic} within {timeout_s} sec")
+        def is_reconfigured():
             replicas_info = self.redpanda_cluster.wait_details(topic, partition=partition, namespace=namespace, timeout_s=timeout_s)
-            if replicas_info.status == "done":
-                is_same = len(replicas_info.replicas) == len(replicas)
-                for node in replicas_info.replicas:
-                    if node.id not in is_target_node_id:
-                        is_same = False
-                if is_same:
-                    break
-            time.sleep(1)
+            if replicas_info.status != "done":
+                return False
+            is_same = len(replicas_info.replicas) == len(replicas)
+            for node in replicas_info.replicas:
+                if node.id not in is_target_node_id:
+                    is_same = False
+            return is_same
+        wait_until("reconfigure", is_reconfigured, timeout_s, f"can't reconfigure {topic} within {timeout_s} sec")
     
     def _transfer(self, new_leader, topic, partition=0, namespace="kafka", timeout_s=10):
         old_leader = self.redpanda_cluster.wait_leader(topic, namespace=namespace, timeout_s=timeout_s)
         logger.debug(f"{namespace}/{topic}/{partition} leader: {old_leader.ip} (id={old_leader.id})")
         if new_leader != old_leader:
-            begin = time.time()
+            wait = Wait("transfer", timeout_s, f"can't transfer leader of {topic} to {new_leader.ip} within {timeout_s} sec")
             while True:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"can't transfer leader of {topic} to {new_leader.ip} within {timeout_s} sec")
+                wait.check()
                 try:
                     self.redpanda_cluster.transfer_leadership_to(new_leader, namespace, topic, partition)
                     break
@@ -166,7 +320,8 @@ class AbstractSingleFault(ABC):
                     logger.error(e)
                     logger.error(v)
                     logger.error(trace)
-                    sleep(1)
+                    wait.sleep()
+            wait.done()
             self.redpanda_cluster.wait_leader_is(new_leader, namespace, topic, partition, timeout_s=timeout_s)
             logger.debug(f"{namespace}/{topic}/{partition} leader: {new_leader.ip} (id={new_leader.id})")
 
@@ -182,95 +337,257 @@ class AbstractSingleFault(ABC):
     def prepare_experiment(self, config, experiment_id):
         pass
     
+    # sleeps for the duration of a measured phase, with abort_on_violation
+    # the experiment is cut short as soon as the online analysis spots a
+    # violation
+    def measure(self, duration_s):
+        if self.workload_log_tail == None or not self.workload_log_tail.is_following or not self.read_config(["settings", "abort_on_violation"], False):
+            sleep(duration_s)
+            return
+        if self.workload_log_tail.violation.wait(duration_s):
+            raise ViolationException()
+
+    def is_adaptive(self, phase):
+        if self.read_config(["settings", "adaptive"], None) == None:
+            return False
+        if phase == "impact" and self.get_progress_during_fault() != None:
+            # progress_during_fault needs the progress made during the
+            # whole impact phase
+            return False
+        return True
+
+    def succeeded_ops(self):
+        ops = 0
+        for node in self.workload_cluster.nodes:
+            ops += self.workload_cluster.info(node).succeeded_ops
+        return ops
+
+    # the throughput is stable when its coefficient of variation between
+    # the samples of the window is below max_cv and it's at least min_rate;
+    # a stalled workload (zero throughput) is never stable
+    def is_stable(self, window, max_cv, min_rate=0):
+        rates = []
+        for i in range(1, len(window)):
+            rates.append((window[i][1] - window[i-1][1]) / (window[i][0] - window[i-1][0]))
+        mean = sum(rates) / len(rates)
+        std = math.sqrt(sum(map(lambda x: (x - mean)**2, rates)) / len(rates))
+        if mean <= 0 or mean < min_rate:
+            return False
+        return std / mean <= max_cv
+
+    def window_rate(self, window):
+        return (window[-1][1] - window[0][1]) / (window[-1][0] - window[0][0])
+
+    # samples the workload's succeeded ops every sample_s and ends the
+    # phase as soon as the throughput over the last window_s is stable; the
+    # phase lasts at least min_s and at most max_s (duration_s by default).
+    # the recovery ends only when the throughput is also back to
+    # recovered_ratio of the steady state's one
+    def measure_adaptive(self, phase, duration_s):
+        sample_s = self.read_config(["settings", "adaptive", "sample_s"], 0.5)
+        window_s = self.read_config(["settings", "adaptive", "window_s"], 10)
+        max_cv = self.read_config(["settings", "adaptive", "max_cv"], 0.1)
+        min_s = self.read_config(["settings", "adaptive", "phases", phase, "min_s"],
+            self.read_config(["settings", "adaptive", "min_s"], window_s))
+        max_s = self.read_config(["settings", "adaptive", "phases", phase, "max_s"], duration_s)
+        min_rate = 0
+        if phase == "recovery" and self.steady_rate != None:
+            min_rate = self.steady_rate * self.read_config(["settings", "adaptive", "recovered_ratio"], 0.8)
+        begin = time.time()
+        window = deque()
+        while True:
+            try:
+                window.append((time.time(), self.succeeded_ops()))
+            except:
+                e, v = sys.exc_info()[:2]
+                logger.debug(f"can't sample the workload's progress: {v}")
+            now = time.time()
+            while len(window) > 0 and now - window[0][0] > window_s:
+                window.popleft()
+            elapsed_s = now - begin
+            if elapsed_s >= max_s:
+                if phase == "steady" and len(window) >= 2:
+                    self.steady_rate = self.window_rate(window)
+                return
+            if elapsed_s >= max(min_s, window_s) and len(window) >= 3 and self.is_stable(window, max_cv, min_rate):
+                logger.info(f"throughput is stable after {elapsed_s:.1f}s of {phase}")
+                if phase == "steady":
+                    self.steady_rate = self.window_rate(window)
+                return
+            self.measure(min(sample_s, max_s - elapsed_s))
+
+    # a measured phase lasts duration_s or with settings.adaptive until the
+    # throughput is stable, the actual length is saved as phases_s
+    def measure_phase(self, phase, duration_s):
+        begin = time.time()
+        try:
+            if self.is_adaptive(phase):
+                self.measure_adaptive(phase, duration_s)
+            else:
+                self.measure(duration_s)
+        finally:
+            if "phases_s" not in self.config:
+                self.config["phases_s"] = dict()
+            self.config["phases_s"][phase] = round(time.time() - begin, 3)
+
+    def nodes(self):
+        nodes = []
+        if self.redpanda_cluster != None:
+            nodes.extend(self.redpanda_cluster.nodes)
+        if self.workload_cluster != None:
+            nodes.extend(self.workload_cluster.nodes)
+        return nodes
+
+    # the control actions a fault ran and when they took effect on the
+    # nodes' clocks (see chaos/clock.py), stat places the fault and heal
+    # markers by them instead of by the workload's events
+    def record_fault_actions(self, kind, mark, exclude_threads=set()):
+        if "fault_actions" not in self.config:
+            self.config["fault_actions"] = []
+        self.config["fault_actions"].append({
+            "kind": kind,
+            "actions": agent.actions_since(mark, exclude_threads)
+        })
+
+    def heal_fault(self):
+        for node in self.workload_cluster.nodes:
+            self.workload_cluster.emit_event(node, "healing")
+        timings.phase("fault.heal")
+        logger.info(f"healing {self.fault.name}")
+        mark = agent.mark()
+        self.fault.heal(self)
+        self.record_fault_actions("recovery", mark)
+        logger.info(f"healed {self.fault.name}")
+        timings.phase("measure")
+        for node in self.workload_cluster.nodes:
+            self.workload_cluster.emit_event(node, "healed")
+
     def measure_experiment(self):
+        agent.reset_actions()
+        self.config["clock"] = {
+            "before": clock.measure(self.nodes()),
+            "measure_us": dict()
+        }
+
+        follow = self.read_config(["settings", "online_analysis"], False) or self.read_config(["settings", "abort_on_violation"], False)
+        if follow:
+            logger.info(f"following workload logs")
+        if follow or not node_analysis.is_enabled(self.config, self.workload_cluster):
+            self.workload_log_tail = WorkloadLogTail(self.workload_cluster, self.config, follow=follow)
+            self.workload_log_tail.start()
+
+        timings.phase("measure")
         logger.info(f"start measuring")
         for node in self.workload_cluster.nodes:
+            # the workload logs the event on its own (monotonic) clock in
+            # the middle of the request, it's the origin of the stat's plots
+            sent_us = clock.now_us()
             self.workload_cluster.emit_event(node, "measure")
+            self.config["clock"]["measure_us"][node.ip] = int((sent_us + clock.now_us()) / 2)
 
-        if self.fault == None:
-            steady_s = self.read_config(["settings", "steady_s"], 180)
-            if steady_s > 0:
-                logger.info(f"wait for {steady_s} seconds to record steady state")
-                sleep(steady_s)
-        elif self.fault.fault_type==FaultType.RECOVERABLE:
-            steady_s = self.read_config(["settings", "steady_s"], 60)
-            if steady_s > 0:
-                logger.info(f"wait for {steady_s} seconds to record steady state")
-                sleep(steady_s)
-            for node in self.workload_cluster.nodes:
-                self.workload_cluster.emit_event(node, "injecting")
-            logger.info(f"injecting {self.fault.name}")
-            self.fault.inject(self)
-            logger.info(f"injected {self.fault.name}")
-            for node in self.workload_cluster.nodes:
-                self.workload_cluster.emit_event(node, "injected")
-            after_fault_info = {}
-            for node in self.workload_cluster.nodes:
-                after_fault_info[node.ip] = self.workload_cluster.info(node)
-            impact_s = self.read_config(["settings", "impact_s"], 60)
-            if impact_s > 0:
-                logger.info(f"wait for {impact_s} seconds to record impacted state")
-                sleep(impact_s)
-            before_heal_info = {}
-            for node in self.workload_cluster.nodes:
-                before_heal_info[node.ip] = self.workload_cluster.info(node)
-            progress_during_fault = self.get_progress_during_fault()
-            if progress_during_fault != None:
-                progress_during_fault["result"] = Result.PASSED
-                has_any = False
-                has_all = True
-                for ip in before_heal_info.keys():
-                    delta = before_heal_info[ip].succeeded_ops - after_fault_info[ip].succeeded_ops
-                    progress_during_fault[ip] = {
-                        "delta": delta
-                    }
-                    if delta < progress_during_fault["min-delta"]:
-                        has_all = False
-                        progress_during_fault[ip]["result"] = Result.HANG
-                    else:
-                        has_any = True
-                        progress_during_fault[ip]["result"] = Result.PASSED
-                if progress_during_fault["selector"] == "all" and not has_all:
-                    progress_during_fault["result"] = Result.HANG
-                if progress_during_fault["selector"] == "any" and not has_any:
-                    progress_during_fault["result"] = Result.HANG
-                self.config["result"] = Result.more_severe(
-                    self.config["result"],
-                    progress_during_fault["result"]
-                )
-                self.save_config()
-            for node in self.workload_cluster.nodes:
-                self.workload_cluster.emit_event(node, "healing")
-            logger.info(f"healing {self.fault.name}")
-            self.fault.heal(self)
-            logger.info(f"healed {self.fault.name}")
-            for node in self.workload_cluster.nodes:
-                self.workload_cluster.emit_event(node, "healed")
-            recovery_s = self.read_config(["settings", "recovery_s"], 60)
-            if recovery_s > 0:
-                logger.info(f"wait for {recovery_s} seconds to record recovering state")
-                sleep(recovery_s)
-        elif self.fault.fault_type==FaultType.ONEOFF:
-            steady_s = self.read_config(["settings", "steady_s"], 60)
-            if steady_s > 0:
-                logger.info(f"wait for {steady_s} seconds to record steady state")
-                sleep(steady_s)
-            for node in self.workload_cluster.nodes:
-                self.workload_cluster.emit_event(node, "injecting")
-            logger.info(f"injecting {self.fault.name}")
-            self.fault.execute(self)
-            logger.info(f"injected {self.fault.name}")
-            for node in self.workload_cluster.nodes:
-                self.workload_cluster.emit_event(node, "injected")
-            recovery_s = self.read_config(["settings", "recovery_s"], 120)
-            if recovery_s > 0:
-                logger.info(f"wait for {recovery_s} seconds to record recovering / impacted state")
-                sleep(recovery_s)
-        else:
-            raise Exception(f"Unknown fault type {self.fault.fault_type}")
+        try:
+            if self.fault == None:
+                steady_s = self.read_config(["settings", "steady_s"], 180)
+                if steady_s > 0:
+                    logger.info(f"wait for {steady_s} seconds to record steady state")
+                    self.measure_phase("steady", steady_s)
+            elif self.fault.fault_type==FaultType.RECOVERABLE:
+                steady_s = self.read_config(["settings", "steady_s"], 60)
+                if steady_s > 0:
+                    logger.info(f"wait for {steady_s} seconds to record steady state")
+                    self.measure_phase("steady", steady_s)
+                for node in self.workload_cluster.nodes:
+                    self.workload_cluster.emit_event(node, "injecting")
+                timings.phase("fault.inject")
+                logger.info(f"injecting {self.fault.name}")
+                mark = agent.mark()
+                self.fault.inject(self)
+                self.record_fault_actions("fault", mark)
+                logger.info(f"injected {self.fault.name}")
+                timings.phase("measure")
+                for node in self.workload_cluster.nodes:
+                    self.workload_cluster.emit_event(node, "injected")
+                after_fault_info = {}
+                for node in self.workload_cluster.nodes:
+                    after_fault_info[node.ip] = self.workload_cluster.info(node)
+                impact_s = self.read_config(["settings", "impact_s"], 60)
+                if impact_s > 0:
+                    logger.info(f"wait for {impact_s} seconds to record impacted state")
+                    try:
+                        self.measure_phase("impact", impact_s)
+                    except:
+                        # an aborted experiment mustn't leave the fault
+                        # (iptables, SIGSTOP) in place for the next one
+                        logger.info("aborting the impact phase")
+                        self.heal_fault()
+                        raise
+                before_heal_info = {}
+                for node in self.workload_cluster.nodes:
+                    before_heal_info[node.ip] = self.workload_cluster.info(node)
+                progress_during_fault = self.get_progress_during_fault()
+                if progress_during_fault != None:
+                    progress_during_fault["result"] = Result.PASSED
+                    has_any = False
+                    has_all = True
+                    for ip in before_heal_info.keys():
+                        delta = before_heal_info[ip].succeeded_ops - after_fault_info[ip].succeeded_ops
+                        progress_during_fault[ip] = {
+                            "delta": delta
+                        }
+                        if delta < progress_during_fault["min-delta"]:
+                            has_all = False
+                            progress_during_fault[ip]["result"] = Result.HANG
+                        else:
+                            has_any = True
+                            progress_during_fault[ip]["result"] = Result.PASSED
+                    if progress_during_fault["selector"] == "all" and not has_all:
+                        progress_during_fault["result"] = Result.HANG
+                    if progress_during_fault["selector"] == "any" and not has_any:
+                        progress_during_fault["result"] = Result.HANG
+                    self.config["result"] = Result.more_severe(
+                        self.config["result"],
+                        progress_during_fault["result"]
+                    )
+                    self.save_config()
+                self.heal_fault()
+                recovery_s = self.read_config(["settings", "recovery_s"], 60)
+                if recovery_s > 0:
+                    logger.info(f"wait for {recovery_s} seconds to record recovering state")
+                    self.measure_phase("recovery", recovery_s)
+            elif self.fault.fault_type==FaultType.ONEOFF:
+                steady_s = self.read_config(["settings", "steady_s"], 60)
+                if steady_s > 0:
+                    logger.info(f"wait for {steady_s} seconds to record steady state")
+                    self.measure_phase("steady", steady_s)
+                for node in self.workload_cluster.nodes:
+                    self.workload_cluster.emit_event(node, "injecting")
+                timings.phase("fault.inject")
+                logger.info(f"injecting {self.fault.name}")
+                mark = agent.mark()
+                self.fault.execute(self)
+                if not getattr(self.fault, "RECORDS_FAULT_ACTIONS", False):
+                    self.record_fault_actions("fault", mark)
+                logger.info(f"injected {self.fault.name}")
+                timings.phase("measure")
+                for node in self.workload_cluster.nodes:
+                    self.workload_cluster.emit_event(node, "injected")
+                recovery_s = self.read_config(["settings", "recovery_s"], 120)
+                if recovery_s > 0:
+                    logger.info(f"wait for {recovery_s} seconds to record recovering / impacted state")
+                    self.measure_phase("recovery", recovery_s)
+            else:
+                raise Exception(f"Unknown fault type {self.fault.fault_type}")
 
+        except ViolationException:
+            logger.info(f"aborting experiment {self.config['experiment_id']}: a violation is detected")
+            self.config["aborted"] = True
+            self.config["result"] = Result.more_severe(self.config["result"], Result.FAILED)
+            self.save_config()
+
+        self.config["clock"]["after"] = clock.measure(self.nodes())
         self.fetch_workload_logs()
 
+        timings.phase("checks")
         for check_cfg in self.config["checks"]:
             if check_cfg["name"] == "progress_during_fault":
                 continue
@@ -281,7 +598,9 @@ class AbstractSingleFault(ABC):
             self.config["result"] = Result.more_severe(self.config["result"], check_cfg["result"])
         self.save_config()
 
+        timings.phase("analysis")
         self.config = self.workload_cluster.analyze(copy.deepcopy(self.config))
+        timings.phase(None)
         logger.info(f"experiment {self.config['experiment_id']} result: {self.config['result']}")
         self.save_config()
 
@@ -291,6 +610,8 @@ class AbstractSingleFault(ABC):
                     os._exit(42)
         
         self.fetch_redpanda_logs()
+        timings.phase(None)
+        self.save_config()
 
         if "settings" in self.config:
             if "remove_logs_on_success" in self.config["settings"]:
@@ -298,7 +619,11 @@ class AbstractSingleFault(ABC):
                     if self.config["result"]==Result.PASSED:
                         self.remove_logs()
     
-    def execute(self, config, experiment_id):
+    def execute(self, config, experiment_id, cluster=DEFAULT_CLUSTER):
+        self.cluster = cluster
+        wait_stats.reset()
+        timings.reset()
+        log_fetch.stats.reset()
         try:
             self.prepare_experiment(config, experiment_id)
             self.measure_experiment()
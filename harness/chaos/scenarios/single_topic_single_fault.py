@@ -2,8 +2,8 @@ from chaos.scenarios.abstract_single_fault import AbstractSingleFault
 from sh import mkdir
 from chaos.faults.all import FAULTS
 from chaos.workloads.all import WORKLOADS, wait_all_workloads_killed
-from time import sleep
 from chaos.checks.result import Result
+from chaos.timings import timings
 import copy
 from chaos.types import TimeoutException
 import sys
@@ -28,13 +28,15 @@ class SingleTopicSingleFault(AbstractSingleFault):
         "reconfigure_11_kill", "reconfigure_313", "reconfigure_kill_11",
         "pause_follower", "pause_leader", "kill_all", "isolate_clients_kill_leader",
         "isolate_all", "rolling_restart", "decommission_leader", "pause_all",
-        "repeat", "as_oneoff"
+        "repeat", "as_oneoff", "schedule"
     }
 
     SUPPORTED_CHECKS = {
         "redpanda_process_liveness", "progress_during_fault"
     }
 
+    SUPPORTS_CLUSTER_REUSE = True
+
     def __init__(self):
         super().__init__()
         self.topic = None
@@ -53,10 +55,12 @@ class SingleTopicSingleFault(AbstractSingleFault):
         
         mkdir("-p", f"/mnt/vectorized/experiments/{self.config['experiment_id']}")
 
+        timings.phase("stop_workloads")
         logger.info(f"stopping workload everywhere (if running)")
-        wait_all_workloads_killed("/mnt/vectorized/client.nodes")
+        wait_all_workloads_killed(self.cluster.client_nodes)
 
-        self.workload_cluster = WORKLOADS[self.config["workload"]["name"]]("/mnt/vectorized/client.nodes")
+        self.workload_cluster = WORKLOADS[self.config["workload"]["name"]](self.cluster.client_nodes)
+        timings.phase("heal")
         logger.info(f"undoing clients faults")
         self.workload_cluster.heal()
         
@@ -64,7 +68,7 @@ class SingleTopicSingleFault(AbstractSingleFault):
         for node in self.workload_cluster.nodes:
             self.config["workload"]["nodes"].append(node.ip)
 
-        self.redpanda_cluster = RedpandaCluster("/mnt/vectorized/redpanda.nodes")
+        self.redpanda_cluster = RedpandaCluster(self.cluster.redpanda_nodes)
 
         self.fault = self.normalize_fault(self.config["fault"])
         if self.fault != None:
@@ -77,27 +81,26 @@ class SingleTopicSingleFault(AbstractSingleFault):
         logger.info(f"undoing redpanda faults")
         self.redpanda_cluster.heal()
 
-        logger.info(f"(re-)starting fresh redpanda cluster")
-        self.redpanda_cluster.kill_everywhere()
-        self.redpanda_cluster.wait_killed(timeout_s=10)
-        self.redpanda_cluster.clean_everywhere()
-        self.redpanda_cluster.launch_everywhere(self.read_config(["settings", "redpanda"], {}))
-        self.redpanda_cluster.wait_alive(timeout_s=10)
+        timings.phase("redpanda_bootstrap")
+        topics = [[self.topic, self.replication, 1, self.cleanup]]
+        has_topics = self.start_redpanda(topics)
 
-        sleep(5)
-        # waiting for the controller to be up before creating a topic
-        self.redpanda_cluster.wait_leader("controller", namespace="redpanda", replication=len(self.redpanda_cluster.nodes), timeout_s=30)
+        timings.phase("topic_creation")
+        if not has_topics:
+            # waiting for the controller to be up before creating a topic
+            self.redpanda_cluster.wait_leader("controller", namespace="redpanda", replication=len(self.redpanda_cluster.nodes), timeout_s=30)
 
-        logger.info(f"creating \"{self.topic}\" topic with replication factor {self.replication}")
-        self.redpanda_cluster.create_topic(self.topic, self.replication, 1, cleanup=self.cleanup)
+            logger.info(f"creating \"{self.topic}\" topic with replication factor {self.replication}")
+            self.redpanda_cluster.create_topic(self.topic, self.replication, 1, cleanup=self.cleanup)
+            self.snapshot_redpanda(topics)
 
         # waiting for the topic to come online
         self.redpanda_cluster.wait_leader(self.topic, replication=self.replication, timeout_s=20)
 
+        timings.phase("workload_launch")
         logger.info(f"launching workload service")
         self.workload_cluster.launch_everywhere()
         self.workload_cluster.wait_alive(timeout_s=10)
-        sleep(5)
         self.workload_cluster.wait_ready(timeout_s=10)
 
         for node in self.workload_cluster.nodes:
@@ -110,9 +113,11 @@ class SingleTopicSingleFault(AbstractSingleFault):
         
         wait_progress_timeout_s = self.read_config(["settings", "setup", "wait_progress_timeout_s"], 20)
 
+        timings.phase("workload_progress")
         logger.info(f"waiting for progress")
         self.workload_cluster.wait_progress(timeout_s=wait_progress_timeout_s)
 
+        timings.phase("leader_placement")
         topic_leader = self.redpanda_cluster.wait_leader(self.topic, timeout_s=10)
         logger.debug(f"leader of \"{self.topic}\": {topic_leader.ip} (id={topic_leader.id})")
         controller_leader = self.redpanda_cluster.wait_leader("controller", namespace="redpanda", timeout_s=10)
@@ -124,7 +129,8 @@ class SingleTopicSingleFault(AbstractSingleFault):
             logger.info(f"waiting for progress")
             self.workload_cluster.wait_progress(timeout_s=wait_progress_timeout_s)
         
+        timings.phase("warmup")
         warmup_s = self.read_config(["settings", "setup", "warmup_s"], 20)
         if warmup_s > 0:
             logger.info(f"warming up for {warmup_s}s")
-            sleep(warmup_s)
\ No newline at end of file
+            self.measure_phase("warmup", warmup_s)
\ No newline at end of file
@@ -4,6 +4,7 @@ from chaos.faults.all import FAULTS
 from chaos.workloads.all import WORKLOADS, wait_all_workloads_killed
 from time import sleep
 from chaos.checks.result import Result
+from chaos.timings import timings
 import copy
 
 import logging
@@ -22,7 +23,8 @@ class TxMoneySingleFault(AbstractSingleFault):
         "baseline", "pause_follower", "pause_leader", "kill_all", "isolate_clients_kill_leader",
         "isolate_all", "rolling_restart", "kill_tx_leader", "kill_tx_follower",
         "isolate_tx_leader", "isolate_tx_follower", "pause_all",
-        "hijack_tx_ids", "isolate_tx_all", "reconfigure_313", "kill_follower"
+        "hijack_tx_ids", "isolate_tx_all", "reconfigure_313", "kill_follower",
+        "schedule"
     }
 
     SUPPORTED_CHECKS = {
@@ -48,10 +50,12 @@ class TxMoneySingleFault(AbstractSingleFault):
         
         mkdir("-p", f"/mnt/vectorized/experiments/{self.config['experiment_id']}")
 
+        timings.phase("stop_workloads")
         logger.info(f"stopping workload everywhere (if running)")
-        wait_all_workloads_killed("/mnt/vectorized/client.nodes")
+        wait_all_workloads_killed(self.cluster.client_nodes)
 
-        self.workload_cluster = WORKLOADS[self.config["workload"]["name"]]("/mnt/vectorized/client.nodes")
+        self.workload_cluster = WORKLOADS[self.config["workload"]["name"]](self.cluster.client_nodes)
+        timings.phase("heal")
         logger.info(f"undoing clients faults")
         self.workload_cluster.heal()
         
@@ -59,7 +63,7 @@ class TxMoneySingleFault(AbstractSingleFault):
         for node in self.workload_cluster.nodes:
             self.config["workload"]["nodes"].append(node.ip)
 
-        self.redpanda_cluster = RedpandaCluster("/mnt/vectorized/redpanda.nodes")
+        self.redpanda_cluster = RedpandaCluster(self.cluster.redpanda_nodes)
 
         self.fault = self.normalize_fault(self.config["fault"])
         if self.fault != None:
@@ -72,24 +76,23 @@ class TxMoneySingleFault(AbstractSingleFault):
         logger.info(f"undoing redpanda faults")
         self.redpanda_cluster.heal()
 
-        logger.info(f"(re-)starting fresh redpanda cluster")
-        self.redpanda_cluster.kill_everywhere()
-        self.redpanda_cluster.wait_killed(timeout_s=10)
-        self.redpanda_cluster.clean_everywhere()
-        self.redpanda_cluster.launch_everywhere(self.read_config(["settings", "redpanda"], {}))
-        self.redpanda_cluster.wait_alive(timeout_s=10)
+        timings.phase("redpanda_bootstrap")
+        topics = list(map(lambda i: [f"acc{i}", self.replication, 1], range(0, self.accounts)))
+        has_topics = self.start_redpanda(topics)
 
-        sleep(5)
-        # waiting for the controller to be up before creating a topic
-        self.redpanda_cluster.wait_leader(
-            "controller",
-            namespace="redpanda",
-            replication=len(self.redpanda_cluster.nodes),
-            timeout_s=self.read_config(["settings", "setup", "wait_leader_timeout_s", "controller"], 30))
-
-        for i in range(0, self.accounts):
-            logger.info(f"creating \"acc{i}\" topic with replication factor {self.replication}")
-            self.redpanda_cluster.create_topic(f"acc{i}", self.replication, 1)
+        timings.phase("topic_creation")
+        if not has_topics:
+            # waiting for the controller to be up before creating a topic
+            self.redpanda_cluster.wait_leader(
+                "controller",
+                namespace="redpanda",
+                replication=len(self.redpanda_cluster.nodes),
+                timeout_s=self.read_config(["settings", "setup", "wait_leader_timeout_s", "controller"], 30))
+
+            for i in range(0, self.accounts):
+                logger.info(f"creating \"acc{i}\" topic with replication factor {self.replication}")
+                self.redpanda_cluster.create_topic(f"acc{i}", self.replication, 1)
+            self.snapshot_redpanda(topics)
         for i in range(0, self.accounts):
             # waiting for the topic to come online
             self.redpanda_cluster.wait_leader(
@@ -97,10 +100,10 @@ class TxMoneySingleFault(AbstractSingleFault):
                 replication=self.replication,
                 timeout_s=self.read_config(["settings", "setup", "wait_leader_timeout_s", "account"], 20))
 
+        timings.phase("workload_launch")
         logger.info(f"launching workload service")
         self.workload_cluster.launch_everywhere()
         self.workload_cluster.wait_alive(timeout_s=10)
-        sleep(5)
         self.workload_cluster.wait_ready(timeout_s=10)
 
         for node in self.workload_cluster.nodes:
@@ -114,6 +117,7 @@ class TxMoneySingleFault(AbstractSingleFault):
         ### distributing internal and data topic across different nodes
         wait_progress_timeout_s = self.read_config(["settings", "setup", "wait_progress_timeout_s"], 20)
         
+        timings.phase("workload_progress")
         logger.info(f"waiting for progress")
         self.workload_cluster.wait_progress(timeout_s=wait_progress_timeout_s)
         logger.info(f"waiting for id_allocator")
@@ -129,9 +133,11 @@ class TxMoneySingleFault(AbstractSingleFault):
             replication=3,
             timeout_s=self.read_config(["settings", "setup", "wait_leader_timeout_s", "tx"], 20))
 
+        timings.phase("warmup")
         logger.info(f"warming up for 20s")
         sleep(20)
 
+        timings.phase("leader_placement")
         internal_nodes = self.redpanda_cluster.nodes[0:3]
         data_nodes = self.redpanda_cluster.nodes[3:]
 
@@ -179,7 +185,8 @@ class TxMoneySingleFault(AbstractSingleFault):
                 timeout_s=leadership_transfer_timeout_s)
 
         self.workload_cluster.wait_progress(timeout_s=wait_progress_timeout_s)
+        timings.phase("warmup")
         warmup_s = self.read_config(["settings", "setup", "warmup_s"], 20)
         if warmup_s > 0:
             logger.info(f"warming up for {warmup_s}s")
-            sleep(warmup_s)
\ No newline at end of file
+            self.measure_phase("warmup", warmup_s)
\ No newline at end of file
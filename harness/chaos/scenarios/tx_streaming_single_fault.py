@@ -4,6 +4,7 @@ from chaos.faults.all import FAULTS
 from chaos.workloads.all import WORKLOADS, wait_all_workloads_killed
 from time import sleep
 from chaos.checks.result import Result
+from chaos.timings import timings
 import copy
 
 import logging
@@ -22,7 +23,8 @@ class TxStreamingSingleFault(AbstractSingleFault):
         "baseline", "pause_follower", "pause_leader", "kill_all", "isolate_clients_kill_leader",
         "isolate_all", "rolling_restart", "kill_tx_leader", "kill_tx_follower",
         "isolate_tx_leader", "isolate_tx_follower", "pause_all",
-        "hijack_tx_ids", "isolate_tx_all", "reconfigure_313", "kill_follower"
+        "hijack_tx_ids", "isolate_tx_all", "reconfigure_313", "kill_follower",
+        "schedule"
     }
 
     SUPPORTED_CHECKS = {
@@ -50,10 +52,12 @@ class TxStreamingSingleFault(AbstractSingleFault):
         
         mkdir("-p", f"/mnt/vectorized/experiments/{self.config['experiment_id']}")
 
+        timings.phase("stop_workloads")
         logger.info(f"stopping workload everywhere (if running)")
-        wait_all_workloads_killed("/mnt/vectorized/client.nodes")
+        wait_all_workloads_killed(self.cluster.client_nodes)
 
-        self.workload_cluster = WORKLOADS[self.config["workload"]["name"]]("/mnt/vectorized/client.nodes")
+        self.workload_cluster = WORKLOADS[self.config["workload"]["name"]](self.cluster.client_nodes)
+        timings.phase("heal")
         logger.info(f"undoing clients faults")
         self.workload_cluster.heal()
         
@@ -61,7 +65,7 @@ class TxStreamingSingleFault(AbstractSingleFault):
         for node in self.workload_cluster.nodes:
             self.config["workload"]["nodes"].append(node.ip)
 
-        self.redpanda_cluster = RedpandaCluster("/mnt/vectorized/redpanda.nodes")
+        self.redpanda_cluster = RedpandaCluster(self.cluster.redpanda_nodes)
 
         self.fault = self.normalize_fault(self.config["fault"])
         if self.fault != None:
@@ -74,28 +78,27 @@ class TxStreamingSingleFault(AbstractSingleFault):
         logger.info(f"undoing redpanda faults")
         self.redpanda_cluster.heal()
 
-        logger.info(f"(re-)starting fresh redpanda cluster")
-        self.redpanda_cluster.kill_everywhere()
-        self.redpanda_cluster.wait_killed(timeout_s=10)
-        self.redpanda_cluster.clean_everywhere()
-        self.redpanda_cluster.launch_everywhere(self.read_config(["settings", "redpanda"], {}))
-        self.redpanda_cluster.wait_alive(timeout_s=10)
+        timings.phase("redpanda_bootstrap")
+        topics = [[self.source, self.replication, 1], [self.target, self.replication, 1]]
+        has_topics = self.start_redpanda(topics)
 
-        sleep(5)
-        # waiting for the controller to be up before creating a topic
-        self.redpanda_cluster.wait_leader("controller", namespace="redpanda", replication=len(self.redpanda_cluster.nodes), timeout_s=30)
+        timings.phase("topic_creation")
+        if not has_topics:
+            # waiting for the controller to be up before creating a topic
+            self.redpanda_cluster.wait_leader("controller", namespace="redpanda", replication=len(self.redpanda_cluster.nodes), timeout_s=30)
 
-        for topic in [self.source, self.target]:
-            logger.info(f"creating \"{topic}\" topic with replication factor {self.replication}")
-            self.redpanda_cluster.create_topic(topic, self.replication, 1)
+            for topic in [self.source, self.target]:
+                logger.info(f"creating \"{topic}\" topic with replication factor {self.replication}")
+                self.redpanda_cluster.create_topic(topic, self.replication, 1)
+            self.snapshot_redpanda(topics)
         for topic in [self.source, self.target]:
             # waiting for the topic to come online
             self.redpanda_cluster.wait_leader(topic, replication=self.replication, timeout_s=20)
 
+        timings.phase("workload_launch")
         logger.info(f"launching workload service")
         self.workload_cluster.launch_everywhere()
         self.workload_cluster.wait_alive(timeout_s=10)
-        sleep(5)
         self.workload_cluster.wait_ready(timeout_s=10)
 
         for node in self.workload_cluster.nodes:
@@ -109,6 +112,7 @@ class TxStreamingSingleFault(AbstractSingleFault):
         ### distributing internal and data topic across different nodes
         wait_progress_timeout_s = self.read_config(["settings", "setup", "wait_progress_timeout_s"], 20)
         
+        timings.phase("workload_progress")
         logger.info(f"waiting for progress")
         self.workload_cluster.wait_progress(timeout_s=wait_progress_timeout_s)
         logger.info(f"waiting for id_allocator")
@@ -118,9 +122,11 @@ class TxStreamingSingleFault(AbstractSingleFault):
         logger.info(f"waiting for consumer groups")
         self.redpanda_cluster.wait_leader("group", namespace="kafka_internal", replication=3, timeout_s=10)
 
+        timings.phase("warmup")
         logger.info(f"warming up for 20s")
         sleep(20)
 
+        timings.phase("leader_placement")
         internal_nodes = self.redpanda_cluster.nodes[0:3]
         data_nodes = self.redpanda_cluster.nodes[3:]
 
@@ -149,7 +155,8 @@ class TxStreamingSingleFault(AbstractSingleFault):
         self._transfer(data_nodes[1], self.target, partition=0, namespace="kafka", timeout_s=10)
 
         self.workload_cluster.wait_progress(timeout_s=wait_progress_timeout_s)
+        timings.phase("warmup")
         warmup_s = self.read_config(["settings", "setup", "warmup_s"], 20)
         if warmup_s > 0:
             logger.info(f"warming up for {warmup_s}s")
-            sleep(warmup_s)
\ No newline at end of file
+            self.measure_phase("warmup", warmup_s)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import sh
+import os
+import threading
+
+import logging
+logger = logging.getLogger("chaos")
+
+# SshPool keeps one authenticated connection per host (openssh's
+# ControlMaster) and runs the control scripts as sessions multiplexed over
+# it so a call costs a round trip instead of a tcp+ssh handshake. the first
+# call to a host opens the master under a per host lock, the master outlives
+# the call for `persist_s` of idleness. it's a drop-in replacement of sh's
+# ssh: ssh("ubuntu@" + ip, script, *args)
+
+class SshPool:
+    def __init__(self, control_dir="/tmp/chaos.ssh", persist_s=600):
+        self.control_dir = control_dir
+        self.persist_s = persist_s
+        self.lock = threading.Lock()
+        self.host_locks = dict()
+        self.opened = set()
+
+    def options(self):
+        return [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={self.control_dir}/%C",
+            "-o", f"ControlPersist={self.persist_s}"]
+
+    def host_lock(self, host):
+        with self.lock:
+            if host not in self.host_locks:
+                self.host_locks[host] = threading.Lock()
+            return self.host_locks[host]
+
+    def is_open(self, host):
+        try:
+            sh.ssh(*self.options(), "-O", "check", host)
+            return True
+        except sh.ErrorReturnCode:
+            return False
+
+    def open(self, host):
+        if host in self.opened:
+            return
+        with self.host_lock(host):
+            if host in self.opened:
+                return
+            os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+            if not self.is_open(host):
+                logger.debug(f"opening ssh master connection to {host}")
+                sh.ssh(*self.options(), host, "true")
+            self.opened.add(host)
+
+    def __call__(self, host, *args, **kwargs):
+        self.open(host)
+        return sh.ssh(*self.options(), host, *args, **kwargs)
+
+    def close(self, host):
+        with self.host_lock(host):
+            self.opened.discard(host)
+            if self.is_open(host):
+                sh.ssh(*self.options(), "-O", "exit", host)
+
+    def close_all(self):
+        for host in list(self.opened):
+            self.close(host)
+
+ssh = SshPool()
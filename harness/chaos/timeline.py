@@ -0,0 +1,62 @@
+import os
+import re
+import sys
+import glob
+import calendar
+import traceback
+from datetime import datetime
+from chaos import clock
+
+import logging
+logger = logging.getLogger("chaos")
+
+# timeline.log of an experiment: the measure events, the fault's control
+# actions and the redpanda warnings & errors on the control node's clock
+# (see chaos/clock.py) so they can be correlated with each other and with
+# the stat's plots: a line is "<ms since measure>\t<node>\t<event>". the
+# redpanda log's timestamps are the node's local time which is UTC on the
+# chaos nodes
+
+REDPANDA_LINE = re.compile(r"^(WARN|ERROR)\s+(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) (.*)$")
+
+def redpanda_events(config, redpanda_dir):
+    events = []
+    for node_dir in glob.glob(os.path.join(redpanda_dir, "*")):
+        ip = os.path.basename(node_dir)
+        for path in sorted(glob.glob(os.path.join(node_dir, "log.*"))):
+            with open(path, "r", errors="replace") as log_file:
+                for line in log_file:
+                    match = REDPANDA_LINE.match(line)
+                    if match == None:
+                        continue
+                    ts = datetime.strptime(match.group(2), "%Y-%m-%d %H:%M:%S")
+                    node_us = (calendar.timegm(ts.timetuple()) * 1000 + int(match.group(3))) * 1000
+                    control_us = clock.to_control_us(config["clock"], ip, node_us)
+                    if control_us == None:
+                        continue
+                    events.append((control_us, ip, f"{match.group(1)} {match.group(4)}"))
+    return events
+
+def write(config, experiment_dir):
+    try:
+        events = []
+        for ip, control_us in config["clock"].get("measure_us", dict()).items():
+            events.append((control_us, ip, "measure"))
+        for window in config.get("fault_actions", []):
+            for action in window["actions"]:
+                control_us = clock.to_control_us(config["clock"], action["ip"], action["effective_us"])
+                if control_us != None:
+                    events.append((control_us, action["ip"], f"{window['kind']}: {action['name']}"))
+        events.extend(redpanda_events(config, os.path.join(experiment_dir, "redpanda")))
+        if len(events) == 0:
+            return
+        events.sort(key=lambda event: event[0])
+        origin_us = min(config["clock"].get("measure_us", dict()).values(), default=events[0][0])
+        with open(os.path.join(experiment_dir, "timeline.log"), "w") as timeline_file:
+            for control_us, ip, event in events:
+                timeline_file.write(f"{(control_us - origin_us) / 1000:.3f}\t{ip}\t{event}\n")
+    except:
+        e, v = sys.exc_info()[:2]
+        trace = traceback.format_exc()
+        logger.error(f"can't write the timeline: {v}")
+        logger.debug(trace)
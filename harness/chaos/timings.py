@@ -0,0 +1,57 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# wall clock spans of an experiment's phases saved to info.json as
+# "timings": phase -> seconds (build_report sums them over the suite to
+# show where the time goes). phase(name) ends the current top level phase
+# and starts the next one so the phases of a scenario cover it end to end,
+# span(name) measures a part of a phase e.g. "analysis/consistency"
+
+class Timings:
+    def __init__(self):
+        self.lock = Lock()
+        self.phases = dict()
+        self.current = None
+        self.current_begin = None
+
+    def reset(self):
+        with self.lock:
+            self.phases = dict()
+            self.current = None
+            self.current_begin = None
+
+    def record(self, phase, duration_s):
+        with self.lock:
+            if phase not in self.phases:
+                self.phases[phase] = 0
+            self.phases[phase] += duration_s
+
+    def phase(self, name):
+        now = time.time()
+        if self.current != None:
+            self.record(self.current, now - self.current_begin)
+        self.current = name
+        self.current_begin = now
+
+    @contextmanager
+    def span(self, name):
+        begin = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, time.time() - begin)
+
+    def as_dict(self):
+        with self.lock:
+            result = dict()
+            for phase in self.phases:
+                result[phase] = round(self.phases[phase], 3)
+            if self.current != None:
+                # the phase which is in progress when the config is saved
+                if self.current not in result:
+                    result[self.current] = 0
+                result[self.current] = round(result[self.current] + time.time() - self.current_begin, 3)
+            return result
+
+timings = Timings()
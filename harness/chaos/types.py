@@ -1,2 +1,9 @@
 class TimeoutException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class ViolationException(Exception):
+    pass
+class NodesException(Exception):
+    def __init__(self, message, errors):
+        super().__init__(message)
+        self.errors = errors
@@ -0,0 +1,97 @@
+import math
+import time
+from time import sleep
+from threading import Lock
+from chaos.types import TimeoutException
+
+import logging
+logger = logging.getLogger("chaos")
+
+# common wait primitive: instead of checking a condition once a second the
+# waits poll with an exponential backoff starting at a few ms so a wait
+# ends almost as soon as the condition holds. every finished wait is
+# accounted in `stats` under its phase with the time it took and the time
+# saved compared to the old way of waiting: a fixed sleep (baseline_s) or
+# a once a second poll (the wait rounded up to a second)
+
+class Backoff:
+    def __init__(self, initial_s=0.005, max_s=0.25, factor=2):
+        self.delay_s = initial_s
+        self.max_s = max_s
+        self.factor = factor
+
+    def sleep(self):
+        sleep(self.delay_s)
+        self.delay_s = min(self.delay_s * self.factor, self.max_s)
+
+class WaitStats:
+    def __init__(self):
+        self.lock = Lock()
+        self.phases = dict()
+
+    def reset(self):
+        with self.lock:
+            self.phases = dict()
+
+    def record(self, phase, waited_s, baseline_s):
+        with self.lock:
+            if phase not in self.phases:
+                self.phases[phase] = {
+                    "count": 0,
+                    "waited_s": 0,
+                    "saved_s": 0
+                }
+            self.phases[phase]["count"] += 1
+            self.phases[phase]["waited_s"] += waited_s
+            self.phases[phase]["saved_s"] += max(0, baseline_s - waited_s)
+
+    def as_dict(self):
+        with self.lock:
+            result = dict()
+            for phase in self.phases:
+                result[phase] = {
+                    "count": self.phases[phase]["count"],
+                    "waited_s": round(self.phases[phase]["waited_s"], 3),
+                    "saved_s": round(self.phases[phase]["saved_s"], 3)
+                }
+            return result
+
+stats = WaitStats()
+
+class Wait:
+    def __init__(self, phase, timeout_s, message, begin=None, baseline_s=None):
+        self.phase = phase
+        self.timeout_s = timeout_s
+        self.message = message
+        self.begin = time.time() if begin == None else begin
+        self.baseline_s = baseline_s
+        self.backoff = Backoff()
+
+    def check(self):
+        if time.time() - self.begin > self.timeout_s:
+            raise TimeoutException(self.message)
+
+    def sleep(self):
+        self.backoff.sleep()
+
+    def done(self):
+        waited_s = time.time() - self.begin
+        baseline_s = self.baseline_s
+        if baseline_s == None:
+            baseline_s = math.ceil(waited_s)
+        stats.record(self.phase, waited_s, baseline_s)
+
+# polls condition() until it returns a truthy value and returns the value,
+# raises TimeoutException(message) when it doesn't happen within timeout_s
+# (counting from begin when it's given e.g. a deadline shared by nodes).
+# a wait without a phase isn't accounted: a part of a bigger wait
+def wait_until(phase, condition, timeout_s, message, begin=None, baseline_s=None):
+    wait = Wait(phase, timeout_s, message, begin=begin, baseline_s=baseline_s)
+    while True:
+        wait.check()
+        result = condition()
+        if result:
+            if phase != None:
+                wait.done()
+            return result
+        wait.sleep()
@@ -11,81 +11,81 @@ logger = logging.getLogger("chaos")
 
 def kafka_clients_workload(nodes_path):
     writing_java = writes.Control()
-    writing_java.launch = "/mnt/vectorized/control/writes.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/writes.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/writes.java.stop.sh"
+    writing_java.launch = "writes.java.start"
+    writing_java.alive = "writes.java.alive"
+    writing_java.kill = "writes.java.stop"
     writing_java.name = "writes / java"
     return writes.Workload(writing_java, nodes_path)
 
 def tx_writes_workload(nodes_path):
     writing_java = writes.Control()
-    writing_java.launch = "/mnt/vectorized/control/tx-writes.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/tx-writes.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/tx-writes.java.stop.sh"
+    writing_java.launch = "tx-writes.java.start"
+    writing_java.alive = "tx-writes.java.alive"
+    writing_java.kill = "tx-writes.java.stop"
     writing_java.name = "tx-writes / java"
     return writes.Workload(writing_java, nodes_path)
 
 def concurrency_workload(nodes_path):
     writing_java = writes.Control()
-    writing_java.launch = "/mnt/vectorized/control/concurrency.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/concurrency.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/concurrency.java.stop.sh"
+    writing_java.launch = "concurrency.java.start"
+    writing_java.alive = "concurrency.java.alive"
+    writing_java.kill = "concurrency.java.stop"
     writing_java.name = "writes / concurrency"
     return writes.Workload(writing_java, nodes_path)
 
 def confluent_kafka_workload(nodes_path):
     writing_python = writes.Control()
-    writing_python.launch = "/mnt/vectorized/control/writes.python.start.sh"
-    writing_python.alive = "/mnt/vectorized/control/writes.python.alive.sh"
-    writing_python.kill = "/mnt/vectorized/control/writes.python.stop.sh"
+    writing_python.launch = "writes.python.start"
+    writing_python.alive = "writes.python.alive"
+    writing_python.kill = "writes.python.stop"
     writing_python.name = "writes / python"
     return writes.Workload(writing_python, nodes_path)
 
 def list_offsets_workload(nodes_path):
     writing_java = writes.Control()
-    writing_java.launch = "/mnt/vectorized/control/list-offsets.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/list-offsets.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/list-offsets.java.stop.sh"
+    writing_java.launch = "list-offsets.java.start"
+    writing_java.alive = "list-offsets.java.alive"
+    writing_java.kill = "list-offsets.java.stop"
     writing_java.name = "list-offsets / java"
     return writes.Workload(writing_java, nodes_path)
 
 def reads_writes_workload(nodes_path):
     control = reads_writes.Control()
-    control.launch = "/mnt/vectorized/control/reads-writes.java.start.sh"
-    control.alive = "/mnt/vectorized/control/reads-writes.java.alive.sh"
-    control.kill = "/mnt/vectorized/control/reads-writes.java.stop.sh"
+    control.launch = "reads-writes.java.start"
+    control.alive = "reads-writes.java.alive"
+    control.kill = "reads-writes.java.stop"
     control.name = "reads-writes / java"
     return reads_writes.Workload(control, nodes_path)
 
 def tx_single_reads_writes_workload(nodes_path):
     writing_java = tx_single_reads_writes.Control()
-    writing_java.launch = "/mnt/vectorized/control/tx-single-reads-writes.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/tx-single-reads-writes.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/tx-single-reads-writes.java.stop.sh"
+    writing_java.launch = "tx-single-reads-writes.java.start"
+    writing_java.alive = "tx-single-reads-writes.java.alive"
+    writing_java.kill = "tx-single-reads-writes.java.stop"
     writing_java.name = "tx-single-reads-writes / java"
     return tx_single_reads_writes.Workload(writing_java, nodes_path)
 
 def tx_money_workload(nodes_path):
     writing_java = tx_money.Control()
-    writing_java.launch = "/mnt/vectorized/control/tx-money.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/tx-money.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/tx-money.java.stop.sh"
+    writing_java.launch = "tx-money.java.start"
+    writing_java.alive = "tx-money.java.alive"
+    writing_java.kill = "tx-money.java.stop"
     writing_java.name = "tx-money / java"
     return tx_money.Workload(writing_java, nodes_path)
 
 def tx_streaming_workload(nodes_path):
     writing_java = tx_streaming.Control()
-    writing_java.launch = "/mnt/vectorized/control/tx-streaming.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/tx-streaming.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/tx-streaming.java.stop.sh"
+    writing_java.launch = "tx-streaming.java.start"
+    writing_java.alive = "tx-streaming.java.alive"
+    writing_java.kill = "tx-streaming.java.stop"
     writing_java.name = "tx-streaming / java"
     return tx_streaming.Workload(writing_java, nodes_path)
 
 def tx_subscribe_workload(nodes_path):
     writing_java = tx_subscribe.Control()
-    writing_java.launch = "/mnt/vectorized/control/tx-subscribe.java.start.sh"
-    writing_java.alive = "/mnt/vectorized/control/tx-subscribe.java.alive.sh"
-    writing_java.kill = "/mnt/vectorized/control/tx-subscribe.java.stop.sh"
+    writing_java.launch = "tx-subscribe.java.start"
+    writing_java.alive = "tx-subscribe.java.alive"
+    writing_java.kill = "tx-subscribe.java.stop"
     writing_java.name = "tx-subscribe / java"
     return tx_subscribe.Workload(writing_java, nodes_path)
 
@@ -0,0 +1,33 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+# http client of the workload apps' control api (/init, /start, /info,
+# /event/...) shared by the workload classes: keeps alive a pool of
+# connections per node instead of opening a connection per call and every
+# call has a timeout
+
+class WorkloadClient:
+    def __init__(self, port=8080, timeout_s=10, pool_size=16):
+        self.port = port
+        self.timeout_s = timeout_s
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+
+    # with stream the body is read by the caller (iter_content) which
+    # closes the response
+    def request(self, method, ip, path, json=None, timeout_s=None, stream=False):
+        if timeout_s == None:
+            timeout_s = self.timeout_s
+        r = self.session.request(method, f"http://{ip}:{self.port}{path}", json=json, timeout=timeout_s, stream=stream)
+        if r.status_code != 200:
+            r.close()
+            raise Exception(f"unexpected status code: {r.status_code}")
+        return r
+
+    def get(self, ip, path, timeout_s=None, stream=False):
+        return self.request("GET", ip, path, timeout_s=timeout_s, stream=stream)
+
+    def post(self, ip, path, json=None, timeout_s=None):
+        return self.request("POST", ip, path, json=json, timeout_s=timeout_s)
+
+client = WorkloadClient()
@@ -0,0 +1,74 @@
+from sh import mkdir
+from chaos.workloads.client import client
+import os
+import sys
+import traceback
+import threading
+
+import logging
+logger = logging.getLogger("chaos")
+
+# WorkloadLogTail pulls the appended part of workload.log from every client
+# node while an experiment is running via the workload app's resumable
+# /log?from=<byte> stream so when the experiment is over the log is already
+# local except its tail. with follow it also lets the workload advance its
+# log players (see LogReplay.follow) so only the rest of the log and the
+# final checks (reread_and_check) are left. `violation` is set as soon as
+# a consistency player has seen a violation
+
+class WorkloadLogTail:
+    def __init__(self, workload_cluster, config, follow=False, period_s=5, timeout_s=60, chunk_size=1024*1024):
+        self.workload_cluster = workload_cluster
+        self.config = config
+        self.is_following = follow
+        self.period_s = period_s
+        self.timeout_s = timeout_s
+        self.chunk_size = chunk_size
+        self.offsets = dict()
+        self.stopped = threading.Event()
+        self.violation = threading.Event()
+        self.thread = None
+
+    def local_path(self, node):
+        return f"/mnt/vectorized/experiments/{self.config['experiment_id']}/{node.ip}/workload.log"
+
+    def start(self):
+        for node in self.workload_cluster.nodes:
+            mkdir("-p", os.path.dirname(self.local_path(node)))
+            open(self.local_path(node), "wb").close()
+            self.offsets[node.ip] = 0
+        if self.is_following:
+            self.workload_cluster.prepare_analysis(self.config)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.wait(self.period_s):
+            for node in self.workload_cluster.nodes:
+                try:
+                    self.pull(node)
+                    if self.is_following:
+                        self.workload_cluster.follow(self.config, node)
+                        if self.workload_cluster.has_violation():
+                            self.violation.set()
+                except:
+                    e, v = sys.exc_info()[:2]
+                    trace = traceback.format_exc()
+                    logger.debug(v)
+                    logger.debug(trace)
+
+    # the stream is written as it arrives and the offset advances by the
+    # written bytes so a broken pull resumes where it stopped
+    def pull(self, node):
+        with client.get(node.ip, f"/log?from={self.offsets[node.ip]}", timeout_s=self.timeout_s, stream=True) as r:
+            with open(self.local_path(node), "ab") as workload_log:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    workload_log.write(chunk)
+                    self.offsets[node.ip] += len(chunk)
+
+    def stop(self):
+        if self.thread == None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
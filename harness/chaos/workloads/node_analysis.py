@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import pickle
+from chaos.control_agent import agent
+from chaos.fanout import fanout
+from chaos import log_fetch
+from chaos.wait import wait_until
+
+import logging
+logger = logging.getLogger("chaos")
+
+# node side analysis (settings.node_analysis): instead of copying a multi GB
+# workload.log to the control node and replaying it there serially each
+# client node replays its own log with the workload's log players
+# (analyze_node.py) in parallel with the other nodes. the fed players (ok /
+# err writes index, latency histories and histograms) are pickled next to
+# the log and only they are fetched back; the control node merges them and
+# does the rest of the checks (e.g. reread_and_check against redpanda) as
+# if it replayed the logs itself. the replay is started detached with the
+# analysis.start control action and polled with analysis.status until it
+# finishes (see control/agent.py). a workload whose players share state
+# across nodes (e.g. tx-subscribe's ReadChecker) can't be split so it opts
+# out with SUPPORTS_NODE_ANALYSIS = False
+
+LOGS = "/mnt/vectorized/workloads/logs"
+EXPERIMENTS = "/mnt/vectorized/experiments"
+
+def is_enabled(config, workload_cluster):
+    if not workload_cluster.SUPPORTS_NODE_ANALYSIS:
+        return False
+    if "settings" not in config:
+        return False
+    return config["settings"].get("node_analysis", False)
+
+# a replay which was played on the node: play() has nothing left to feed
+# and check(player) raises the error the player failed with on the node
+class PlayedReplay:
+    def __init__(self, errors):
+        self.errors = errors
+
+    def subscribe(self, player):
+        raise Exception("can't subscribe to a replay played on the node")
+
+    def follow(self):
+        pass
+
+    def play(self):
+        pass
+
+    def check(self, player):
+        if player in self.errors:
+            raise self.errors[player]
+
+# control node side: fills the workload's replays and players with the
+# ones played on the nodes
+def replay(workload_cluster, config, timeout_s=3600):
+    experiment_id = config["experiment_id"]
+    payload = json.dumps(config)
+    def analyze(node):
+        logger.info(f"analyzing workload.log on {node.ip}")
+        agent.run(node.ip, "analysis.start", experiment_id, node.ip, payload)
+        def is_done():
+            status = agent.run(node.ip, "analysis.status", experiment_id, node.ip)
+            if status == "RUNNING":
+                return False
+            return json.loads(status)
+        return wait_until("workload.analyze", is_done, timeout_s,
+            f"analysis of workload.log on {node.ip} hasn't finished within {timeout_s} sec")
+    summaries = fanout(workload_cluster.nodes, analyze)
+    for ip in summaries:
+        logger.debug(f"{ip} replayed {summaries[ip]['log_bytes']} bytes of workload.log in {summaries[ip]['seconds']}s")
+    def files(node):
+        local_dir = f"{EXPERIMENTS}/{experiment_id}/{node.ip}"
+        result = [(f"{LOGS}/{experiment_id}/{node.ip}/analysis.pickle", local_dir)]
+        if summaries[node.ip]["has_violation"] or summaries[node.ip]["errors"] > 0:
+            result.append((f"{LOGS}/{experiment_id}/{node.ip}/consistency.log", local_dir))
+        return result
+    log_fetch.fetch("analysis", workload_cluster.nodes, files)
+    for node in workload_cluster.nodes:
+        local_dir = f"{EXPERIMENTS}/{experiment_id}/{node.ip}"
+        with open(os.path.join(local_dir, "analysis.pickle"), "rb") as analysis_file:
+            analysis = pickle.load(analysis_file)
+        os.remove(os.path.join(local_dir, "analysis.pickle"))
+        workload_cluster.replays[node.ip] = PlayedReplay(analysis["errors"])
+        if analysis["consistency"] != None:
+            workload_cluster.consistency_players[node.ip] = analysis["consistency"]
+        if analysis["stat"] != None:
+            workload_cluster.stat_players[node.ip] = analysis["stat"]
+
+# client node side: replays the node's workload.log and pickles the players
+def analyze_node(workload_cluster, config, ip):
+    begin = time.time()
+    node_dir = f"{LOGS}/{config['experiment_id']}/{ip}"
+    workload_cluster.prepare_analysis(config, root=LOGS)
+    player_logger = logging.getLogger("consistency")
+    player_logger.setLevel(logging.DEBUG)
+    handler_path = os.path.join(node_dir, "consistency.log")
+    handler = logging.FileHandler(handler_path)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    player_logger.addHandler(handler)
+    try:
+        workload_cluster.replays[ip].play()
+    finally:
+        handler.flush()
+        handler.close()
+        player_logger.removeHandler(handler)
+    consistency = workload_cluster.consistency_players.get(ip, None)
+    stat = workload_cluster.stat_players.get(ip, None)
+    errors = dict()
+    for player, e in workload_cluster.replays[ip].errors.items():
+        # the original exception may not survive pickling
+        errors[player] = Exception(f"{type(e).__name__}: {e}")
+    has_violation = consistency != None and consistency.has_violation
+    if not has_violation and len(errors) == 0:
+        os.remove(handler_path)
+    with open(os.path.join(node_dir, "analysis.pickle"), "wb") as analysis_file:
+        pickle.dump({
+            "consistency": consistency,
+            "stat": stat,
+            "errors": errors
+        }, analysis_file)
+    return {
+        "log_bytes": os.path.getsize(os.path.join(node_dir, "workload.log")),
+        "has_violation": has_violation,
+        "errors": len(errors),
+        "seconds": round(time.time() - begin, 3)
+    }
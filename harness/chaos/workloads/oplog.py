@@ -0,0 +1,187 @@
+import mmap
+import os
+import struct
+
+# workload.log comes in two flavours:
+#
+#   text:   <thread_id>\t<delta_us>\t<cmd>[\t<arg>]*\n
+#
+#   binary: MAGIC followed by records; each record is a fixed 16 bytes
+#           header (int32 thread_id, uint8 cmd, uint8 argc, uint16 strmask,
+#           int64 delta_us) followed by argc int64 args. when i-th bit of
+#           strmask is set the i-th arg is an id of an interned string.
+#           cmd names and strings are defined inline (DEFINE_CMD and
+#           DEFINE_STRING records) before their first use: the header's
+#           thread_id holds the id, delta_us holds the length of the utf-8
+#           payload which follows the header padded to 8 bytes
+#
+# both readers yield (thread_id, delta_us, cmd, payload) where cmd is a
+# value of the workload's log_utils.cmds and payload is a sequence of the
+# args; a trailing incomplete record / line is skipped because a workload
+# may be killed in the middle of a write. a reader remembers where it has
+# stopped so iterating it again yields only the records appended since
+# (it's how a log which is still being fetched is followed)
+
+MAGIC = b"CHAOSOP\x01"
+HEADER = struct.Struct("<iBBHq")
+DEFINE_CMD = 0xFE
+DEFINE_STRING = 0xFF
+
+class TextLogReader:
+    def __init__(self, path, cmds):
+        self.path = path
+        self.cmds = cmds
+        self.pos = 0
+
+    def __iter__(self):
+        cmds = self.cmds
+        with open(self.path, "rb") as workload_file:
+            workload_file.seek(self.pos)
+            for line in workload_file:
+                if not line.endswith(b"\n"):
+                    break
+                self.pos += len(line)
+                parts = line.decode("utf-8").rstrip().split('\t')
+                if parts[2] not in cmds:
+                    raise Exception(f"unknown cmd \"{parts[2]}\"")
+                yield (int(parts[0]), int(parts[1]), cmds[parts[2]], parts[3:])
+
+class BinaryLogReader:
+    def __init__(self, path, cmds):
+        self.path = path
+        self.cmds = cmds
+        self.pos = 0
+        self.codes = dict()
+        self.strings = []
+        self.args = dict()
+
+    def __iter__(self):
+        with open(self.path, "rb") as workload_file:
+            size = os.fstat(workload_file.fileno()).st_size
+            if size <= max(self.pos, len(MAGIC)):
+                return
+            with mmap.mmap(workload_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if self.pos == 0:
+                    if data[0:len(MAGIC)] != MAGIC:
+                        raise Exception(f"{self.path} isn't a binary op log")
+                    self.pos = len(MAGIC)
+                yield from self.decode(data, size)
+
+    def decode(self, data, size):
+        codes = self.codes
+        strings = self.strings
+        args = self.args
+        unpack_header = HEADER.unpack_from
+        header_size = HEADER.size
+        pos = self.pos
+        while pos + header_size <= size:
+            thread_id, cmd, argc, strmask, delta_us = unpack_header(data, pos)
+            pos += header_size
+            if cmd == DEFINE_CMD or cmd == DEFINE_STRING:
+                if pos + delta_us > size:
+                    break
+                value = data[pos:pos+delta_us].decode("utf-8")
+                pos += (delta_us + 7) & ~7
+                if cmd == DEFINE_STRING:
+                    if thread_id != len(strings):
+                        raise Exception(f"expected string #{len(strings)} got #{thread_id}")
+                    strings.append(value)
+                else:
+                    if value not in self.cmds:
+                        raise Exception(f"unknown cmd \"{value}\"")
+                    codes[thread_id] = self.cmds[value]
+                self.pos = pos
+                continue
+            if cmd not in codes:
+                raise Exception(f"unknown cmd code {cmd}")
+            end = pos + 8*argc
+            if end > size:
+                break
+            if argc == 0:
+                payload = ()
+            else:
+                if argc not in args:
+                    args[argc] = struct.Struct(f"<{argc}q")
+                payload = args[argc].unpack_from(data, pos)
+                if strmask != 0:
+                    payload = tuple(strings[value] if strmask & (1 << i) else value for i, value in enumerate(payload))
+            pos = end
+            self.pos = pos
+            yield (thread_id, delta_us, codes[cmd], payload)
+
+def is_binary(path):
+    with open(path, "rb") as workload_file:
+        return workload_file.read(len(MAGIC)) == MAGIC
+
+def read_log(path, cmds):
+    if is_binary(path):
+        return BinaryLogReader(path, cmds)
+    return TextLogReader(path, cmds)
+
+# LogReplay decodes workload.log once and feeds every record to all the
+# subscribed players (objects with apply(thread_id, delta_us, cmd, payload))
+# so consistency, stat and any other check share a single pass. an exception
+# thrown by a player is remembered and unsubscribes only that player, the
+# owner of the player gets it back via check(player).
+#
+# follow() may be called while workload.log is still being fetched: it
+# feeds the records appended since the previous call to the players
+# subscribed before the first follow(); play() feeds them the rest of the
+# log. players subscribed after the first follow() / play() are fed by the
+# next play() with a pass from the beginning
+
+class LogReplay:
+    def __init__(self, path, cmds):
+        self.path = path
+        self.cmds = cmds
+        self.pending = []
+        self.followers = []
+        self.reader = None
+        self.errors = dict()
+
+    def subscribe(self, player):
+        self.pending.append(player)
+
+    def follow(self):
+        if self.reader == None:
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < len(MAGIC):
+                return
+            self.reader = read_log(self.path, self.cmds)
+            self.followers = self.pending
+            self.pending = []
+        self.followers = self.feed(self.followers, self.reader)
+
+    def play(self):
+        self.follow()
+        players = self.pending
+        self.pending = []
+        if len(players) == 0:
+            return
+        self.feed(players, read_log(self.path, self.cmds))
+
+    def feed(self, players, reader):
+        if len(players) == 0:
+            return players
+        try:
+            for thread_id, delta_us, cmd, payload in reader:
+                failed = False
+                for player in players:
+                    try:
+                        player.apply(thread_id, delta_us, cmd, payload)
+                    except Exception as e:
+                        self.errors[player] = e
+                        failed = True
+                if failed:
+                    players = [player for player in players if player not in self.errors]
+                    if len(players) == 0:
+                        break
+        except Exception as e:
+            for player in players:
+                if player not in self.errors:
+                    self.errors[player] = e
+            players = []
+        return players
+
+    def check(self, player):
+        if player in self.errors:
+            raise self.errors[player]
@@ -0,0 +1,215 @@
+from array import array
+import numpy as np
+from chaos import clock
+
+# vectorized backend shared by the stat modules: the log players append
+# samples into array('q') columns (no per sample python lists) and the
+# reports (percentiles, min/max, throughput, unavailability) are computed
+# with numpy once the log is replayed
+
+class History:
+    def __init__(self):
+        self.ts = array("q")
+        self.values = array("q")
+        self.tags = array("q")
+
+    def append(self, ts_ms, value, tag=0):
+        self.ts.append(ts_ms)
+        self.values.append(value)
+        self.tags.append(tag)
+
+    def extend(self, other):
+        self.ts.extend(other.ts)
+        self.values.extend(other.values)
+        self.tags.extend(other.tags)
+
+    def __len__(self):
+        return len(self.ts)
+
+    def ts_ms(self):
+        return as_numpy(self.ts)
+
+    def latencies(self):
+        return as_numpy(self.values)
+
+    def labels(self):
+        return as_numpy(self.tags)
+
+    def write(self, file):
+        write_columns(file, self.ts_ms(), self.latencies())
+
+# HDR histogram style latency recorder: values below 2*10^digits (rounded
+# up to a power of two) are counted exactly, bigger values share a bucket
+# with the values which have the same `digits` significant digits so the
+# memory is bounded by the magnitude of the max latency instead of the
+# number of samples and histograms of different nodes merge by adding
+# the counters
+class LatencyHistogram:
+    def __init__(self, digits=3):
+        self.digits = digits
+        self.sub_bucket_bits = (2 * 10**digits - 1).bit_length()
+        self.sub_bucket_half = 1 << (self.sub_bucket_bits - 1)
+        self.counts = array("q")
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def index(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return shift * self.sub_bucket_half + (value >> shift)
+
+    def lowest(self, index):
+        shift = max(0, index // self.sub_bucket_half - 1)
+        return (index - shift * self.sub_bucket_half) << shift
+
+    def highest(self, index):
+        shift = max(0, index // self.sub_bucket_half - 1)
+        return ((index - shift * self.sub_bucket_half + 1) << shift) - 1
+
+    def record(self, value):
+        if value < 0:
+            raise Exception(f"latency can't be negative: {value}")
+        i = self.index(value)
+        if i >= len(self.counts):
+            self.counts.extend(array("q", bytes(8 * (i + 1 - len(self.counts)))))
+        self.counts[i] += 1
+        self.total += 1
+        if self.min == None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        if self.digits != other.digits:
+            raise Exception(f"can't merge histograms with {self.digits} and {other.digits} significant digits")
+        if other.total == 0:
+            return
+        if len(other.counts) > len(self.counts):
+            self.counts.extend(array("q", bytes(8 * (len(other.counts) - len(self.counts)))))
+        counts = as_numpy(self.counts)
+        counts[0:len(other.counts)] += as_numpy(other.counts)
+        self.counts = array("q", counts.tobytes())
+        self.total += other.total
+        if self.min == None or other.min < self.min:
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def __len__(self):
+        return self.total
+
+    # the same rank as sorted(values)[int(q*len(values))], the value is
+    # the highest one of its bucket (but not above the max)
+    def value_at(self, q):
+        if self.total == 0:
+            raise Exception("can't get a percentile of an empty histogram")
+        rank = min(int(q*self.total), self.total - 1)
+        i = int(np.searchsorted(np.cumsum(as_numpy(self.counts)), rank, side="right"))
+        return min(self.highest(i), self.max)
+
+    def percentiles(self):
+        return {
+            "min": self.min,
+            "p50": self.value_at(0.5),
+            "p90": self.value_at(0.9),
+            "p99": self.value_at(0.99),
+            "p999": self.value_at(0.999),
+            "max": self.max
+        }
+
+    # cumulative distribution for percentiles.log: a point per non empty
+    # bucket, the share of the values up to the bucket and its value
+    def write(self, file):
+        counts = as_numpy(self.counts)
+        buckets = np.flatnonzero(counts)
+        ranks = np.cumsum(counts[buckets]) / self.total
+        values = np.minimum(np.array([self.highest(int(i)) for i in buckets], dtype=np.int64), self.max)
+        np.savetxt(file, np.column_stack((ranks, values)), fmt=["%.6f", "%d"], delimiter="\t")
+
+def as_numpy(column):
+    if len(column) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.frombuffer(column, dtype=np.int64).copy()
+
+def write_columns(file, *columns):
+    np.savetxt(file, np.column_stack(columns), fmt="%d", delimiter="\t")
+
+# the same as sorted(values)[int(q*len(values))]
+def percentile(values, q):
+    k = int(q*len(values))
+    return int(np.partition(values, k)[k])
+
+# time between consecutive ok-s, the first one is measured from `since`
+# (from itself when since is None)
+def gaps(ts, since=None):
+    if len(ts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.diff(ts, prepend=ts[0] if since == None else since)
+
+def max_of(*columns):
+    result = 0
+    for column in columns:
+        if len(column) > 0:
+            result = max(result, int(column.max()))
+    return result
+
+# per second throughput with the same buckets as the old Throughput.tick:
+# an event at ts_ms goes to ((ts_ms-1)//1000)-th second and the last
+# (still open) second isn't reported. when tags are given also returns the
+# throughput of each of them over the same seconds
+def throughput(ts_ms, tags=None, ntags=0):
+    if len(ts_ms) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), dict()
+    buckets = np.maximum((ts_ms - 1) // 1000, 0)
+    total = np.bincount(buckets)
+    seconds = len(total) - 1
+    by_tag = dict()
+    for tag in range(0, ntags):
+        by_tag[tag] = np.bincount(buckets[tags == tag], minlength=seconds+1)[:seconds]
+    return (np.arange(1, seconds + 1, dtype=np.int64) * 1000), total[:seconds], by_tag
+
+# throughput of a log player ticking once per record: seconds are aligned
+# to origin_us (first record), a second is reported once a record after it
+# has been ticked while measuring i.e. when it ends in [since_us, till_us)
+# where since_us is the last tick before measuring and till_us is the last
+# tick; ts of a second is the time of its end relative to started_us in ms
+def windowed_throughput(ok_us, origin_us, started_us, since_us, till_us):
+    if origin_us == None or started_us == None or till_us == None:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    first = 0
+    if since_us != None:
+        first = max(0, -((origin_us - since_us) // 1000000) - 1)
+    end = -((origin_us - till_us) // 1000000) - 1
+    if end <= first:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    buckets = np.maximum((ok_us - origin_us - 1) // 1000000, 0)
+    counts = np.bincount(buckets, minlength=end)[first:end]
+    ends = origin_us + (np.arange(first, end, dtype=np.int64) + 1) * 1000000
+    return np.trunc((ends - started_us) / 1000).astype(np.int64), counts
+
+# the fault / heal markers (ms since the measure event) placed by when the
+# fault's control actions took effect on the nodes instead of by when the
+# workload got the injecting / healed events: the actions' node times are
+# corrected by the nodes' clock offsets and the measure event is placed at
+# the midpoint of its request (see chaos/clock.py). returns None when the
+# experiment has no such data so the events' markers are kept
+def fault_markers(config, ip):
+    if "clock" not in config or "fault_actions" not in config:
+        return None
+    measure_us = config["clock"].get("measure_us", dict()).get(ip, None)
+    if measure_us == None:
+        return None
+    markers = {
+        "fault": [],
+        "recovery": []
+    }
+    for window in config["fault_actions"]:
+        times = []
+        for action in window["actions"]:
+            control_us = clock.to_control_us(config["clock"], action["ip"], action["effective_us"])
+            if control_us != None:
+                times.append(int((control_us - measure_us) / 1000))
+        if len(times) > 0:
+            markers[window["kind"]].extend(sorted(set([min(times), max(times)])))
+    if len(markers["fault"]) + len(markers["recovery"]) == 0:
+        return None
+    return markers["fault"], markers["recovery"]
@@ -6,6 +6,7 @@ import traceback
 from confluent_kafka import Consumer, TopicPartition, OFFSET_BEGINNING
 from chaos.checks.result import Result
 from chaos.workloads.tx_single_reads_writes.log_utils import State, cmds, transitions, phantoms
+from chaos.workloads.oplog import LogReplay
 import logging
 import os
 
@@ -20,7 +21,62 @@ class Write:
         self.finished = None
         self.max_offset = None
 
-def validate(config, workload_dir):
+class LogPlayer:
+    def __init__(self, config):
+        self.config = config
+        self.last_state = dict()
+        self.has_violation = False
+
+    def apply(self, thread_id, delta_us, new_state, payload):
+        if thread_id not in self.last_state:
+            self.last_state[thread_id] = State.INIT
+
+        if new_state not in phantoms:
+            if new_state not in transitions[self.last_state[thread_id]]:
+                raise Exception(f"unknown transition {self.last_state[thread_id]} -> {new_state}")
+            self.last_state[thread_id] = new_state
+
+        if new_state == State.STARTED:
+            pass
+        elif new_state == State.CONSTRUCTING:
+            pass
+        elif new_state == State.CONSTRUCTED:
+            pass
+        elif new_state == State.TX:
+            pass
+        elif new_state == State.COMMIT or new_state == State.ABORT:
+            pass
+        elif new_state == State.SEEN:
+            pass
+        elif new_state == State.OK:
+            pass
+        elif new_state == State.ERROR:
+            pass
+        elif new_state == State.EVENT:
+            pass
+        elif new_state == State.LOG:
+            pass
+        elif new_state == State.VIOLATION:
+            msg = "\t".join(map(str, payload))
+            self.has_violation = True
+            logger.error(msg)
+        else:
+            raise Exception(f"unknown state: {new_state}")
+
+def follow(workload_dir, replay):
+    logger.setLevel(logging.DEBUG)
+    handler = logging.FileHandler(os.path.join(workload_dir, "consistency.log"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    logger.addHandler(handler)
+
+    try:
+        replay.follow()
+    finally:
+        handler.flush()
+        handler.close()
+        logger.removeHandler(handler)
+
+def validate(config, workload_dir, replay=None, player=None):
     logger.setLevel(logging.DEBUG)
     logger_handler_path = os.path.join(workload_dir, "consistency.log")
     handler = logging.FileHandler(logger_handler_path)
@@ -30,53 +86,14 @@ def validate(config, workload_dir):
     has_errors = True
     
     try:
-        last_state = dict()
-        has_violation = False
-
-        with open(os.path.join(workload_dir, "workload.log"), "r") as workload_file:
-            for line in workload_file:
-                parts = line.rstrip().split('\t')
-
-                thread_id = int(parts[0])
-                if thread_id not in last_state:
-                    last_state[thread_id] = State.INIT
-
-                if parts[2] not in cmds:
-                    raise Exception(f"unknown cmd \"{parts[2]}\"")
-                new_state = cmds[parts[2]]
-
-                if new_state not in phantoms:
-                    if new_state not in transitions[last_state[thread_id]]:
-                        raise Exception(f"unknown transition {last_state[thread_id]} -> {new_state}")
-                    last_state[thread_id] = new_state
-
-                if new_state == State.STARTED:
-                    pass
-                elif new_state == State.CONSTRUCTING:
-                    pass
-                elif new_state == State.CONSTRUCTED:
-                    pass
-                elif new_state == State.TX:
-                    pass
-                elif new_state == State.COMMIT or new_state == State.ABORT:
-                    pass
-                elif new_state == State.SEEN:
-                    pass
-                elif new_state == State.OK:
-                    pass
-                elif new_state == State.ERROR:
-                    pass
-                elif new_state == State.EVENT:
-                    pass
-                elif new_state == State.LOG:
-                    pass
-                elif new_state == State.VIOLATION:
-                    parts = line.rstrip().split('\t', 3)
-                    msg = parts[3]
-                    has_violation = True
-                    logger.error(msg)
-                else:
-                    raise Exception(f"unknown state: {new_state}")
+        if replay == None:
+            replay = LogReplay(os.path.join(workload_dir, "workload.log"), cmds)
+        if player == None:
+            player = LogPlayer(config)
+            replay.subscribe(player)
+        replay.play()
+        replay.check(player)
+        has_violation = player.has_violation
 
         has_errors = has_violation
 
@@ -4,8 +4,11 @@ import sys
 import traceback
 import json
 import os
+from array import array
 from chaos.checks.result import Result
 from chaos.workloads.tx_streaming.log_utils import State, cmds, transitions, phantoms
+from chaos.workloads.oplog import LogReplay
+from chaos.workloads.stat_utils import History, LatencyHistogram, max_of, windowed_throughput, write_columns, as_numpy, fault_markers
 import logging
 
 logger = logging.getLogger("stat")
@@ -101,12 +104,150 @@ plot 'throughput.log' using ($1/1000):2 title "throughput (1s)" with line lt rgb
 unset multiplot
 """
 
-class Throughput:
-    def __init__(self):
-        self.count = 0
-        self.time_us = 0
-
-def collect(config, workload_dir):
+class LogPlayer:
+    def __init__(self, config):
+        self.config = config
+        self.last_state = dict()
+        self.last_time = None
+
+        self.faults = []
+        self.recoveries = []
+
+        self.latency_ok_history = History()
+        self.latency_ok_histogram = LatencyHistogram()
+        self.latency_err_history = History()
+        self.latency_timeout_history = History()
+        self.latency_commit_history = History()
+        self.latency_commit_histogram = LatencyHistogram()
+        self.availability_history = History()
+        self.ok_us = array("q")
+        self.origin = None
+        self.last_tick = None
+        self.measure_tick = None
+
+        self.should_measure = False
+        self.started = None
+
+        self.last_ok = None
+        self.attempt_starts = {}
+        self.commit_starts = {}
+        self.is_end_commit = {}
+        self.is_writing = {}
+
+    def tick(self, now):
+        self.last_tick = now
+
+    def apply(self, thread_id, delta_us, new_state, payload):
+        if thread_id not in self.last_state:
+            self.last_state[thread_id] = State.INIT
+        if thread_id not in self.attempt_starts:
+            self.attempt_starts[thread_id] = None
+
+        if new_state not in phantoms:
+            if new_state not in transitions[self.last_state[thread_id]]:
+                raise Exception(f"unknown transition {self.last_state[thread_id]} -> {new_state}")
+            self.last_state[thread_id] = new_state
+
+        if new_state == State.STARTED:
+            ts_us = None
+            if self.last_time == None:
+                ts_us = delta_us
+                self.origin = ts_us
+            else:
+                ts_us = self.last_time + delta_us
+            self.last_time = ts_us
+        elif new_state == State.CONSTRUCTING:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            self.attempt_starts[thread_id] = self.last_time + delta_us
+            self.tick(self.attempt_starts[thread_id])
+            self.last_time = self.attempt_starts[thread_id]
+        elif new_state == State.CONSTRUCTED:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            end = self.last_time + delta_us
+            self.tick(end)
+            self.last_time = end
+        elif new_state == State.TX:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            self.attempt_starts[thread_id] = self.last_time + delta_us
+            self.tick(self.attempt_starts[thread_id])
+            self.last_time = self.attempt_starts[thread_id]
+        elif new_state == State.COMMIT or new_state == State.ABORT or new_state == State.WRITING:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            end = self.last_time + delta_us
+            self.tick(end)
+            self.last_time = end
+            if new_state == State.WRITING:
+                self.is_writing[thread_id] = True
+            if new_state == State.COMMIT:
+                self.commit_starts[thread_id] = self.last_time
+                self.is_end_commit[thread_id] = True
+            if new_state == State.ABORT:
+                self.is_end_commit[thread_id] = False
+        elif new_state == State.OK:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            end = self.last_time + delta_us
+            self.tick(end)
+            self.ok_us.append(end)
+            self.last_time = end
+            if self.last_ok == None:
+                self.last_ok = end
+            if self.should_measure and thread_id not in self.is_writing:
+                if self.is_end_commit[thread_id]:
+                    self.availability_history.append(int((end-self.started)/1000), end-self.last_ok)
+                    self.latency_ok_history.append(int((end-self.started)/1000), end-self.attempt_starts[thread_id])
+                    self.latency_ok_histogram.record(end-self.attempt_starts[thread_id])
+                    self.latency_commit_history.append(int((end-self.started)/1000), end-self.commit_starts[thread_id])
+                    self.latency_commit_histogram.record(end-self.commit_starts[thread_id])
+                    del self.commit_starts[thread_id]
+                else:
+                    self.latency_err_history.append(int((end-self.started)/1000), end-self.attempt_starts[thread_id])
+            self.last_ok = end
+            if thread_id not in self.is_writing:
+                del self.is_end_commit[thread_id]
+        elif new_state == State.ERROR:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            end = self.last_time + delta_us
+            self.tick(end)
+            self.last_time = end
+            if self.should_measure:
+                self.latency_err_history.append(int((end-self.started)/1000), end-self.attempt_starts[thread_id])
+            if thread_id in self.is_end_commit:
+                del self.is_end_commit[thread_id]
+        elif new_state == State.EVENT:
+            ts_us = None
+            if self.last_time == None:
+                ts_us = delta_us
+                self.origin = ts_us
+            else:
+                ts_us = self.last_time + delta_us
+            self.last_time = ts_us
+            name = payload[0]
+            if name == "measure" and not self.should_measure:
+                self.should_measure = True
+                self.measure_tick = self.last_tick
+                self.started = ts_us
+                self.last_ok = ts_us
+            if self.should_measure:
+                if name=="injecting" or name=="injected":
+                    self.faults.append(int((ts_us - self.started)/1000))
+                elif name=="healing" or name=="healed":
+                    self.recoveries.append(int((ts_us - self.started)/1000))
+        elif new_state == State.VIOLATION or new_state == State.LOG:
+            if self.last_time == None:
+                raise Exception(f"last_time can't be None when processing: {new_state}")
+            end = self.last_time + delta_us
+            self.tick(end)
+            self.last_time = end
+        else:
+            raise Exception(f"unknown state: {new_state}")
+
+def collect(config, workload_dir, replay=None, player=None):
     logger.setLevel(logging.DEBUG)
     logger_handler_path = os.path.join(workload_dir, "stat.log")
     handler = logging.FileHandler(logger_handler_path)
@@ -137,221 +278,48 @@ def collect(config, workload_dir):
         latency_commit = open(latency_commit_log_path, "w")
         throughput_log = open(throughput_log_path, "w")
         availability_log = open(availability_log_path, "w")
-
-        last_state = dict()
-        last_time = None
-
-        throughput = dict()
-
-        faults = []
-        recoveries = []
-        info = None
-
-        latency_ok_history = []
-        latency_err_history = []
-        latency_timeout_history = []
-        latency_commit_history = []
-        availability_history = []
-        throughput_history = []
-        throughput_bucket = None
-
-        should_measure = False
-        started = None
-
-        def tick(now, throughput_history):
-            while throughput_bucket.time_us + 1000000 < now:
-                if should_measure:
-                    ts = int((throughput_bucket.time_us-started+1000000)/1000)
-                    throughput_history.append([ts, throughput_bucket.count])
-                throughput_bucket.count = 0
-                throughput_bucket.time_us += 1000000
-
-        with open(workload_log_path, "r") as workload_file:
-            last_ok = None
-            attempt_starts = {}
-            commit_starts = {}
-            is_end_commit = {}
-            is_writing = {}
-
-            for line in workload_file:
-                parts = line.rstrip().split('\t')
-
-                thread_id = int(parts[0])
-                if thread_id not in last_state:
-                    last_state[thread_id] = State.INIT
-                if thread_id not in attempt_starts:
-                    attempt_starts[thread_id] = None
-
-                if parts[2] not in cmds:
-                    raise Exception(f"unknown cmd \"{parts[2]}\"")
-                new_state = cmds[parts[2]]
-
-                if new_state not in phantoms:
-                    if new_state not in transitions[last_state[thread_id]]:
-                        raise Exception(f"unknown transition {last_state[thread_id]} -> {new_state}")
-                    last_state[thread_id] = new_state
-
-                if new_state == State.STARTED:
-                    ts_us = None
-                    if last_time == None:
-                        ts_us = int(parts[1])
-                        throughput_bucket = Throughput()
-                        throughput_bucket.time_us = ts_us
-                    else:
-                        delta_us = int(parts[1])
-                        ts_us = last_time + delta_us
-                    last_time = ts_us
-                elif new_state == State.CONSTRUCTING:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    attempt_starts[thread_id] = last_time + delta_us
-                    tick(attempt_starts[thread_id], throughput_history)
-                    last_time = attempt_starts[thread_id]
-                elif new_state == State.CONSTRUCTED:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    end = last_time + delta_us
-                    tick(end, throughput_history)
-                    last_time = end
-                elif new_state == State.TX:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    attempt_starts[thread_id] = last_time + delta_us
-                    tick(attempt_starts[thread_id], throughput_history)
-                    last_time = attempt_starts[thread_id]
-                elif new_state == State.COMMIT or new_state == State.ABORT or new_state == State.WRITING:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    end = last_time + delta_us
-                    tick(end, throughput_history)
-                    last_time = end
-                    if new_state == State.WRITING:
-                        is_writing[thread_id] = True
-                    if new_state == State.COMMIT:
-                        commit_starts[thread_id] = last_time
-                        is_end_commit[thread_id] = True
-                    if new_state == State.ABORT:
-                        is_end_commit[thread_id] = False
-                elif new_state == State.OK:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    end = last_time + delta_us
-                    tick(end, throughput_history)
-                    throughput_bucket.count+=1
-                    last_time = end
-                    if last_ok == None:
-                        last_ok = end
-                    if should_measure and thread_id not in is_writing:
-                        if is_end_commit[thread_id]:
-                            availability_history.append([int((end-started)/1000), end-last_ok])
-                            latency_ok_history.append([int((end-started)/1000), end-attempt_starts[thread_id]])
-                            latency_commit_history.append([int((end-started)/1000), end-commit_starts[thread_id]])
-                            del commit_starts[thread_id]
-                        else:
-                            latency_err_history.append([int((end-started)/1000), end-attempt_starts[thread_id]])
-                    last_ok = end
-                    if thread_id not in is_writing:
-                        del is_end_commit[thread_id]
-                elif new_state == State.ERROR:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    end = last_time + delta_us
-                    tick(end, throughput_history)
-                    last_time = end
-                    if should_measure:
-                        latency_err_history.append([int((end-started)/1000), end-attempt_starts[thread_id]])
-                    if thread_id in is_end_commit:
-                        del is_end_commit[thread_id]
-                elif new_state == State.EVENT:
-                    ts_us = None
-                    if last_time == None:
-                        ts_us = int(parts[1])
-                        throughput_bucket = Throughput()
-                        throughput_bucket.time_us = ts_us
-                    else:
-                        delta_us = int(parts[1])
-                        ts_us = last_time + delta_us
-                    last_time = ts_us
-                    name = parts[3]
-                    if name == "measure" and not should_measure:
-                        should_measure = True
-                        started = ts_us
-                        last_ok = ts_us
-                    if should_measure:
-                        if name=="injecting" or name=="injected":
-                            faults.append(int((ts_us - started)/1000))
-                        elif name=="healing" or name=="healed":
-                            recoveries.append(int((ts_us - started)/1000))
-                elif new_state == State.VIOLATION or new_state == State.LOG:
-                    if last_time == None:
-                        raise Exception(f"last_time can't be None when processing: {new_state}")
-                    delta_us = int(parts[1])
-                    end = last_time + delta_us
-                    tick(end, throughput_history)
-                    last_time = end
-                else:
-                    raise Exception(f"unknown state: {new_state}")
-
-        duration_ms = 0
-        max_latency_us = 0
-        min_latency_us = None
-        max_throughput = 0
-        max_unavailability_us = 0
-        ops = len(latency_ok_history)
-
-        latencies = []
-        for [_, latency_us] in latency_ok_history:
-            latencies.append(latency_us)
-        latencies.sort()
-        p99  = latencies[int(0.99*len(latencies))]
-        for i in range(0,len(latencies)):
-            percentiles.write(f"{float(i) / len(latencies)}\t{latencies[i]}\n")
-
-        latencies = []
-        for [_, latency_us] in latency_commit_history:
-            latencies.append(latency_us)
-        latencies.sort()
-        commit_p99 = latencies[int(0.99*len(latencies))]
-        commit_min = latencies[0]
-        commit_max = latencies[-1]
-
-        for [ts_ms,latency_us] in latency_commit_history:
-            duration_ms = max(duration_ms, ts_ms)
-            latency_commit.write(f"{ts_ms}\t{latency_us}\n")
-
-        for [ts_ms,latency_us] in latency_ok_history:
-            duration_ms = max(duration_ms, ts_ms)
-            if min_latency_us == None:
-                min_latency_us = latency_us
-            min_latency_us = min(min_latency_us, latency_us)
-            max_latency_us = max(max_latency_us, latency_us)
-            latency_ok.write(f"{ts_ms}\t{latency_us}\n")
-
-        for [ts_ms,latency_us] in latency_err_history:
-            duration_ms = max(duration_ms, ts_ms)
-            max_latency_us = max(max_latency_us, latency_us)
-            latency_err.write(f"{ts_ms}\t{latency_us}\n")
-
-        for [ts_ms,latency_us] in latency_timeout_history:
-            duration_ms = max(duration_ms, ts_ms)
-            max_latency_us = max(max_latency_us, latency_us)
-            latency_timeout.write(f"{ts_ms}\t{latency_us}\n")
-
-        for [ts_ms,latency_us] in availability_history:
-            max_unavailability_us = max(max_unavailability_us, latency_us)
-            availability_log.write(f"{ts_ms}\t{latency_us}\n")
-
-        for [ts_ms, count] in throughput_history:
-            duration_ms = max(duration_ms, ts_ms)
-            max_throughput = max(max_throughput, count)
-            throughput_log.write(f"{ts_ms}\t{count}\n")
-
+        if replay == None:
+            replay = LogReplay(workload_log_path, cmds)
+        if player == None:
+            player = LogPlayer(config)
+            replay.subscribe(player)
+        replay.play()
+        replay.check(player)
+        markers = fault_markers(config, os.path.basename(workload_dir))
+        if markers != None:
+            player.faults, player.recoveries = markers
+
+        ok_ts = player.latency_ok_history.ts_ms()
+        commit_ts = player.latency_commit_history.ts_ms()
+        err_ts = player.latency_err_history.ts_ms()
+        err_latencies = player.latency_err_history.latencies()
+        timeout_ts = player.latency_timeout_history.ts_ms()
+        timeout_latencies = player.latency_timeout_history.latencies()
+        ops = len(player.latency_ok_histogram)
+
+        latency = player.latency_ok_histogram.percentiles()
+        latency["max"] = max(latency["max"], max_of(err_latencies, timeout_latencies))
+        p99 = latency["p99"]
+
+        commit_latency = player.latency_commit_histogram.percentiles()
+        commit_p99 = commit_latency["p99"]
+
+        max_unavailability_us = max_of(player.availability_history.latencies())
+
+        throughput_ts, throughput_counts = windowed_throughput(as_numpy(player.ok_us), player.origin, player.started, player.measure_tick, player.last_tick)
+        max_throughput = max_of(throughput_counts)
+
+        duration_ms = max_of(commit_ts, ok_ts, err_ts, timeout_ts, throughput_ts)
+
+        player.latency_ok_histogram.write(percentiles)
+        player.latency_commit_history.write(latency_commit)
+        player.latency_ok_history.write(latency_ok)
+        player.latency_err_history.write(latency_err)
+        player.latency_timeout_history.write(latency_timeout)
+        player.availability_history.write(availability_log)
+        write_columns(throughput_log, throughput_ts, throughput_counts)
+
+        percentiles.close()
         latency_ok.close()
         latency_err.close()
         latency_timeout.close()
@@ -368,8 +336,8 @@ def collect(config, workload_dir):
                     p99=p99,
                     commit_p99=commit_p99,
                     commit_boundary=int(commit_p99*1.2), 
-                    faults = faults,
-                    recoveries = recoveries,
+                    faults = player.faults,
+                    recoveries = player.recoveries,
                     throughput=int(max_throughput*1.2)))
 
         with open(availability_gnuplot_path, "w") as gnuplot_file:
@@ -391,16 +359,8 @@ def collect(config, workload_dir):
         return {
             "result": Result.PASSED,
             "latency_us": {
-                "tx": {
-                    "min": min_latency_us,
-                    "max": max_latency_us,
-                    "p99": p99
-                },
-                "commit": {
-                    "min": commit_min,
-                    "max": commit_max,
-                    "p99": commit_p99
-                }
+                "tx": latency,
+                "commit": commit_latency
             },
             "max_unavailability_us": max_unavailability_us,
             "throughput": {
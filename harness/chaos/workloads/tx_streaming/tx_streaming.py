@@ -1,19 +1,21 @@
-from sh import ssh
+from chaos.control_agent import agent
 from sh import cd
 from sh import mkdir
 from sh import python3
 import json
-import requests
+from chaos.workloads.client import client
 import os
 import sys
 import traceback
-import time
-from time import sleep
 from chaos.redpanda_static_cluster import RedpandaNode
-from chaos.types import TimeoutException
+from chaos.wait import Wait, wait_until
 from chaos.checks.result import Result
 from chaos.workloads.tx_streaming import consistency
 from chaos.workloads.tx_streaming import stat
+from chaos.workloads.tx_streaming.log_utils import cmds
+from chaos.workloads.oplog import LogReplay
+from chaos.timings import timings
+from chaos.workloads import node_analysis
 
 import logging
 logger = logging.getLogger("chaos")
@@ -33,10 +35,15 @@ class Control:
         self.name = None
 
 class Workload:
+    SUPPORTS_NODE_ANALYSIS = True
+
     def __init__(self, scripts, nodes_path):
         self.scripts = scripts
         self.nodes = []
         self.name = scripts.name
+        self.replays = dict()
+        self.consistency_players = dict()
+        self.stat_players = dict()
         with open(nodes_path, "r") as f:
             for line in f:
                 line = line.rstrip()
@@ -45,20 +52,20 @@ class Workload:
     
     def heal(self):
         for node in self.nodes:
-            ssh("ubuntu@" + node.ip, "/mnt/vectorized/control/network.heal.all.sh")
+            agent.run(node.ip, "network.heal.all")
     
     def is_alive(self, node):
         ip = node.ip
-        result = ssh("ubuntu@"+ip, self.scripts.alive)
+        result = agent.run(ip, self.scripts.alive)
         return "YES" in result
     
     def launch(self, node):
         ip = node.ip
-        ssh("ubuntu@"+ip, self.scripts.launch)
+        agent.run(ip, self.scripts.launch)
     
     def kill(self, node):
         ip = node.ip
-        ssh("ubuntu@"+ip, self.scripts.kill)
+        agent.run(ip, self.scripts.kill)
     
     def kill_everywhere(self):
         for node in self.nodes:
@@ -71,15 +78,11 @@ class Workload:
             self.stop(node)
     
     def wait_killed(self, timeout_s=10):
-        begin = time.time()
+        wait = Wait("workload.wait_killed", timeout_s, f"workload stuck and can't be killed in {timeout_s} sec")
         for node in self.nodes:
-            while True:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"workload stuck and can't be killed in {timeout_s} sec")
-                logger.debug(f"checking if workload process is alive {node.ip}")
-                if not self.is_alive(node):
-                    break
-                sleep(1)
+            logger.debug(f"checking if workload process is alive {node.ip}")
+            wait_until(None, lambda: not self.is_alive(node), timeout_s, wait.message, begin=wait.begin)
+        wait.done()
     
     def launch_everywhere(self):
         for node in self.nodes:
@@ -87,64 +90,54 @@ class Workload:
             self.launch(node)
 
     def wait_alive(self, timeout_s=10):
-        begin = time.time()
+        wait = Wait("workload.wait_alive", timeout_s, f"workload process isn't running within {timeout_s} sec")
         for node in self.nodes:
-            while True:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"workload process isn't running within {timeout_s} sec")
-                logger.debug(f"checking if workload process is running on {node.ip}")
-                if self.is_alive(node):
-                    break
-                sleep(1)
+            logger.debug(f"checking if workload process is running on {node.ip}")
+            wait_until(None, lambda: self.is_alive(node), timeout_s, wait.message, begin=wait.begin)
+        wait.done()
     
+    # replaces a fixed 5s sleep after the launch
     def wait_ready(self, timeout_s=10):
-        begin = time.time()
+        def is_ready(node):
+            try:
+                self.ping(node)
+                return True
+            except:
+                if not self.is_alive(node):
+                    logger.error(f"workload process on {node.ip} (id={node.id}) died")
+                    raise
+                return False
+        wait = Wait("workload.wait_ready", timeout_s, f"workload process isn't ready to accept requests within {timeout_s} sec", baseline_s=5)
         for node in self.nodes:
-            while True:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"workload process isn't ready to accept requests within {timeout_s} sec")
-                try:
-                    logger.debug(f"checking if workload http api is ready on {node.ip}")
-                    self.ping(node)
-                    break
-                except:
-                    if not self.is_alive(node):
-                        logger.error(f"workload process on {node.ip} (id={node.id}) died")
-                        raise
+            logger.debug(f"checking if workload http api is ready on {node.ip}")
+            wait_until(None, lambda: is_ready(node), timeout_s, wait.message, begin=wait.begin)
+        wait.done()
     
     def wait_progress(self, timeout_s=10):
-        begin = time.time()
         started = dict()
         for node in self.nodes:
             started[node.ip]=self.info(node)
-        made_progress = False
         progressed = dict()
-        while True:
-            made_progress = True
+        def made_progress():
+            result = True
             for node in self.nodes:
-                if time.time() - begin > timeout_s:
-                    raise TimeoutException(f"workload haven't done progress within {timeout_s} sec")
                 if node.ip in progressed:
                     continue
                 logger.debug(f"checking if node {node.ip} made progress")
                 info = self.info(node)
                 if info.succeeded_ops > started[node.ip].succeeded_ops:
-                    progressed[node.id]=True
+                    progressed[node.ip]=True
                 else:
-                    made_progress = False
-            if made_progress:
-                break
-            sleep(1)
+                    result = False
+            return result
+        wait_until("workload.wait_progress", made_progress, timeout_s,
+            f"workload haven't done progress within {timeout_s} sec")
 
     def emit_event(self, node, name):
-        ip = node.ip
-        r = requests.post(f"http://{ip}:8080/event/" + name)
-        if r.status_code != 200:
-            raise Exception(f"unexpected status code: {r.status_code}")
+        client.post(node.ip, "/event/" + name)
 
     def init(self, node, server, brokers, source, target, group_id, experiment, settings):
-        ip = node.ip
-        r = requests.post(f"http://{ip}:8080/init", json={
+        client.post(node.ip, "/init", json={
             "experiment": experiment,
             "server": server,
             "source": source,
@@ -152,49 +145,70 @@ class Workload:
             "group_id": group_id,
             "brokers": brokers,
             "settings": settings})
-        if r.status_code != 200:
-            raise Exception(f"unexpected status code: {r.status_code}")
     
     def start(self, node):
-        ip = node.ip
-        r = requests.post(f"http://{ip}:8080/start")
-        if r.status_code != 200:
-            raise Exception(f"unexpected status code: {r.status_code}")
+        client.post(node.ip, "/start")
 
     def stop(self, node, timeout_s=10):
-        ip = node.ip
-        r = requests.post(f"http://{ip}:8080/stop", timeout=timeout_s)
-        if r.status_code != 200:
-            raise Exception(f"unexpected status code: {r.status_code}")
+        client.post(node.ip, "/stop", timeout_s=timeout_s)
 
     def info(self, node):
-        ip = node.ip
-        r = requests.get(f"http://{ip}:8080/info")
-        if r.status_code != 200:
-            raise Exception(f"unexpected status code: {r.status_code}")
+        body = client.get(node.ip, "/info").json()
         info = Info()
-        info.succeeded_ops = r.json()["succeeded_ops"]
-        info.failed_ops = r.json()["failed_ops"]
-        info.timedout_ops = r.json()["timedout_ops"]
-        info.is_active = r.json()["is_active"]
+        info.succeeded_ops = body["succeeded_ops"]
+        info.failed_ops = body["failed_ops"]
+        info.timedout_ops = body["timedout_ops"]
+        info.is_active = body["is_active"]
         return info
     
     def ping(self, node):
-        ip = node.ip
-        r = requests.get(f"http://{ip}:8080/ping")
-        if r.status_code != 200:
-            raise Exception(f"unexpected status code: {r.status_code}")
+        client.get(node.ip, "/ping")
+
+    def prepare_analysis(self, config, root="/mnt/vectorized/experiments"):
+        # consistency and stat share a single pass over each workload.log,
+        # the pass may start while the workload is running (see follow)
+        for node in self.nodes:
+            workload_dir = f"{root}/{config['experiment_id']}/{node.ip}"
+            self.replays[node.ip] = LogReplay(os.path.join(workload_dir, "workload.log"), cmds)
+            for check in config["workload"]["checks"]:
+                if check["name"] == "consistency":
+                    self.consistency_players[node.ip] = consistency.LogPlayer(config)
+                    self.replays[node.ip].subscribe(self.consistency_players[node.ip])
+                elif check["name"] == "stat":
+                    self.stat_players[node.ip] = stat.LogPlayer(config)
+                    self.replays[node.ip].subscribe(self.stat_players[node.ip])
+
+    def follow(self, config, node):
+        workload_dir = f"/mnt/vectorized/experiments/{config['experiment_id']}/{node.ip}"
+        if node.ip in self.consistency_players:
+            consistency.follow(workload_dir, self.replays[node.ip])
+        else:
+            self.replays[node.ip].follow()
+
+    def has_violation(self):
+        for ip in self.consistency_players:
+            if self.consistency_players[ip].has_violation:
+                return True
+        return False
 
     def analyze(self, config):
         logger.debug(f"analyzing {config['experiment_id']}")
 
+        if len(self.replays) == 0:
+            with timings.span("analysis/replay"):
+                if node_analysis.is_enabled(config, self):
+                    node_analysis.replay(self, config)
+                else:
+                    self.prepare_analysis(config)
+
         for check in config["workload"]["checks"]:
             if check["name"] == "consistency":
                 check["result"] = Result.PASSED
                 for node in self.nodes:
                     workload_dir = f"/mnt/vectorized/experiments/{config['experiment_id']}/{node.ip}"
                     if os.path.isdir(workload_dir):
-                        check[node.ip] = consistency.validate(config, workload_dir)
+                        with timings.span("analysis/consistency"):
+                            check[node.ip] = consistency.validate(config, workload_dir, self.replays[node.ip], self.consistency_players[node.ip])
                     else:
                         check[node.ip] = {
                             "result": Result.UNKNOWN,
@@ -207,7 +221,8 @@ class Workload:
                 for node in self.nodes:
                     workload_dir = f"/mnt/vectorized/experiments/{config['experiment_id']}/{node.ip}"
                     if os.path.isdir(workload_dir):
-                        check[node.ip] = stat.collect(config, workload_dir)
+                        with timings.span("analysis/stat"):
+                            check[node.ip] = stat.collect(config, workload_dir, self.replays[node.ip], self.stat_players[node.ip])
                     else:
                         check[node.ip] = {
                             "result": Result.UNKNOWN,
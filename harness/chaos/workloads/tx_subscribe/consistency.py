@@ -5,6 +5,7 @@ from sh import mkdir, rm
 import traceback
 from chaos.checks.result import Result
 from chaos.workloads.tx_subscribe.log_utils import State, cmds, threads
+from chaos.workloads.oplog import LogReplay
 import logging
 import os
 from collections import deque
@@ -82,10 +83,10 @@ class LogPlayer:
 
         self.ts_us = None
     
-    def consuming_apply(self, thread_id, parts):
+    def consuming_apply(self, thread_id, payload):
         if self.curr_state[thread_id] == State.SEEN:
             try:
-                self.read_checker.seen(self.node, int(parts[3]), parts[4], parts[5], int(parts[6]), int(parts[7]))
+                self.read_checker.seen(self.node, int(payload[0]), payload[1], payload[2], int(payload[3]), int(payload[4]))
             except:
                 self.has_violation = True
                 e, v = sys.exc_info()[:2]
@@ -93,40 +94,32 @@ class LogPlayer:
                 logger.error(v)
                 logger.error(trace)
     
-    def apply(self, line):
+    def apply(self, thread_id, delta_us, new_state, payload):
         if self.has_violation:
             return
-        parts = line.rstrip().split('\t')
-
-        if parts[2] not in cmds:
-            raise Exception(f"unknown cmd \"{parts[2]}\"")
 
         if self.ts_us == None:
-            self.ts_us = int(parts[1])
+            self.ts_us = delta_us
         else:
-            delta_us = int(parts[1])
             self.ts_us = self.ts_us + delta_us
-        
-        new_state = cmds[parts[2]]
 
         if new_state == State.EVENT:
             return
         if new_state == State.VIOLATION:
             self.has_violation = True
-            logger.error(parts[3])
+            logger.error("\t".join(map(str, payload)))
             return
         if new_state == State.LOG:
             return
         
-        thread_id = int(parts[0])
         if thread_id not in self.curr_state:
-            self.thread_type[thread_id] = parts[4]
+            self.thread_type[thread_id] = payload[1]
             self.curr_state[thread_id] = None
             if self.thread_type[thread_id] not in threads:
-                raise Exception(f"unknown thread type: {parts[4]}")
+                raise Exception(f"unknown thread type: {payload[1]}")
         if self.curr_state[thread_id] == None:
             if new_state != State.STARTED:
-                raise Exception(f"first logged command of a new thread should be started, got: \"{parts[2]}\"")
+                raise Exception(f"first logged command of a new thread should be started, got: \"{new_state}\"")
             self.curr_state[thread_id] = new_state
         else:
             if new_state not in threads[self.thread_type[thread_id]][self.curr_state[thread_id]]:
@@ -134,9 +127,22 @@ class LogPlayer:
             self.curr_state[thread_id] = new_state
 
         if self.thread_type[thread_id] == "consuming":
-            self.consuming_apply(thread_id, parts)
+            self.consuming_apply(thread_id, payload)
+
+def follow(workload_dir, replay):
+    logger.setLevel(logging.DEBUG)
+    handler = logging.FileHandler(os.path.join(workload_dir, "consistency.log"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    logger.addHandler(handler)
+
+    try:
+        replay.follow()
+    finally:
+        handler.flush()
+        handler.close()
+        logger.removeHandler(handler)
 
-def validate(config, workload_dir):
+def validate(config, workload_dir, replays=None, players=None):
     logger.setLevel(logging.DEBUG)
     logger_handler_path = os.path.join(workload_dir, "consistency.log")
     handler = logging.FileHandler(logger_handler_path)
@@ -149,13 +155,17 @@ def validate(config, workload_dir):
         has_violation = False
         checker = ReadChecker(config)
         for node in config["workload"]["nodes"]:
-            player = LogPlayer(node, checker)
-            with open(os.path.join(workload_dir, node, "workload.log"), "r") as workload_file:
-                last_line = None
-                for line in workload_file:
-                    if last_line != None:
-                        player.apply(last_line)
-                    last_line = line
+            if replays == None:
+                replay = LogReplay(os.path.join(workload_dir, node, "workload.log"), cmds)
+            else:
+                replay = replays[node]
+            if players == None:
+                player = LogPlayer(node, checker)
+                replay.subscribe(player)
+            else:
+                player = players[node]
+            replay.play()
+            replay.check(player)
             has_violation = has_violation or player.has_violation
         has_errors = has_violation
 
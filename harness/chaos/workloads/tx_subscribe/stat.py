@@ -4,8 +4,11 @@ import sys
 import traceback
 import json
 import os
+import numpy as np
 from chaos.checks.result import Result
 from chaos.workloads.tx_subscribe.log_utils import State, cmds, threads
+from chaos.workloads.oplog import LogReplay
+from chaos.workloads.stat_utils import History, LatencyHistogram, gaps, max_of, throughput, write_columns, fault_markers
 import logging
 
 logger = logging.getLogger("stat")
@@ -108,36 +111,6 @@ class ThroughputPlot:
         self.title = None
         self.color = None
 
-class Throughput:
-    def __init__(self):
-        self.count = 0
-        self.time_ms = 0
-        self.history = []
-    
-    def tick(self, now_ms):
-        while self.time_ms + 1000 < now_ms:
-            ts = int(self.time_ms+1000)
-            self.history.append([ts, self.count])
-            self.count = 0
-            self.time_ms += 1000
-
-class ThroughputBuilder:
-    def __init__(self):
-        self.total_throughput = None
-        self.partition_throughput = dict()
-    
-    def build(self, config, latencies):
-        self.total_throughput = Throughput()
-        for partition in range(0, config["partitions"]):
-            self.partition_throughput[partition] = Throughput()
-        
-        for [ts_ms, latency_us, partition] in latencies:
-            self.total_throughput.tick(ts_ms)
-            for key in self.partition_throughput.keys():
-                self.partition_throughput[key].tick(ts_ms)
-            self.total_throughput.count += 1
-            self.partition_throughput[partition].count += 1
-
 class LogPlayer:
     def __init__(self, config):
         self.config = config
@@ -149,9 +122,11 @@ class LogPlayer:
         
         self.ts_us = None
 
-        self.latency_err_history = []
-        self.latency_ok_history = []
-        self.latency_commit_history = []
+        self.latency_err_history = History()
+        self.latency_ok_history = History()
+        self.latency_ok_histogram = LatencyHistogram()
+        self.latency_commit_history = History()
+        self.latency_commit_histogram = LatencyHistogram()
         self.faults = []
         self.recoveries = []
 
@@ -162,7 +137,7 @@ class LogPlayer:
 
         self.should_measure = False
     
-    def streaming_apply(self, thread_id, parts):
+    def streaming_apply(self, thread_id, payload):
         if self.curr_state[thread_id] == State.TX:
             self.txn_started[thread_id] = self.ts_us
         elif self.curr_state[thread_id] == State.COMMIT:
@@ -172,32 +147,26 @@ class LogPlayer:
             self.is_commit[thread_id] = False
             self.end_txn_started[thread_id] = self.ts_us
         elif self.curr_state[thread_id] == State.READ:
-            self.read_partition[thread_id] = int(parts[4])
+            self.read_partition[thread_id] = int(payload[1])
         elif self.curr_state[thread_id] == State.OK:
             if self.should_measure:
                 if self.is_commit[thread_id]:
-                    self.latency_ok_history.append([int((self.ts_us-self.started_us)/1000), self.ts_us-self.txn_started[thread_id], self.read_partition[thread_id]])
-                    self.latency_commit_history.append([int((self.ts_us-self.started_us)/1000), self.ts_us-self.end_txn_started[thread_id]])
+                    self.latency_ok_history.append(int((self.ts_us-self.started_us)/1000), self.ts_us-self.txn_started[thread_id], self.read_partition[thread_id])
+                    self.latency_ok_histogram.record(self.ts_us-self.txn_started[thread_id])
+                    self.latency_commit_history.append(int((self.ts_us-self.started_us)/1000), self.ts_us-self.end_txn_started[thread_id])
+                    self.latency_commit_histogram.record(self.ts_us-self.end_txn_started[thread_id])
                 else:
-                    self.latency_err_history.append([int((self.ts_us-self.started_us)/1000), self.ts_us-self.txn_started[thread_id]])
+                    self.latency_err_history.append(int((self.ts_us-self.started_us)/1000), self.ts_us-self.txn_started[thread_id])
     
-    def apply(self, line):
-        parts = line.rstrip().split('\t')
-
-        if parts[2] not in cmds:
-            raise Exception(f"unknown cmd \"{parts[2]}\"")
-
+    def apply(self, thread_id, delta_us, new_state, payload):
         if self.ts_us == None:
-            self.ts_us = int(parts[1])
+            self.ts_us = delta_us
             self.started_us = self.ts_us
         else:
-            delta_us = int(parts[1])
             self.ts_us = self.ts_us + delta_us
-        
-        new_state = cmds[parts[2]]
 
         if new_state == State.EVENT:
-            name = parts[3]
+            name = payload[0]
             if name == "measure" and not self.should_measure:
                 self.started_us = self.ts_us
                 self.should_measure = True
@@ -212,15 +181,14 @@ class LogPlayer:
         if new_state == State.LOG:
             return
         
-        thread_id = int(parts[0])
         if thread_id not in self.curr_state:
-            self.thread_type[thread_id] = parts[4]
+            self.thread_type[thread_id] = payload[1]
             self.curr_state[thread_id] = None
             if self.thread_type[thread_id] not in threads:
-                raise Exception(f"unknown thread type: {parts[4]}")
+                raise Exception(f"unknown thread type: {payload[1]}")
         if self.curr_state[thread_id] == None:
             if new_state != State.STARTED:
-                raise Exception(f"first logged command of a new thread should be started, got: \"{parts[2]}\"")
+                raise Exception(f"first logged command of a new thread should be started, got: \"{new_state}\"")
             self.curr_state[thread_id] = new_state
         else:
             if new_state not in threads[self.thread_type[thread_id]][self.curr_state[thread_id]]:
@@ -228,13 +196,15 @@ class LogPlayer:
             self.curr_state[thread_id] = new_state
 
         if self.thread_type[thread_id] == "streaming":
-            self.streaming_apply(thread_id, parts)
+            self.streaming_apply(thread_id, payload)
 
 class StatInfo:
     def __init__(self):
-        self.latency_err_history = []
-        self.latency_ok_history = []
-        self.latency_commit_history = []
+        self.latency_err_history = History()
+        self.latency_ok_history = History()
+        self.latency_ok_histogram = LatencyHistogram()
+        self.latency_commit_history = History()
+        self.latency_commit_histogram = LatencyHistogram()
         self.faults = []
         self.recoveries = []
 
@@ -260,62 +230,31 @@ def render_overview(config, workload_dir, stat):
         for key in throughput_log_paths.keys():
             throughput_logs[key] =  open(throughput_log_paths[key], "w")
         
-        duration_ms = 0
-        min_latency_us = None
-        max_latency_us = 0
-        commit_p99 = None
-        commit_min = None
-        commit_max = None
-        max_unavailability_us = 0
-        max_throughput = 0
-
-        latencies = []
-        for [_, latency_us, _] in stat.latency_ok_history:
-            latencies.append(latency_us)
-        latencies.sort()
-        p99  = latencies[int(0.99*len(latencies))]
-
-        latencies = []
-        for [_, latency_us] in stat.latency_commit_history:
-            latencies.append(latency_us)
-        latencies.sort()
-        commit_p99 = latencies[int(0.99*len(latencies))]
-        commit_min = latencies[0]
-        commit_max = latencies[-1]
-
-        for [ts_ms,latency_us] in stat.latency_commit_history:
-            duration_ms = max(duration_ms, ts_ms)
-            latency_commit.write(f"{ts_ms}\t{latency_us}\n")
-
-        max_unavailability_ms = 0
-        last_ok = stat.latency_ok_history[0][0]
-        for [ts_ms,latency_us,_] in stat.latency_ok_history:
-            max_unavailability_ms = max(max_unavailability_ms, ts_ms - last_ok)
-            last_ok = ts_ms
-            duration_ms = max(duration_ms, ts_ms)
-            if min_latency_us == None:
-                min_latency_us = latency_us
-            min_latency_us = min(min_latency_us, latency_us)
-            max_latency_us = max(max_latency_us, latency_us)
-            latency_ok.write(f"{ts_ms}\t{latency_us}\n")
-        max_unavailability_us = 1000 * max_unavailability_ms
-        
-        for [ts_ms,latency_us] in stat.latency_err_history:
-            duration_ms = max(duration_ms, ts_ms)
-            max_latency_us = max(max_latency_us, latency_us)
-            latency_err.write(f"{ts_ms}\t{latency_us}\n")
-        
-        throughput_builder = ThroughputBuilder()
-        throughput_builder.build(config, stat.latency_ok_history)
-        
-        for [ts_ms, count] in throughput_builder.total_throughput.history:
-            duration_ms = max(duration_ms, ts_ms)
-            max_throughput = max(max_throughput, count)
-            throughput_log.write(f"{ts_ms}\t{count}\n")
-        
-        for key in throughput_builder.partition_throughput.keys():
-            for [ts_ms, count] in throughput_builder.partition_throughput[key].history:
-                throughput_logs[key].write(f"{ts_ms}\t{count}\n")
+        ok_ts = stat.latency_ok_history.ts_ms()
+        err_ts = stat.latency_err_history.ts_ms()
+        err_latencies = stat.latency_err_history.latencies()
+        commit_ts = stat.latency_commit_history.ts_ms()
+
+        latency = stat.latency_ok_histogram.percentiles()
+        latency["max"] = max(latency["max"], max_of(err_latencies))
+        p99 = latency["p99"]
+        # the total's history is a concatenation of the nodes' histories
+        max_unavailability_us = 1000 * max_of(gaps(np.sort(ok_ts, kind="stable")))
+
+        commit_latency = stat.latency_commit_histogram.percentiles()
+        commit_p99 = commit_latency["p99"]
+
+        throughput_ts, throughput_counts, partition_throughput = throughput(ok_ts, stat.latency_ok_history.labels(), config["partitions"])
+        max_throughput = max_of(throughput_counts)
+
+        duration_ms = max_of(ok_ts, err_ts, commit_ts, throughput_ts)
+
+        stat.latency_commit_history.write(latency_commit)
+        stat.latency_ok_history.write(latency_ok)
+        stat.latency_err_history.write(latency_err)
+        write_columns(throughput_log, throughput_ts, throughput_counts)
+        for key in throughput_logs.keys():
+            write_columns(throughput_logs[key], throughput_ts, partition_throughput[key])
         
         latency_ok.close()
         latency_err.close()
@@ -327,8 +266,8 @@ def render_overview(config, workload_dir, stat):
         throughput_plots = []
         # http://phd-bachephysicdun.blogspot.com/2014/01/32-colors-in-gnuplot.html
         colors = ["0x008B8B", "0xB8860B", "0x006400"]
-        for key in throughput_builder.partition_throughput.keys():
-            if len(list(filter(lambda x: x[1]!=0, throughput_builder.partition_throughput[key].history))) == 0:
+        for key in partition_throughput.keys():
+            if not partition_throughput[key].any():
                 continue
             throughput_plot = ThroughputPlot()
             throughput_plot.file = f"throughput_{key}.log"
@@ -356,16 +295,8 @@ def render_overview(config, workload_dir, stat):
         return {
             "result": Result.PASSED,
             "latency_us": {
-                "tx": {
-                    "min": min_latency_us,
-                    "max": max_latency_us,
-                    "p99": p99
-                },
-                "commit": {
-                    "min": commit_min,
-                    "max": commit_max,
-                    "p99": commit_p99
-                }
+                "tx": latency,
+                "commit": commit_latency
             },
             "max_unavailability_us": max_unavailability_us,
             "throughput": {
@@ -399,10 +330,8 @@ def render_availability(config, workload_dir, stat):
     try:
         availability_log = open(availability_log_path, "w")
 
-        last_ok = stat.latency_ok_history[0][0]
-        for [ts_ms,latency_us,_] in stat.latency_ok_history:
-            availability_log.write(f"{ts_ms}\t{1000 * (ts_ms - last_ok)}\n")
-            last_ok = ts_ms
+        ok_ts = stat.latency_ok_history.ts_ms()
+        write_columns(availability_log, ok_ts, 1000 * gaps(ok_ts))
         
         availability_log.close()
         
@@ -427,13 +356,8 @@ def render_percentiles(config, workload_dir, stat):
     try:
         percentiles = open(percentiles_log_path, "w")
 
-        latencies = []
-        for [_, latency_us, _] in stat.latency_ok_history:
-            latencies.append(latency_us)
-        latencies.sort()
-        p99  = latencies[int(0.99*len(latencies))]
-        for i in range(0,len(latencies)):
-            percentiles.write(f"{float(i) / len(latencies)}\t{latencies[i]}\n")
+        p99 = stat.latency_ok_histogram.value_at(0.99)
+        stat.latency_ok_histogram.write(percentiles)
         
         percentiles.close()
         
@@ -453,7 +377,7 @@ def render_percentiles(config, workload_dir, stat):
         rm("-rf", percentiles_log_path)
         rm("-rf", percentiles_gnuplot_path)
 
-def collect(config, check, workload_dir):
+def collect(config, check, workload_dir, replays=None, players=None):
     logger.setLevel(logging.DEBUG)
     logger_handler_path = os.path.join(workload_dir, "stat.log")
     handler = logging.FileHandler(logger_handler_path)
@@ -465,18 +389,26 @@ def collect(config, check, workload_dir):
     for node in config["workload"]["nodes"]:
         node_dir = f"{workload_dir}/{node}"
         if os.path.isdir(node_dir):
-            player = LogPlayer(config)
-
-            with open(os.path.join(node_dir, "workload.log"), "r") as workload_file:
-                last_line = None
-                for line in workload_file:
-                    if last_line != None:
-                        player.apply(last_line)
-                    last_line = line
+            if replays == None:
+                replay = LogReplay(os.path.join(node_dir, "workload.log"), cmds)
+            else:
+                replay = replays[node]
+            if players == None:
+                player = LogPlayer(config)
+                replay.subscribe(player)
+            else:
+                player = players[node]
+            replay.play()
+            replay.check(player)
+            markers = fault_markers(config, node)
+            if markers != None:
+                player.faults, player.recoveries = markers
             
             total.latency_err_history.extend(player.latency_err_history)
             total.latency_ok_history.extend(player.latency_ok_history)
+            total.latency_ok_histogram.merge(player.latency_ok_histogram)
             total.latency_commit_history.extend(player.latency_commit_history)
+            total.latency_commit_histogram.merge(player.latency_commit_histogram)
             total.faults = player.faults
             total.recoveries = player.recoveries
 
@@ -492,10 +424,6 @@ def collect(config, check, workload_dir):
             }
         check["result"] = Result.more_severe(check["result"], check[node]["result"])
     
-    total.latency_err_history.sort(key=lambda x:x[0])
-    total.latency_ok_history.sort(key=lambda x:x[0])
-    total.latency_commit_history.sort(key=lambda x:x[0])
-    
     check["total"] = render_overview(config, workload_dir, total)
     check["result"] = Result.more_severe(check["result"], check["total"]["result"])
     
@@ -6,6 +6,7 @@ import traceback
 from confluent_kafka import Consumer, TopicPartition, OFFSET_BEGINNING
 from chaos.checks.result import Result
 from chaos.workloads.writes.log_utils import State, cmds, transitions, phantoms
+from chaos.workloads.oplog import LogReplay
 import logging
 from time import sleep
 import os
@@ -187,16 +188,16 @@ class LogPlayer:
                     write = self.ok_writes[offset]
                     logger.error(f"lost message found [{write.key}]={write.op}@{offset}")
     
-    def writing_apply(self, thread_id, parts):
+    def writing_apply(self, thread_id, payload):
         if self.curr_state[thread_id] == State.SENDING:
             write = Write()
-            write.key = parts[3]
-            write.op = int(parts[4])
+            write.key = str(payload[0])
+            write.op = int(payload[1])
             write.started = self.ts_us
             write.max_offset = self.max_offset
             self.last_write[thread_id] = write
         elif self.curr_state[thread_id] == State.OK:
-            offset = int(parts[3])
+            offset = int(payload[0])
             self.first_offset = min(self.first_offset, offset)
             self.last_offset = max(self.last_offset, offset)
             write = self.last_write[thread_id]
@@ -220,45 +221,49 @@ class LogPlayer:
                 write.finished = self.ts_us
                 self.err_writes[write.op] = write
     
-    def apply(self, line):
-        parts = line.rstrip().split('\t')
-
-        if parts[2] not in cmds:
-            raise Exception(f"unknown cmd \"{parts[2]}\"")
-
+    def apply(self, thread_id, delta_us, new_state, payload):
         if self.ts_us == None:
-            self.ts_us = int(parts[1])
+            self.ts_us = delta_us
         else:
-            delta_us = int(parts[1])
             self.ts_us = self.ts_us + delta_us
-        
-        new_state = cmds[parts[2]]
 
         if new_state == State.EVENT:
             return
         if new_state == State.VIOLATION:
             self.has_violation = True
-            logger.error(parts[3])
+            logger.error("\t".join(map(str, payload)))
             return
         if new_state == State.LOG:
             return
         
-        thread_id = int(parts[0])
         if thread_id not in self.curr_state:
             self.curr_state[thread_id] = None
         if self.curr_state[thread_id] == None:
             if new_state != State.STARTED:
-                raise Exception(f"first logged command of a new thread should be started, got: \"{parts[2]}\"")
+                raise Exception(f"first logged command of a new thread should be started, got: \"{new_state}\"")
             self.curr_state[thread_id] = new_state
-            self.key[thread_id] = parts[3]
+            self.key[thread_id] = payload[0]
         else:
             if new_state not in transitions[self.curr_state[thread_id]]:
                 raise Exception(f"unknown transition {self.curr_state[thread_id]} -> {new_state}")
             self.curr_state[thread_id] = new_state
 
-        self.writing_apply(thread_id, parts)
+        self.writing_apply(thread_id, payload)
 
-def validate(config, check_config, workload_dir):
+def follow(workload_dir, replay):
+    logger.setLevel(logging.DEBUG)
+    handler = logging.FileHandler(os.path.join(workload_dir, "consistency.log"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    logger.addHandler(handler)
+
+    try:
+        replay.follow()
+    finally:
+        handler.flush()
+        handler.close()
+        logger.removeHandler(handler)
+
+def validate(config, check_config, workload_dir, replays=None, players=None):
     logger.setLevel(logging.DEBUG)
     logger_handler_path = os.path.join(workload_dir, "consistency.log")
     handler = logging.FileHandler(logger_handler_path)
@@ -274,13 +279,17 @@ def validate(config, check_config, workload_dir):
             raise Exception("can't validate more than one workload nodes")
 
         for node in config["workload"]["nodes"]:
-            player = LogPlayer(config, check_config)
-            with open(os.path.join(workload_dir, node, "workload.log"), "r") as workload_file:
-                last_line = None
-                for line in workload_file:
-                    if last_line != None:
-                        player.apply(last_line)
-                    last_line = line
+            if replays == None:
+                replay = LogReplay(os.path.join(workload_dir, node, "workload.log"), cmds)
+            else:
+                replay = replays[node]
+            if players == None:
+                player = LogPlayer(config, check_config)
+                replay.subscribe(player)
+            else:
+                player = players[node]
+            replay.play()
+            replay.check(player)
             player.reread_and_check()
             has_violation = has_violation or player.has_violation
         
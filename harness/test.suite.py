@@ -5,12 +5,12 @@ import logging
 import time
 import json
 import argparse
-import sys
-import traceback
-from sh import mkdir
-from logging import FileHandler, Formatter
 from chaos.checks.result import Result
 from chaos.scenarios.all import SCENARIOS
+from chaos.cluster import Cluster
+from chaos.cluster_pool import ClusterPool, predict_makespan
+from chaos.durations import DurationDB
+from chaos.run_journal import RunJournal
 
 with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "log.yaml"), 'rt') as f:
     try:
@@ -21,13 +21,35 @@ with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "log.yaml"),
         logging.basicConfig(level=logging.INFO)
 
 parser = argparse.ArgumentParser(description='kafka-clients chaos runner')
-parser.add_argument('--suite', required=True)
+parser.add_argument('--suite', required=False)
 parser.add_argument('--repeat', type=int, default=1, required=False)
-parser.add_argument('--run_id', required=True)
+parser.add_argument('--run_id', required=False)
+parser.add_argument('--cluster', action='append', required=False,
+    help='dir with redpanda.nodes & client.nodes of a cluster, repeat to run the suite on several clusters in parallel')
+parser.add_argument('--resume', required=False,
+    help='run_id of an interrupted run to continue: its suite and repeat are taken from its journal')
 args = parser.parse_args()
 
 logger = logging.getLogger("chaos")
-formatter = Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+clusters = list(map(Cluster, args.cluster if args.cluster else ["/mnt/vectorized"]))
+
+finished = []
+if args.resume:
+    journal = RunJournal(args.resume)
+    if not journal.exists():
+        parser.error(f"can't resume {args.resume}: {journal.path} doesn't exist")
+    run, finished = journal.recover()
+    args.run_id = args.resume
+    args.suite = run["suite"]
+    args.repeat = run["repeat"]
+    logger.info(f"resuming {args.run_id}: {len(finished)} experiment(s) are already done")
+else:
+    if not args.suite or not args.run_id:
+        parser.error("--suite and --run_id are required unless --resume is used")
+    journal = RunJournal(args.run_id)
+    if journal.exists():
+        parser.error(f"{args.run_id} is already started, use --resume {args.run_id} to continue it")
 
 suite = None
 with open(args.suite, "r") as suite_file:
@@ -67,63 +89,101 @@ for test_path in suite["tests"]:
     scenario.validate(test)
     tests[test["name"]] = test
 
+if not args.resume:
+    journal.start_run(os.path.abspath(args.suite), args.repeat)
+
 results = {
     "test_runs": {},
     "name": suite["name"],
     "result": Result.PASSED,
-    "run_id": args.run_id
+    "run_id": args.run_id,
+    "resumed": len(finished)
 }
 
+def save_results():
+    with open(f"/mnt/vectorized/experiments/{args.run_id}.json", "w") as info:
+        info.write(json.dumps(results, indent=2))
+    with open(f"/mnt/vectorized/experiments/latest.json", "w") as info:
+        info.write(json.dumps(results, indent=2))
+
+# the experiments of all the repeats are scheduled at once on the pool of
+# clusters, a repeat's result is accounted when its last experiment ends
+tasks = []
+most_severe_result = []
+least_severe_result = []
+pending = []
+done = set(map(lambda record: record[0], finished))
 for i in range(0, args.repeat):
-    most_severe_result = Result.PASSED
-    least_severe_result = Result.FAILED
+    most_severe_result.append(Result.PASSED)
+    least_severe_result.append(Result.FAILED)
+    pending.append(len(tests))
     for name in tests:
+        if (i, name) not in done:
+            tasks.append(((i, name), tests[name]))
         if name not in results["test_runs"]:
             results["test_runs"][name] = {}
-        
-        experiment_id = str(int(time.time()))
 
-        mkdir("-p", f"/mnt/vectorized/experiments/{experiment_id}")
-        handler = FileHandler(f"/mnt/vectorized/experiments/{experiment_id}/log")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        
-        test = tests[name]
-        try:
-            scenario = SCENARIOS[test["scenario"]]()
-            description = scenario.execute(test, experiment_id)
-            results["test_runs"][test["name"]][experiment_id] = description["result"]
-        except:
-            e, v = sys.exc_info()[:2]
-            trace = traceback.format_exc()
-            logger.error(v)
-            logger.error(trace)
-            results["test_runs"][test["name"]][experiment_id] = "UNKNOWN"
-        finally:
-            handler.flush()
-            handler.close()
-            logger.removeHandler(handler)
+def account(key, experiment_id, result):
+    i, name = key
+    if name not in tests or i >= args.repeat:
+        raise Exception(f"journaled experiment {experiment_id} ({name} #{i}) isn't a part of the suite")
+    results["test_runs"][name][experiment_id] = result
+
+    most_severe_result[i] = Result.more_severe(most_severe_result[i], result)
+    least_severe_result[i] = Result.least_severe(least_severe_result[i], result)
+    pending[i] -= 1
+
+    if pending[i] == 0:
+        if most_severe_result[i] == Result.FAILED:
+            least_severe_result[i] = Result.FAILED
         
-        most_severe_result = Result.more_severe(most_severe_result, results["test_runs"][test["name"]][experiment_id])
-        least_severe_result = Result.least_severe(least_severe_result, results["test_runs"][test["name"]][experiment_id])
+        if ignore_transient_errors:
+            if at_least_one_passes:
+                results["result"] = Result.more_severe(results["result"], least_severe_result[i])
+            elif least_severe_result[i] == Result.FAILED:
+                results["result"] = Result.FAILED
+        else:
+            results["result"] = Result.more_severe(results["result"], most_severe_result[i])
 
-        with open(f"/mnt/vectorized/experiments/{args.run_id}.json", "w") as info:
-            info.write(json.dumps(results, indent=2))
-        with open(f"/mnt/vectorized/experiments/latest.json", "w") as info:
-            info.write(json.dumps(results, indent=2))
-    
-    if most_severe_result == Result.FAILED:
-        least_severe_result = Result.FAILED
-    
-    if ignore_transient_errors:
-        if at_least_one_passes:
-            results["result"] = Result.more_severe(results["result"], least_severe_result)
-        elif least_severe_result == Result.FAILED:
-            results["result"] = Result.FAILED
-    else:
-        results["result"] = Result.more_severe(results["result"], most_severe_result)
-    
-    with open(f"/mnt/vectorized/experiments/{args.run_id}.json", "w") as info:
-        info.write(json.dumps(results, indent=2))
-    with open(f"/mnt/vectorized/experiments/latest.json", "w") as info:
-        info.write(json.dumps(results, indent=2))
\ No newline at end of file
+for key, experiment_id, result in finished:
+    account(key, experiment_id, result)
+
+# longest processing time first: the experiments which took the longest
+# in the past go first so the clusters of the pool end at about the same
+# time; the tests without history are assumed to be as long as the longest.
+# a single cluster can't end sooner so it keeps the suite's order to make
+# the runs comparable
+durations = DurationDB()
+durations.update()
+predicted_s = dict()
+for name in tests:
+    predicted_s[name] = durations.predict(name)
+known_s = list(filter(lambda x: x != None, predicted_s.values()))
+unknown = list(filter(lambda name: predicted_s[name] == None, tests.keys()))
+for name in unknown:
+    predicted_s[name] = max(known_s) if len(known_s) > 0 else 0
+if len(clusters) > 1:
+    tasks.sort(key=lambda task: predicted_s[task[0][1]], reverse=True)
+
+results["schedule"] = {
+    "clusters": len(clusters),
+    "predicted_s": round(predict_makespan(map(lambda task: predicted_s[task[0][1]], tasks), len(clusters))),
+    "unknown_tests": unknown,
+    "actual_s": None
+}
+logger.info(f"predicted suite duration: {results['schedule']['predicted_s']}s on {len(clusters)} cluster(s), tests without history: {len(unknown)}")
+started = time.time()
+
+for (i, name), experiment_id, result in ClusterPool(clusters, journal).run(tasks):
+    journal.finished((i, name), experiment_id, result)
+    account((i, name), experiment_id, result)
+
+    duration_s = durations.add(experiment_id)
+    durations.save()
+    if duration_s != None:
+        logger.info(f"{name} ({experiment_id}) took {duration_s:.0f}s, predicted {predicted_s[name]:.0f}s")
+    results["schedule"]["actual_s"] = round(time.time() - started)
+
+    save_results()
+
+save_results()
@@ -72,6 +72,36 @@ public class App
             return "";
         });
 
+        get("/log", (req, res) -> {
+            //curl http://127.0.0.1:8080/log?from=0
+            // streams workload.log from the `from` byte to its current end so
+            // a client resumes a pull where the previous one ended
+            long from = req.queryParams("from") == null ? 0 : Long.parseLong(req.queryParams("from"));
+            res.status(200);
+            res.type("application/octet-stream");
+            var out = res.raw().getOutputStream();
+            if (params != null) {
+                var log = new File(new File(params.experiment, params.server), "workload.log");
+                if (log.exists()) {
+                    long left = log.length() - from;
+                    try (var file = new RandomAccessFile(log, "r")) {
+                        file.seek(from);
+                        byte[] buffer = new byte[1024 * 1024];
+                        while (left > 0) {
+                            int read = file.read(buffer, 0, (int)Math.min(buffer.length, left));
+                            if (read < 0) {
+                                break;
+                            }
+                            out.write(buffer, 0, read);
+                            left -= read;
+                        }
+                    }
+                }
+            }
+            out.flush();
+            return res.raw();
+        });
+
         get("/info", "application/json", (req, res) -> {
             var info = new Info();
             info.is_active = false;
@@ -6,9 +6,11 @@ from time import sleep
 from sh import mkdir
 import os
 import threading
-from flask import Flask, request
+from flask import Flask, Response, request
 from threading import Lock
 from enum import Enum
+import struct
+import re
 
 class SyncClient:
     def __init__(self, bootstrap):
@@ -62,6 +64,53 @@ class SyncClient:
             "offset": msg.offset()
         }
 
+# writes workload.log in the fixed-width binary format read by
+# harness/chaos/workloads/oplog.py
+class BinaryOpsLog:
+    MAGIC = b"CHAOSOP\x01"
+    HEADER = struct.Struct("<iBBHq")
+    DEFINE_CMD = 0xFE
+    DEFINE_STRING = 0xFF
+    MAX_ARGS = 16
+    LONG = re.compile(r"^-?(0|[1-9][0-9]{0,17})$")
+
+    def __init__(self, path):
+        self.out = open(path, "wb")
+        self.out.write(BinaryOpsLog.MAGIC)
+        self.cmds = {}
+        self.strings = {}
+    
+    def define(self, type, id, value):
+        data = value.encode("utf-8")
+        self.out.write(BinaryOpsLog.HEADER.pack(id, type, 0, 0, len(data)))
+        self.out.write(data)
+        self.out.write(b"\0" * (((len(data) + 7) & ~7) - len(data)))
+    
+    def write(self, thread_id, delta_us, message):
+        parts = message.split("\t", BinaryOpsLog.MAX_ARGS)
+        if parts[0] not in self.cmds:
+            if len(self.cmds) >= BinaryOpsLog.DEFINE_CMD:
+                raise Exception("too many cmds")
+            self.define(BinaryOpsLog.DEFINE_CMD, len(self.cmds), parts[0])
+            self.cmds[parts[0]] = len(self.cmds)
+        args = []
+        strmask = 0
+        for i, arg in enumerate(parts[1:]):
+            if BinaryOpsLog.LONG.match(arg) and arg != "-0":
+                args.append(int(arg))
+            else:
+                if arg not in self.strings:
+                    self.define(BinaryOpsLog.DEFINE_STRING, len(self.strings), arg)
+                    self.strings[arg] = len(self.strings)
+                args.append(self.strings[arg])
+                strmask |= 1 << i
+        self.out.write(BinaryOpsLog.HEADER.pack(thread_id, self.cmds[parts[0]], len(args), strmask, delta_us))
+        if len(args) > 0:
+            self.out.write(struct.pack(f"<{len(args)}q", *args))
+    
+    def close(self):
+        self.out.close()
+
 class Params:
     def __init__(self, cfg):
         self.experiment = cfg["experiment"]
@@ -129,7 +178,10 @@ class Workload:
         mkdir("-p", os.path.join(self.args.experiment, self.args.server))
         
         self.is_active = True
-        self.opslog = open(os.path.join(self.args.experiment, self.args.server, "workload.log"), "w")
+        if self.args.settings.get("oplog", "text") == "binary":
+            self.opslog = BinaryOpsLog(os.path.join(self.args.experiment, self.args.server, "workload.log"))
+        else:
+            self.opslog = open(os.path.join(self.args.experiment, self.args.server, "workload.log"), "w")
         
         for i in range(0, self.args.settings["concurrency"]):
             self.ops_info[i]=OpsInfo()
@@ -150,7 +202,10 @@ class Workload:
         now_us = int(time.time()*1000000)
         if now_us < self.past_us:
             raise Exception(f"Time cant go back, observed: {now_us} after: {before_us}")
-        self.opslog.write(f"{thread_id}\t{now_us - self.past_us}\t{message}\n")
+        if isinstance(self.opslog, BinaryOpsLog):
+            self.opslog.write(thread_id, now_us - self.past_us, message)
+        else:
+            self.opslog.write(f"{thread_id}\t{now_us - self.past_us}\t{message}\n")
         self.past_us = now_us
         self.mutex.release()
     
@@ -258,6 +313,11 @@ class AppState:
         if self.state != State.STARTED:
             raise Exception(f"Unexpected state: {self.state}")
         self.workload.event(name)
+    
+    def log_path(self):
+        if self.args == None:
+            return None
+        return os.path.join(self.args.experiment, self.args.server, "workload.log")
 
 
 state = AppState()
@@ -293,6 +353,28 @@ def info():
     # curl http://127.0.0.1:8080/info
     return state.info()
 
+@app.route('/log', methods=['GET'])
+def log():
+    # curl http://127.0.0.1:8080/log?from=0
+    # streams workload.log from the `from` byte to its current end so a
+    # client resumes a pull where the previous one ended
+    offset = int(request.args.get("from", "0"))
+    path = state.log_path()
+    if path == None or not os.path.isfile(path):
+        return Response(b"", mimetype="application/octet-stream")
+    end = os.path.getsize(path)
+    def stream():
+        with open(path, "rb") as log_file:
+            log_file.seek(offset)
+            left = end - offset
+            while left > 0:
+                chunk = log_file.read(min(left, 1024 * 1024))
+                if len(chunk) == 0:
+                    break
+                left -= len(chunk)
+                yield chunk
+    return Response(stream(), mimetype="application/octet-stream")
+
 @app.route('/event/<name>', methods=['POST'])
 def event(name):
     state.event(name)
@@ -0,0 +1,109 @@
+package io.vectorized;
+import java.io.*;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.charset.StandardCharsets;
+import java.util.HashMap;
+
+// writes workload.log in the fixed-width binary format read by
+// harness/chaos/workloads/oplog.py
+public class BinaryOpsLog {
+    private static final byte[] MAGIC = new byte[] { 'C', 'H', 'A', 'O', 'S', 'O', 'P', 1 };
+    private static final int DEFINE_CMD = 0xFE;
+    private static final int DEFINE_STRING = 0xFF;
+    private static final int MAX_ARGS = 16;
+
+    private BufferedOutputStream out;
+    private ByteBuffer buffer = ByteBuffer.allocate(16 + 8*MAX_ARGS).order(ByteOrder.LITTLE_ENDIAN);
+    private HashMap<String, Integer> cmds = new HashMap<>();
+    private HashMap<String, Integer> strings = new HashMap<>();
+
+    public BinaryOpsLog(File file) throws Exception {
+        out = new BufferedOutputStream(new FileOutputStream(file), 1 << 16);
+        out.write(MAGIC);
+    }
+
+    public void write(int thread_id, long delta_us, String message) throws Exception {
+        var parts = message.split("\t", MAX_ARGS + 1);
+        var cmd = cmds.get(parts[0]);
+        if (cmd == null) {
+            cmd = cmds.size();
+            if (cmd >= DEFINE_CMD) {
+                throw new Exception("too many cmds");
+            }
+            define(DEFINE_CMD, cmd, parts[0]);
+            cmds.put(parts[0], cmd);
+        }
+        var argc = parts.length - 1;
+        var args = new long[argc];
+        var strmask = 0;
+        for (int i=0;i<argc;i++) {
+            var arg = parts[i+1];
+            if (isLong(arg)) {
+                args[i] = Long.parseLong(arg);
+            } else {
+                var id = strings.get(arg);
+                if (id == null) {
+                    id = strings.size();
+                    define(DEFINE_STRING, id, arg);
+                    strings.put(arg, id);
+                }
+                args[i] = id;
+                strmask |= 1 << i;
+            }
+        }
+        buffer.clear();
+        buffer.putInt(thread_id);
+        buffer.put((byte)(int)cmd);
+        buffer.put((byte)argc);
+        buffer.putShort((short)strmask);
+        buffer.putLong(delta_us);
+        for (int i=0;i<argc;i++) {
+            buffer.putLong(args[i]);
+        }
+        out.write(buffer.array(), 0, buffer.position());
+    }
+
+    public void flush() throws Exception {
+        out.flush();
+    }
+
+    public void close() throws Exception {
+        out.close();
+    }
+
+    private void define(int type, int id, String value) throws Exception {
+        var data = value.getBytes(StandardCharsets.UTF_8);
+        buffer.clear();
+        buffer.putInt(id);
+        buffer.put((byte)type);
+        buffer.put((byte)0);
+        buffer.putShort((short)0);
+        buffer.putLong(data.length);
+        out.write(buffer.array(), 0, buffer.position());
+        out.write(data);
+        out.write(new byte[((data.length + 7) & ~7) - data.length]);
+    }
+
+    // only canonical decimals are stored as numbers so the reader gets
+    // back exactly the same text via str()
+    private static boolean isLong(String value) {
+        if (value.length() == 0 || value.length() > 18) {
+            return false;
+        }
+        var start = value.charAt(0) == '-' ? 1 : 0;
+        if (start == value.length()) {
+            return false;
+        }
+        if (value.charAt(start) == '0' && (value.length() > start + 1 || start == 1)) {
+            return false;
+        }
+        for (int i=start;i<value.length();i++) {
+            var c = value.charAt(i);
+            if (c < '0' || c > '9') {
+                return false;
+            }
+        }
+        return true;
+    }
+}
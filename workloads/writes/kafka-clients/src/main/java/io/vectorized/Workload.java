@@ -25,6 +25,7 @@ public class Workload {
     private volatile App.InitBody args;
     private volatile ArrayList<Thread> threads;
     private BufferedWriter opslog;
+    private BinaryOpsLog binlog;
     private long past_us;
     private long before_us = -1;
     private long last_op = 0;
@@ -69,7 +70,11 @@ public class Workload {
 
         is_active = true;
         past_us = 0;
-        opslog = new BufferedWriter(new FileWriter(new File(new File(args.experiment, args.server), "workload.log")));
+        if (args.settings.oplog.equals("binary")) {
+            binlog = new BinaryOpsLog(new File(new File(args.experiment, args.server), "workload.log"));
+        } else {
+            opslog = new BufferedWriter(new FileWriter(new File(new File(args.experiment, args.server), "workload.log")));
+        }
         
         should_reset = new HashMap<>();
         ops_info = new HashMap<>();
@@ -101,6 +106,9 @@ public class Workload {
         if (opslog != null) {
             opslog.flush();
         }
+        if (binlog != null) {
+            binlog.flush();
+        }
         
         for (var th : threads) {
             th.join();
@@ -109,6 +117,10 @@ public class Workload {
             opslog.flush();
             opslog.close();
         }
+        if (binlog != null) {
+            binlog.flush();
+            binlog.close();
+        }
     }
 
     public void event(String name) throws Exception {
@@ -120,9 +132,13 @@ public class Workload {
         if (now_us < past_us) {
             throw new Exception("Time cant go back, observed: " + now_us + " after: " + before_us);
         }
-        opslog.write("" + thread_id +
-                        "\t" + (now_us - past_us) +
-                        "\t" + message + "\n");
+        if (binlog != null) {
+            binlog.write(thread_id, now_us - past_us, message);
+        } else {
+            opslog.write("" + thread_id +
+                            "\t" + (now_us - past_us) +
+                            "\t" + message + "\n");
+        }
         past_us = now_us;
     }
 